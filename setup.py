@@ -35,6 +35,12 @@ setup(
     entry_points={
         "console_scripts": [
             "opencraftshop=main:design_furniture",
+            "opencraftshop-offcuts=offcut_inventory:cli",
+            "opencraftshop-batch=batch_orders:run_batch",
+            "opencraftshop-sweep=dimension_sweep:run_sweep",
+            "opencraftshop-recost=recost:run_recost",
+            "opencraftshop-design-batch=design_batch:run_design_batch",
+            "opencraftshop-render=scad_render:run_render",
         ],
     },
 )
\ No newline at end of file
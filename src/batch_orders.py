@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Batch Order Optimization
+Pools the parts of many orders into one cut plan, then splits it back
+into per-order cut sheets and one combined purchase list
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Any
+import click
+from optimize_cuts import CutOptimizer, CutPiece, Stock, STRATEGIES
+from generate_bom import BillOfMaterials, build_bom, generate_shopping_list
+from sheet_nesting import PanelPiece, Sheet, SheetNester
+from furniture_templates import DIMENSIONS, FURNITURE_TYPES, get_template
+
+TAG_SEPARATOR: str = ': '
+# Order ids name a directory under orders/ and prefix piece tags, so no separators, ':' or bare '.'/'..'
+SAFE_ID = re.compile(r'^(?!\.\.?$)[A-Za-z0-9._-]+$')
+
+
+@dataclass
+class Order:
+    order_id: str
+    furniture_type: str
+    length: Optional[float] = None  # None takes the furniture type's default
+    width: Optional[float] = None
+    height: Optional[float] = None
+
+    def dimensions(self) -> Tuple[float, float, float]:
+        """(length, width, height) with the furniture type's defaults filled in"""
+        defaults: Dict[str, float] = get_template(self.furniture_type).defaults
+        length, width, height = (defaults[name] if value is None else float(value)
+                                 for name, value in zip(DIMENSIONS, (self.length, self.width, self.height)))
+        return length, width, height
+
+    def check(self) -> None:
+        """Raise ValueError for an id unfit for a tag or directory name, or out-of-range dimensions"""
+        if not SAFE_ID.match(self.order_id):
+            raise ValueError(f"Order {self.order_id}: order ids may only use letters, digits, '.', '_' and '-'")
+        error: Optional[str] = get_template(self.furniture_type).check_dimensions(*self.dimensions())
+        if error:
+            raise ValueError(f"Order {self.order_id}: {error}")
+
+
+@dataclass
+class BatchResult:
+    plan: Dict[str, List[Stock]]                  # pooled cut plan, tagged labels
+    sheets: Dict[str, List[Sheet]]                # pooled sheet goods, tagged labels
+    tags: Dict[str, Tuple[str, str]]              # tagged label -> (order_id, purpose)
+    cut_list: Dict[str, Any]                      # CutOptimizer.generate_cut_list(plan)
+    purchase_list: Dict[str, Any]                 # combined shopping list
+    order_sheets: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    separate_cost: Optional[float] = None         # lumber cost when each order is cut alone
+
+
+def load_orders(path: str) -> List[Order]:
+    """Read orders from a JSON list or JSON Lines file
+
+    Each order has 'order_id' and 'type', and optionally 'length',
+    'width' and 'height' in inches.
+    """
+    with open(path, 'r') as f:
+        text: str = f.read()
+    stripped: str = text.lstrip()
+    records: List[Dict[str, Any]] = (json.loads(text) if stripped.startswith('[')
+                                     else [json.loads(line) for line in text.splitlines() if line.strip()])
+    orders: List[Order] = []
+    for record in records:
+        if record['type'] not in FURNITURE_TYPES:
+            raise ValueError(f"Order {record['order_id']}: unknown furniture type '{record['type']}'")
+        order: Order = Order(str(record['order_id']), record['type'], record.get('length'),
+                             record.get('width'), record.get('height'))
+        order.check()
+        orders.append(order)
+    if len({order.order_id for order in orders}) != len(orders):
+        raise ValueError("Order ids must be unique")
+    return orders
+
+
+def tag_label(order_id: str, purpose: str) -> str:
+    """Label of a pooled piece; unique per order and part"""
+    return f"{order_id}{TAG_SEPARATOR}{purpose}"
+
+
+class BatchOptimizer:
+    """Optimize many orders as one job, keeping every piece tied to its order"""
+
+    def __init__(self, optimizer: Optional[CutOptimizer] = None, nester: Optional[SheetNester] = None) -> None:
+        self.optimizer: CutOptimizer = optimizer or CutOptimizer()
+        self.nester: SheetNester = nester or SheetNester(kerf=self.optimizer.kerf)
+
+    def order_parts(self, order: Order) -> Tuple[List[CutPiece], List[PanelPiece]]:
+        """The BOM of one order; raises ValueError for an order that fails Order.check()"""
+        order.check()
+        bom: BillOfMaterials = build_bom(order.furniture_type, *order.dimensions())
+        return bom.cut_pieces(), bom.panel_pieces()
+
+    def optimize(self, orders: List[Order], compare: bool = False) -> BatchResult:
+        """Pool, optimize, and split the plan back per order"""
+        tags: Dict[str, Tuple[str, str]] = {}
+        pooled: List[CutPiece] = []
+        panels: List[PanelPiece] = []
+        separate_cost: float = 0.0
+        for order in orders:
+            pieces, order_panels = self.order_parts(order)
+            for piece in pieces:
+                label: str = tag_label(order.order_id, piece.label)
+                tags[label] = (order.order_id, piece.label)
+                pooled.append(CutPiece(piece.length, piece.lumber_type, piece.quantity, label))
+            for panel in order_panels:
+                label = tag_label(order.order_id, panel.label)
+                tags[label] = (order.order_id, panel.label)
+                panels.append(PanelPiece(panel.width, panel.height, panel.material, panel.quantity,
+                                         label, panel.rotatable))
+            if compare:
+                alone: Dict[str, List[Stock]] = self.optimizer.optimize(pieces)
+                separate_cost += self.optimizer.generate_cut_list(alone)['summary']['total_cost']
+
+        plan: Dict[str, List[Stock]] = self.optimizer.optimize(pooled)
+        sheets: Dict[str, List[Sheet]] = self.nester.nest(panels) if panels else {}
+        cut_list: Dict[str, Any] = self.optimizer.generate_cut_list(plan)
+        result: BatchResult = BatchResult(
+            plan=plan,
+            sheets=sheets,
+            tags=tags,
+            cut_list=cut_list,
+            purchase_list=generate_shopping_list(plan, sheets),
+            separate_cost=separate_cost if compare else None
+        )
+        result.order_sheets = self.split_by_order(result, [order.order_id for order in orders])
+        return result
+
+    @staticmethod
+    def split_by_order(result: BatchResult, order_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Per-order cut sheets: the boards each order cuts from, and its share of their cost
+
+        A board cut for several orders appears on each of their sheets,
+        with the other orders listed and the cost split by length cut.
+        """
+        sheets: Dict[str, Dict[str, Any]] = {
+            order_id: {'order_id': order_id, 'lumber': {}, 'panels': {}, 'cost_share': 0.0}
+            for order_id in order_ids
+        }
+        for lumber_type, stocks in result.plan.items():
+            for stock, info in zip(stocks, result.cut_list[lumber_type]['stocks']):
+                by_order: Dict[str, List[Tuple[float, str]]] = {}
+                for length, label in stock.cuts:
+                    order_id, purpose = result.tags[label]
+                    by_order.setdefault(order_id, []).append((length, purpose))
+                cut_total: float = sum(cut[0] for cut in stock.cuts)
+                for order_id, cuts in by_order.items():
+                    share: float = (info.get('cost', 0.0) * stock.count
+                                    * sum(cut[0] for cut in cuts) / cut_total)
+                    sheets[order_id]['lumber'].setdefault(lumber_type, []).append({
+                        'stock_number': info['stock_number'],
+                        'length': stock.length,
+                        'quantity': stock.count,
+                        'cuts': cuts,
+                        'shared_with': sorted(other for other in by_order if other != order_id),
+                        'cost_share': share
+                    })
+                    sheets[order_id]['cost_share'] += share
+        for material, material_sheets in result.sheets.items():
+            for number, sheet in enumerate(material_sheets, 1):
+                for placement in sheet.placements:
+                    order_id, purpose = result.tags[placement.label]
+                    sheets[order_id]['panels'].setdefault(material, []).append({
+                        'sheet_number': number,
+                        'x': placement.x,
+                        'y': placement.y,
+                        'width': placement.width,
+                        'height': placement.height,
+                        'label': purpose,
+                        'rotated': placement.rotated
+                    })
+        return sheets
+
+
+def format_order_sheet(sheet: Dict[str, Any]) -> str:
+    """Format one order's cut sheet as text"""
+    lines: List[str] = [f"CUT SHEET - ORDER {sheet['order_id']}", "=" * 50, ""]
+    for lumber_type, boards in sheet['lumber'].items():
+        lines.append(f"{lumber_type}:")
+        for board in boards:
+            repeat: str = f" x {board['quantity']}" if board['quantity'] > 1 else ""
+            shared: str = f" (shared with {', '.join(board['shared_with'])})" if board['shared_with'] else ""
+            lines.append(f"  Stock #{board['stock_number']} ({board['length']}\"){repeat}{shared}")
+            for length, purpose in board['cuts']:
+                lines.append(f"    - {length}\" ({purpose})")
+        lines.append("")
+    for material, parts in sheet['panels'].items():
+        lines.append(f"{material}:")
+        for part in parts:
+            lines.append(f"  Sheet #{part['sheet_number']}: {part['width']}\" x {part['height']}\" "
+                         f"at ({part['x']:g}, {part['y']:g}) ({part['label']})")
+        lines.append("")
+    lines.append(f"Material cost share: ${sheet['cost_share']:.2f}")
+    return "\n".join(lines)
+
+
+@click.command()
+@click.argument('orders_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--kerf', default=0.125, help='Saw blade width (default: 1/8")')
+@click.option('--strategy', default='ffd', type=click.Choice(list(STRATEGIES)), help='Cut packing strategy')
+@click.option('--jobs', default=1, help='Worker processes for per-lumber-type optimization')
+@click.option('--compare/--no-compare', default=True, help='Also cost each order cut on its own')
+@click.option('--output-dir', default='./output/batch', help='Output directory')
+def run_batch(orders_file: str, kerf: float, strategy: str, jobs: int, compare: bool, output_dir: str) -> None:
+    """Optimize all orders in ORDERS_FILE (JSON or JSON Lines) as one cut plan"""
+    orders: List[Order] = load_orders(orders_file)
+    click.echo(f"Pooling {len(orders)} orders...")
+    batch: BatchOptimizer = BatchOptimizer(CutOptimizer(kerf=kerf, strategy=strategy, workers=jobs))
+    result: BatchResult = batch.optimize(orders, compare=compare)
+
+    out: Path = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    with open(out / 'cut_list.json', 'w') as f:
+        json.dump(result.cut_list, f, indent=2)
+    with open(out / 'purchase_list.json', 'w') as f:
+        json.dump(result.purchase_list, f, indent=2)
+    for order_id, sheet in result.order_sheets.items():
+        order_dir: Path = out / 'orders' / order_id
+        order_dir.mkdir(parents=True, exist_ok=True)
+        with open(order_dir / 'cut_sheet.json', 'w') as f:
+            json.dump(sheet, f, indent=2)
+        with open(order_dir / 'cut_sheet.txt', 'w') as f:
+            f.write(format_order_sheet(sheet))
+
+    total: float = result.purchase_list['total_cost']
+    boards: int = sum(stock.count for stocks in result.plan.values() for stock in stocks)
+    click.echo(f"Combined purchase: {boards} boards, "
+               f"{sum(len(s) for s in result.sheets.values())} sheets, ${total:.2f}")
+    if result.separate_cost is not None:
+        lumber: float = result.cut_list['summary']['total_cost']
+        click.echo(f"Lumber cut per order alone: ${result.separate_cost:.2f}; pooled: ${lumber:.2f}")
+    click.echo(f"Per-order cut sheets in {out / 'orders'}/")
+
+
+if __name__ == '__main__':
+    run_batch()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Cut Plan Lower Bounds
+Fast bounds on the boards and stock length any cut plan must use
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Sequence, Iterable
+
+EPS: float = 1e-9
+
+
+@dataclass
+class LowerBound:
+    boards: int       # no plan uses fewer boards
+    material: float   # no plan buys less stock length (inches)
+
+
+def _martello_toth_l2(lengths: List[float], counts: List[int], capacity: float) -> int:
+    """Martello-Toth L2 bin count bound over sorted distinct lengths"""
+    prefix_count: List[int] = [0]
+    prefix_sum: List[float] = [0.0]
+    for length, count in zip(lengths, counts):
+        prefix_count.append(prefix_count[-1] + count)
+        prefix_sum.append(prefix_sum[-1] + length * count)
+
+    def span(lo: int, hi: int) -> Tuple[int, float]:
+        return prefix_count[hi] - prefix_count[lo], prefix_sum[hi] - prefix_sum[lo]
+
+    half: int = bisect_right(lengths, capacity / 2 + EPS)
+    best: int = 0
+    for alpha in [0.0] + lengths[:half]:
+        top: int = bisect_right(lengths, capacity - alpha + EPS)
+        big_count, _ = span(top, len(lengths))                   # J1: > C - alpha
+        mid_count, mid_sum = span(half, top)                     # J2: (C/2, C - alpha]
+        _, small_sum = span(bisect_left(lengths, alpha - EPS), half)  # J3: [alpha, C/2]
+        spill: float = small_sum - (mid_count * capacity - mid_sum)
+        extra: int = max(0, math.ceil(spill / capacity - EPS))
+        best = max(best, big_count + mid_count + extra)
+    return best
+
+
+def _round_to_stock(material: float, stocks: List[float]) -> float:
+    """Smallest total of whole standard lengths that is at least `material`"""
+    if any(stock != int(stock) for stock in stocks):
+        return material
+    step: int = 0
+    for stock in stocks:
+        step = math.gcd(step, int(stock))
+    units: List[int] = [int(stock) // step for stock in stocks]
+    target: int = math.ceil(material / step - EPS)
+    # Every multiple of the gcd past min * max units is reachable (Frobenius)
+    if target >= units[0] * units[-1]:
+        return float(target * step)
+    reachable: List[bool] = [True] + [False] * (target + units[-1])
+    for total in range(1, len(reachable)):
+        reachable[total] = any(total >= u and reachable[total - u] for u in units)
+        if total >= target and reachable[total]:
+            return float(total * step)
+    return material
+
+
+def lower_bound(demands: Iterable[Tuple[float, int]], standard_lengths: Sequence[float],
+                kerf: float) -> LowerBound:
+    """Continuous and Martello-Toth L2 bounds adapted to several stock lengths
+
+    A board of length L holds cuts totalling at most L - kerf, the same
+    fit rule the packers use. The board bound is L2 against the longest
+    stock. The stock-length bound is the larger of the continuous bound
+    (every board also spends a kerf) and a big-piece bound: pieces longer
+    than half the longest board each need their own board, at least the
+    shortest standard length holding them, and the remaining pieces need
+    at least as much extra stock as their length beyond the room those
+    boards have left.
+    """
+    stocks: List[float] = sorted(standard_lengths)
+    capacity: float = stocks[-1] - kerf
+    merged: Dict[float, int] = {}
+    for length, count in demands:
+        if count > 0 and length <= capacity + EPS:
+            merged[length] = merged.get(length, 0) + count
+    if not merged:
+        return LowerBound(0, 0.0)
+    lengths: List[float] = sorted(merged)
+    counts: List[int] = [merged[length] for length in lengths]
+
+    total: float = sum(length * count for length, count in zip(lengths, counts))
+    boards: int = max(math.ceil(total / capacity - EPS), _martello_toth_l2(lengths, counts, capacity))
+
+    big_stock: float = 0.0
+    room: float = 0.0
+    small: float = 0.0
+    for length, count in zip(lengths, counts):
+        if length > capacity / 2 + EPS:
+            stock: float = stocks[bisect_left(stocks, length + kerf - EPS)]
+            big_stock += stock * count
+            room += (stock - kerf - length) * count
+        else:
+            small += length * count
+    material: float = max(total + kerf * boards, big_stock + max(0.0, small - room))
+    return LowerBound(boards, _round_to_stock(material, stocks))
+
+
+def cost_lower_bound(demands: Iterable[Tuple[float, int]], stock_costs: Dict[float, float],
+                     kerf: float) -> float:
+    """Cheapest price per inch of usable stock times the total cut length"""
+    rate: float = min(cost / (length - kerf) for length, cost in stock_costs.items())
+    return rate * sum(length * count for length, count in demands)
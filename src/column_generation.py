@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Column Generation Cutting-Stock Solver
+Solves the LP relaxation of multi-length 1D cutting stock by column
+generation and rounds it to an integer cut plan
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import time
+from typing import List, Dict, Tuple, Optional, Any, Sequence
+import numpy as np
+from optimize_cuts import CutOptimizer, CutPiece, CutPattern
+from packing import pack_patterns
+from price_catalog import get_catalog
+from bounds import cost_lower_bound
+
+EPS: float = 1e-9
+
+# (stock_length, cuts, count) as returned by packing.pack_patterns
+Pattern = Tuple[float, List[Tuple[float, str]], int]
+
+
+def _solve_master(matrix: np.ndarray, costs: np.ndarray, demand: np.ndarray,
+                  basis: List[int]) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+    """Revised simplex for min c.x s.t. A.x >= d, x >= 0
+
+    Columns 0..m-1 of `matrix` are the surplus variables (-I), the rest are
+    cutting patterns. `basis` must be primal feasible; it is updated in place
+    and returned with the primal solution and the row duals.
+    """
+    m: int = len(demand)
+    stalled: int = 0
+    last_objective: float = float('inf')
+
+    while True:
+        B: np.ndarray = matrix[:, basis]
+        x_basis: np.ndarray = np.linalg.solve(B, demand)
+        duals: np.ndarray = np.linalg.solve(B.T, costs[basis])
+        reduced: np.ndarray = costs - duals @ matrix
+        reduced[basis] = 0
+
+        objective: float = float(costs[basis] @ x_basis)
+        stalled = stalled + 1 if objective >= last_objective - EPS else 0
+        last_objective = min(last_objective, objective)
+
+        negative: np.ndarray = np.flatnonzero(reduced < -EPS)
+        if len(negative) == 0:
+            break
+        # Dantzig pricing, falling back to Bland's rule on degenerate stalls
+        entering: int = int(negative[0]) if stalled > m else int(negative[np.argmin(reduced[negative])])
+
+        direction: np.ndarray = np.linalg.solve(B, matrix[:, entering])
+        rows: np.ndarray = np.flatnonzero(direction > EPS)
+        ratios: np.ndarray = x_basis[rows] / direction[rows]
+        best: float = ratios.min()
+        ties: np.ndarray = rows[ratios <= best + EPS]
+        leaving: int = int(min(ties, key=lambda r: basis[r]))
+        basis[leaving] = entering
+
+    solution: np.ndarray = np.zeros(matrix.shape[1])
+    solution[basis] = np.maximum(x_basis, 0)
+    return solution, duals, basis
+
+
+def _best_pattern(values: np.ndarray, lengths: np.ndarray, limits: np.ndarray,
+                  capacity: float, deadline: float) -> Tuple[float, np.ndarray]:
+    """Bounded knapsack by branch and bound: max values.a with lengths.a <= capacity"""
+    order: List[int] = [i for i in np.argsort(-values / lengths) if values[i] > EPS]
+    best_value: float = 0.0
+    best_counts: np.ndarray = np.zeros(len(values), dtype=np.int64)
+    counts: np.ndarray = np.zeros(len(values), dtype=np.int64)
+
+    def search(depth: int, room: float, value: float) -> None:
+        nonlocal best_value, best_counts
+        if value > best_value + EPS:
+            best_value = value
+            best_counts = counts.copy()
+        if depth == len(order) or time.monotonic() >= deadline:
+            return
+        i: int = order[depth]
+        # LP bound: fill the remaining room at the current best density
+        if value + room * values[i] / lengths[i] <= best_value + EPS:
+            return
+        most: int = int(min(limits[i], (room + EPS) // lengths[i]))
+        for k in range(most, -1, -1):
+            counts[i] = k
+            search(depth + 1, room - k * lengths[i], value + k * values[i])
+        counts[i] = 0
+
+    search(0, capacity, 0.0)
+    return best_value, best_counts
+
+
+def _plan_cost(patterns: List[Pattern], costs: Dict[float, float]) -> Tuple[float, int]:
+    return (sum(costs[length] * count for length, _, count in patterns),
+            sum(count for _, _, count in patterns))
+
+
+def _assign_pieces(columns: List[Tuple[float, np.ndarray]], counts: List[int],
+                   items: List[Tuple[float, str]], remaining: np.ndarray) -> List[Pattern]:
+    """Turn integer pattern counts into cuts, dropping pieces beyond demand"""
+    patterns: List[Pattern] = []
+    for (stock_length, column), count in zip(columns, counts):
+        while count > 0:
+            take: np.ndarray = np.minimum(column, remaining)
+            if not take.any():
+                break
+            used: np.ndarray = np.flatnonzero(take)
+            repeat: int = int(min(count, (remaining[used] // take[used]).min()))
+            remaining -= take * repeat
+            cuts: List[Tuple[float, str]] = [items[i] for i in used for _ in range(int(take[i]))]
+            patterns.append((stock_length, cuts, repeat))
+            count -= repeat
+    return patterns
+
+
+def solve_cutting_stock(demands: List[Tuple[float, str, int]], stock_costs: Dict[float, float],
+                        kerf: float, deadline: float) -> List[Pattern]:
+    """Column generation with knapsack pricing, rounded to an integer plan
+
+    `stock_costs` maps each purchasable stock length to its price. The
+    first-fit decreasing plan is kept as the incumbent, so the result is
+    never worse than FFD. When `deadline` (time.monotonic) passes, the
+    current LP solution is rounded and the best plan so far is returned.
+    """
+    stock_lengths: List[float] = sorted(stock_costs)
+    incumbent: List[Pattern] = pack_patterns(demands, stock_lengths, kerf)
+    incumbent_cost: float = _plan_cost(incumbent, stock_costs)[0]
+
+    merged: Dict[Tuple[float, str], int] = {}
+    for length, label, quantity in demands:
+        if length + kerf <= stock_lengths[-1]:
+            merged[(length, label)] = merged.get((length, label), 0) + quantity
+    if not merged or incumbent_cost <= cost_lower_bound(
+            [(item[0], count) for item, count in merged.items()], stock_costs, kerf) + EPS:
+        return incumbent
+    items: List[Tuple[float, str]] = list(merged)
+    demand: np.ndarray = np.array([merged[item] for item in items], dtype=float)
+    lengths: np.ndarray = np.array([item[0] for item in items], dtype=float)
+    m: int = len(items)
+
+    # Seed with one homogeneous pattern per piece, on its cheapest stock per piece
+    columns: List[Tuple[float, np.ndarray]] = []
+    for i in range(m):
+        options = [(stock_costs[s] / int((s - kerf + EPS) // lengths[i]), s)
+                   for s in stock_lengths if s - kerf >= lengths[i] - EPS]
+        stock_length: float = min(options)[1]
+        column: np.ndarray = np.zeros(m, dtype=np.int64)
+        column[i] = min(demand[i], (stock_length - kerf + EPS) // lengths[i])
+        columns.append((stock_length, column))
+
+    matrix: np.ndarray = np.hstack([-np.eye(m), np.array([c for _, c in columns], dtype=float).T])
+    costs: np.ndarray = np.concatenate([np.zeros(m), [stock_costs[s] for s, _ in columns]])
+    basis: List[int] = list(range(m, 2 * m))
+
+    while True:
+        solution, duals, basis = _solve_master(matrix, costs, demand, basis)
+        objective: float = float(costs @ solution)
+        if time.monotonic() >= deadline:
+            break
+        added: bool = False
+        best_ratio: float = 1.0
+        for stock_length in stock_lengths:
+            value, counts = _best_pattern(duals, lengths, demand, stock_length - kerf, deadline)
+            best_ratio = max(best_ratio, value / stock_costs[stock_length])
+            if value > stock_costs[stock_length] + EPS:
+                columns.append((stock_length, counts))
+                matrix = np.hstack([matrix, counts.astype(float)[:, None]])
+                costs = np.append(costs, stock_costs[stock_length])
+                added = True
+        # Farley's bound: no integer plan costs less than z_LP / max(value / cost)
+        if not added or incumbent_cost <= objective / best_ratio + EPS:
+            break
+
+    # Round down, then pack whatever demand is left with FFD
+    rounded: List[int] = [int(v + EPS) for v in solution[m:]]
+    remaining: np.ndarray = demand.astype(np.int64)
+    plan: List[Pattern] = _assign_pieces(columns, rounded, items, remaining)
+    residual: List[Tuple[float, str, int]] = [
+        (items[i][0], items[i][1], int(remaining[i])) for i in range(m) if remaining[i] > 0
+    ]
+    plan += pack_patterns(residual, stock_lengths, kerf)
+
+    if _plan_cost(plan, stock_costs) < (incumbent_cost, _plan_cost(incumbent, stock_costs)[1]):
+        return plan
+    return incumbent
+
+
+class ColumnGenerationOptimizer(CutOptimizer):
+    """Cost-minimizing cut optimizer built on column generation"""
+
+    def __init__(self, kerf: float = 0.125, time_limit: float = 5.0, workers: int = 1,
+                 cache: Optional[Any] = None, inventory: Optional[Any] = None,
+                 standard_lengths: Optional[Sequence[float]] = None) -> None:
+        super().__init__(kerf=kerf, strategy='patterns', workers=workers, cache=cache,
+                         time_limit=time_limit, inventory=inventory, standard_lengths=standard_lengths)
+        self._budgets: Dict[str, float] = {}
+
+    def optimize(self, cut_list: List[CutPiece]) -> Dict[str, List[CutPattern]]:
+        """Optimize cuts within the wall-clock budget, shared by piece count"""
+        total: int = sum(piece.quantity for piece in cut_list) or 1
+        self._budgets = {}
+        for piece in cut_list:
+            share: float = self.time_limit * piece.quantity / total
+            self._budgets[piece.lumber_type] = self._budgets.get(piece.lumber_type, 0) + share
+        return super().optimize(cut_list)
+
+    def cache_signature(self) -> Dict[str, Any]:
+        """Include the budget and the prices, since both decide which plan is cheapest"""
+        signature: Dict[str, Any] = super().cache_signature()
+        signature['time_limit'] = self.time_limit
+        signature['prices'] = get_catalog().table.digest
+        return signature
+
+    @property
+    def engine_name(self) -> str:
+        return 'column_generation'
+
+    def _optimize_type(self, lumber_type: str, pieces: List[CutPiece]) -> List[CutPattern]:
+        """Solve one lumber type as a cost-minimizing cutting-stock problem; lengths in ticks"""
+        deadline: float = time.monotonic() + self._budgets.get(lumber_type, self.time_limit)
+        demands: List[Tuple[float, str, int]] = [
+            (piece.length, piece.label, piece.quantity) for piece in pieces
+        ]
+        patterns: List[Pattern] = solve_cutting_stock(
+            demands, self._stock_costs_ticks(lumber_type), self.kerf_ticks, deadline
+        )
+        return [CutPattern(length, lumber_type, cuts, count) for length, cuts, count in patterns]
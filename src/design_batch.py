@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Batch Designs
+Runs many design requests, one JSON object per line, through a warm worker pool
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import json
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import List, Dict, Tuple, Any, Iterator, IO, Set
+import click
+from batch_orders import SAFE_ID
+from main import PlainConsole, run_design
+
+# Request fields and the run_design() argument each one sets
+REQUEST_FIELDS: Dict[str, str] = {
+    'type': 'furniture_type', 'length': 'length', 'width': 'width', 'height': 'height',
+    'kerf': 'kerf', 'units': 'units', 'stock_catalog': 'stock_catalog', 'strategy': 'strategy',
+    'time_limit': 'time_limit', 'improve': 'improve_seconds', 'seed': 'seed'
+}
+
+_quiet: PlainConsole = PlainConsole(quiet=True)
+
+
+def read_requests(stream: IO[str]) -> Iterator[Tuple[int, str]]:
+    """(line number, text) of every non-blank line"""
+    for number, line in enumerate(stream, start=1):
+        if line.strip():
+            yield number, line
+
+
+def design_one(number: int, line: str, output_root: str, models: bool) -> Dict[str, Any]:
+    """Run one request line in a worker; failures come back as records, not exceptions"""
+    record: Dict[str, Any] = {'line': number}
+    started: float = time.perf_counter()
+    try:
+        request: Any = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("a request must be a JSON object")
+        request_id: str = str(request.pop('id', number))
+        record['id'] = request_id
+        if not SAFE_ID.match(request_id):
+            raise ValueError(f"id '{request_id}' may only use letters, digits, '.', '_' and '-'")
+        unknown: List[str] = [key for key in request if key not in REQUEST_FIELDS]
+        if unknown:
+            raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+        if 'type' not in request:
+            raise ValueError("'type' is required")
+        arguments: Dict[str, Any] = {REQUEST_FIELDS[key]: value for key, value in request.items()}
+        summary: Dict[str, Any] = run_design(output_dir=str(Path(output_root) / request_id), models=models,
+                                             console=_quiet, **arguments)
+        record.update(ok=True, **summary)
+    except Exception as e:
+        record.update(ok=False, error=str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}")
+    record['seconds'] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def run_requests(lines: Iterator[Tuple[int, str]], output_root: str, jobs: int, models: bool,
+                 out: IO[str]) -> Tuple[int, int]:
+    """Design every request, writing each result line as soon as it finishes
+
+    At most a few requests per worker are in flight, so an endless stdin
+    is read only as fast as the pool can keep up. Returns (done, failed).
+    """
+    done: int = 0
+    failed: int = 0
+
+    def emit(record: Dict[str, Any]) -> None:
+        nonlocal done, failed
+        done += 1
+        failed += not record['ok']
+        out.write(json.dumps(record) + '\n')
+        out.flush()
+
+    if jobs <= 1:
+        for number, line in lines:
+            emit(design_one(number, line, output_root, models))
+        return done, failed
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: Set[Future] = set()
+        for number, line in lines:
+            pending.add(pool.submit(design_one, number, line, output_root, models))
+            if len(pending) >= 4 * jobs:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    emit(future.result())
+        for future in wait(pending).done:
+            emit(future.result())
+    return done, failed
+
+
+@click.command()
+@click.argument('requests', default='-', type=click.File('r'))
+@click.option('--output-dir', default='./output/designs',
+              help='Each request is written to <output-dir>/<id> (id defaults to the line number)')
+@click.option('--results', default='-', type=click.File('w'), help='Where to write result lines (default: stdout)')
+@click.option('--jobs', default=4, help='Worker processes')
+@click.option('--models/--no-models', default=True, help='Also write the OpenSCAD model and STL files')
+def run_design_batch(requests: IO[str], output_dir: str, results: IO[str], jobs: int, models: bool) -> None:
+    """Design furniture for every JSONL request in REQUESTS (default: stdin)
+
+    \b
+    Each line is an object such as
+      {"id": "desk-12", "type": "workbench", "length": 60, "kerf": 0.1}
+    with optional length, width, height, kerf, units, stock_catalog,
+    strategy, time_limit, improve and seed.
+    """
+    started: float = time.perf_counter()
+    done, failed = run_requests(read_requests(requests), output_dir, jobs, models, results)
+    click.echo(f"{done} design(s), {failed} failed, in {time.perf_counter() - started:.1f}s", err=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run_design_batch()
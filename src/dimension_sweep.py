@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Dimension Sweep
+Prices a furniture type over a whole grid of sizes at once, for quoting price curves
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import json
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Any
+import click
+import numpy as np
+from optimize_cuts import CutOptimizer, CutPiece, Stock, STRATEGIES
+from furniture_templates import DIMENSIONS, FURNITURE_TYPES, FurnitureTemplate, get_template
+from sheet_nesting import PanelPiece, SheetNester
+from price_catalog import PriceCatalog, get_catalog
+
+
+@dataclass
+class SweepResult:
+    lengths: np.ndarray      # the three axes of the grid
+    widths: np.ndarray
+    heights: np.ndarray
+    cost: np.ndarray         # (lengths, widths, heights); NaN outside the template's limits
+    boards: np.ndarray       # boards bought
+    sheets: np.ndarray       # sheet goods bought
+    efficiency: np.ndarray   # percent of bought board length that ends up in parts
+    valid: np.ndarray        # inside the template's dimension limits
+    distinct_plans: int      # optimizer and nester runs it took
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready form; invalid points become null"""
+        def grid(values: np.ndarray) -> Any:
+            return np.where(self.valid, values, None).tolist()
+        return {
+            'lengths': self.lengths.tolist(),
+            'widths': self.widths.tolist(),
+            'heights': self.heights.tolist(),
+            'cost': grid(self.cost),
+            'boards': grid(self.boards),
+            'sheets': grid(self.sheets),
+            'efficiency': grid(self.efficiency),
+            'distinct_plans': self.distinct_plans
+        }
+
+
+class DimensionSweep:
+    """Cost, board-count and efficiency grids over a range of dimensions
+
+    The template formulas are evaluated over the whole grid with NumPy.
+    Each lumber type's cut list is then deduplicated across the grid with
+    `np.unique`, so a cut list shared by many sizes (legs that only depend
+    on the height, say) is optimized once, and the per-type results are
+    scattered back and summed.
+    """
+
+    def __init__(self, optimizer: Optional[CutOptimizer] = None, nester: Optional[SheetNester] = None) -> None:
+        self.optimizer: CutOptimizer = optimizer or CutOptimizer()
+        self.nester: SheetNester = nester or SheetNester(kerf=self.optimizer.kerf)
+        self.prices: PriceCatalog = get_catalog()
+
+    def sweep(self, furniture_type: str, lengths: Any, widths: Any, heights: Any) -> SweepResult:
+        """Price every (length, width, height) combination of the three axes"""
+        template: FurnitureTemplate = get_template(furniture_type)
+        axes: List[np.ndarray] = [np.atleast_1d(np.asarray(axis, dtype=np.float64))
+                                  for axis in (lengths, widths, heights)]
+        grid: List[np.ndarray] = np.meshgrid(*axes, indexing='ij')
+        shape: Tuple[int, ...] = grid[0].shape
+        valid: np.ndarray = np.ones(shape, dtype=bool)
+        for dimension, values in zip(DIMENSIONS, grid):
+            low, high = template.limits[dimension]
+            valid &= (values >= low) & (values <= high)
+        points: List[np.ndarray] = [values[valid] for values in grid]
+
+        parts, panels = template.evaluate_grid(*points)
+        count: int = len(points[0])
+        cost: np.ndarray = np.zeros(count)
+        boards: np.ndarray = np.zeros(count, dtype=np.int64)
+        sheets: np.ndarray = np.zeros(count, dtype=np.int64)
+        bought: np.ndarray = np.zeros(count)
+        used: np.ndarray = np.zeros(count)
+        runs: int = 0
+
+        by_type: Dict[str, List[Tuple[np.ndarray, np.ndarray, str]]] = {}
+        for lumber_type, length, quantity, purpose in parts:
+            by_type.setdefault(lumber_type, []).append((length, quantity, purpose))
+        for lumber_type, type_parts in by_type.items():
+            purposes: List[str] = [purpose for _, _, purpose in type_parts]
+            table: np.ndarray = np.column_stack([column for length, quantity, _ in type_parts
+                                                 for column in (length, quantity)]) if count else np.zeros((0, 0))
+            rows, inverse = np.unique(table, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            totals: np.ndarray = np.array([self._price_lumber(lumber_type, row, purposes) for row in rows])
+            runs += len(rows)
+            if len(rows):
+                cost += totals[inverse, 0]
+                boards += totals[inverse, 1].astype(np.int64)
+                bought += totals[inverse, 2]
+                used += totals[inverse, 3]
+
+        by_material: Dict[str, List[Tuple[np.ndarray, np.ndarray, np.ndarray, str]]] = {}
+        for material, width, height, quantity, purpose in panels:
+            by_material.setdefault(material, []).append((width, height, quantity, purpose))
+        for material, material_panels in by_material.items():
+            purposes = [purpose for _, _, _, purpose in material_panels]
+            table = np.column_stack([column for width, height, quantity, _ in material_panels
+                                     for column in (width, height, quantity)]) if count else np.zeros((0, 0))
+            rows, inverse = np.unique(table, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            totals = np.array([self._price_sheets(material, row, purposes) for row in rows])
+            runs += len(rows)
+            if len(rows):
+                cost += totals[inverse, 0]
+                sheets += totals[inverse, 1].astype(np.int64)
+
+        def scatter(values: np.ndarray, fill: Any) -> np.ndarray:
+            out: np.ndarray = np.full(shape, fill, dtype=values.dtype)
+            out[valid] = values
+            return out
+
+        efficiency: np.ndarray = np.divide(used, bought, out=np.ones(count), where=bought > 0) * 100
+        return SweepResult(
+            lengths=axes[0], widths=axes[1], heights=axes[2],
+            cost=scatter(cost, np.nan), boards=scatter(boards, 0), sheets=scatter(sheets, 0),
+            efficiency=scatter(efficiency, np.nan), valid=valid, distinct_plans=runs
+        )
+
+    def _price_lumber(self, lumber_type: str, row: np.ndarray, purposes: List[str]) -> Tuple[float, ...]:
+        """(cost, boards, bought length, cut length) of one lumber type's cut list"""
+        pieces: List[CutPiece] = [
+            CutPiece(float(length), lumber_type, int(quantity), purpose)
+            for length, quantity, purpose in zip(row[0::2], row[1::2], purposes) if quantity > 0
+        ]
+        if not pieces:
+            return 0.0, 0, 0.0, 0.0
+        stocks: List[Stock] = self.optimizer.optimize(pieces)[lumber_type]
+        costs: np.ndarray = self.prices.stock_costs(lumber_type, [stock.length for stock in stocks])
+        cost: float = float(np.nansum(costs * [stock.count for stock in stocks]))
+        bought: float = sum(stock.length * stock.count for stock in stocks)
+        waste: float = sum(stock.waste * stock.count for stock in stocks)
+        return cost, sum(stock.count for stock in stocks), bought, bought - waste
+
+    def _price_sheets(self, material: str, row: np.ndarray, purposes: List[str]) -> Tuple[float, int]:
+        """(cost, sheets) of one material's panels"""
+        panels: List[PanelPiece] = [
+            PanelPiece(float(width), float(height), material, int(quantity), purpose)
+            for width, height, quantity, purpose in zip(row[0::3], row[1::3], row[2::3], purposes)
+            if quantity > 0
+        ]
+        if not panels:
+            return 0.0, 0
+        count: int = len(self.nester.nest(panels).get(material, []))
+        price: float = self.prices.sheet_price(material, self.nester.sheet_size) or 0.0
+        return price * count, count
+
+
+def parse_range(text: str) -> np.ndarray:
+    """'48:96:6' -> 48, 54, ... 96 (inclusive); '48,60,72' and '48' work too"""
+    if ':' in text:
+        parts: List[float] = [float(part) for part in text.split(':')]
+        start, stop = parts[0], parts[1]
+        step: float = parts[2] if len(parts) > 2 else 1.0
+        if step <= 0:
+            raise click.BadParameter(f"step must be positive in '{text}'")
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(part) for part in text.split(',')])
+
+
+@click.command()
+@click.option('--type', 'furniture_type', default='workbench', type=click.Choice(list(FURNITURE_TYPES)),
+              help='Furniture type')
+@click.option('--length', default=None, help="Lengths: start:stop[:step], a list, or one value")
+@click.option('--width', default=None, help="Widths, as for --length")
+@click.option('--height', default=None, help="Heights, as for --length")
+@click.option('--kerf', default=0.125, help='Saw blade width (default: 1/8")')
+@click.option('--strategy', default='ffd', type=click.Choice(list(STRATEGIES)), help='Cut packing strategy')
+@click.option('--output', default=None, help='Write the grids to this JSON file')
+def run_sweep(furniture_type: str, length: Optional[str], width: Optional[str], height: Optional[str],
+              kerf: float, strategy: str, output: Optional[str]) -> None:
+    """Price a furniture type over ranges of dimensions"""
+    defaults: Dict[str, float] = get_template(furniture_type).defaults
+    axes: List[np.ndarray] = [parse_range(text) if text else np.array([defaults[dimension]])
+                              for dimension, text in zip(DIMENSIONS, (length, width, height))]
+    sweeper: DimensionSweep = DimensionSweep(CutOptimizer(kerf=kerf, strategy=strategy))
+    result: SweepResult = sweeper.sweep(furniture_type, *axes)
+
+    click.echo(f"{furniture_type}: {result.valid.size} sizes, {int(result.valid.sum())} within limits, "
+               f"{result.distinct_plans} distinct cut lists optimized")
+    for index in zip(*np.nonzero(result.valid)):
+        size: str = ' x '.join(f"{axis[i]:g}\"" for axis, i in zip(axes, index))
+        click.echo(f"  {size:<24} ${result.cost[index]:8.2f}  {result.boards[index]:3d} boards  "
+                   f"{result.sheets[index]:2d} sheets  {result.efficiency[index]:5.1f}%")
+    if output:
+        with open(output, 'w') as f:
+            json.dump(result.to_dict(), f, indent=2)
+        click.echo(f"Grids written to {output}")
+
+
+if __name__ == '__main__':
+    run_sweep()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Furniture Templates
+Registry of furniture types declared as data in config/furniture_templates.json
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import ast
+import json
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+from typing import List, Dict, Tuple, Any, Callable, Optional
+import numpy as np
+
+DEFAULT_PATH: Path = Path(__file__).resolve().parent.parent / 'config' / 'furniture_templates.json'
+DIMENSIONS: Tuple[str, ...] = ('length', 'width', 'height')
+
+# (lumber_type, length, quantity, purpose) and (material, width, height, quantity, purpose)
+Part = Tuple[str, float, int, str]
+PanelPart = Tuple[str, float, float, int, str]
+Evaluator = Callable[[float, float, float], Tuple[List[Part], List[PanelPart], Dict[str, Any]]]
+# The same over arrays of dimensions: every number becomes an array of the broadcast shape,
+# and quantities are zero where an optional part's condition does not hold
+GridPart = Tuple[str, np.ndarray, np.ndarray, str]
+GridPanel = Tuple[str, np.ndarray, np.ndarray, np.ndarray, str]
+GridEvaluator = Callable[[np.ndarray, np.ndarray, np.ndarray], Tuple[List[GridPart], List[GridPanel]]]
+# One box of the 3D model as ((x, y, z) of its lowest corner, (x, y, z) extents), in inches
+Box = Tuple[Tuple[float, float, float], Tuple[float, float, float]]
+ModelEvaluator = Callable[[float, float, float, bool], List[Box]]  # (length, width, height, exploded)
+
+# Actual (thickness, width) of nominal lumber, as in src/lumber_lib.scad
+LUMBER_SIZES: Dict[str, Tuple[float, float]] = {
+    '2x4': (1.5, 3.5), '2x6': (1.5, 5.5), '2x8': (1.5, 7.25), '2x10': (1.5, 9.25), '2x12': (1.5, 11.25),
+    '4x4': (3.5, 3.5), '1x2': (0.75, 1.5), '1x4': (0.75, 3.5), '1x6': (0.75, 5.5), '1x8': (0.75, 7.25),
+    '1x10': (0.75, 9.25), '1x12': (0.75, 11.25)
+}
+AXES: str = 'xyz'
+
+# What a formula may use besides the dimensions and earlier derived values
+FORMULA_FUNCTIONS: Dict[str, Callable] = {'min': min, 'max': max, 'int': int, 'round': round, 'abs': abs}
+_ALLOWED_NODES: Tuple[type, ...] = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call, ast.Name,
+    ast.Load, ast.Constant, ast.operator, ast.unaryop, ast.boolop, ast.cmpop
+)
+# Element-wise stand-ins used when a formula is evaluated over arrays
+GRID_FUNCTIONS: Dict[str, Callable] = {
+    '_min': np.minimum, '_max': np.maximum, '_int': np.trunc, '_round': np.round, '_abs': np.abs,
+    '_where': np.where, '_and': np.logical_and, '_or': np.logical_or, '_not': np.logical_not
+}
+
+
+@dataclass(frozen=True)
+class FurnitureTemplate:
+    name: str
+    title: str
+    defaults: Dict[str, float]
+    limits: Dict[str, Tuple[float, float]]
+    scad_names: Tuple[str, ...]
+    supplies: Optional[List[Dict[str, Any]]]  # None keeps the generic supply list
+    ascii_view: str
+    evaluate: Evaluator  # (length, width, height) -> (parts, panels, scad parameters)
+    evaluate_grid: GridEvaluator  # the parts and panels over arrays of dimensions
+    evaluate_model: Optional[ModelEvaluator]  # boxes of the 3D model; None unless every row is placed
+
+    def check_dimensions(self, length: float, width: float, height: float) -> Optional[str]:
+        """Error message for dimensions outside the template's limits, or None"""
+        for dimension, value in zip(DIMENSIONS, (length, width, height)):
+            low, high = self.limits[dimension]
+            if not low <= value <= high:
+                return f"{dimension.capitalize()} must be between {low:g} and {high:g} inches"
+        return None
+
+
+def _check_formula(formula: str, names: List[str], where: str) -> str:
+    """Reject anything in a formula but arithmetic on known names"""
+    try:
+        tree: ast.Expression = ast.parse(formula, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"{where}: invalid formula '{formula}': {e.msg}") from None
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"{where}: '{type(node).__name__}' is not allowed in formula '{formula}'")
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name)
+                                               and node.func.id in FORMULA_FUNCTIONS and not node.keywords):
+            raise ValueError(f"{where}: only {', '.join(FORMULA_FUNCTIONS)} may be called in '{formula}'")
+        if isinstance(node, ast.Name) and node.id not in names and node.id not in FORMULA_FUNCTIONS:
+            raise ValueError(f"{where}: unknown name '{node.id}' in formula '{formula}'")
+    return f"({formula})"
+
+
+class _Vectorize(ast.NodeTransformer):
+    """Rewrite a checked formula to work element-wise on NumPy arrays"""
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        func: str = f"_{node.func.id}"
+        if func in ('_min', '_max'):
+            # min(a, b, c) -> minimum(minimum(a, b), c)
+            folded: ast.expr = node.args[0]
+            for arg in node.args[1:]:
+                folded = ast.Call(ast.Name(func, ast.Load()), [folded, arg], [])
+            return folded
+        return ast.Call(ast.Name(func, ast.Load()), node.args, [])
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.AST:
+        self.generic_visit(node)
+        return ast.Call(ast.Name('_where', ast.Load()), [node.test, node.body, node.orelse], [])
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.AST:
+        self.generic_visit(node)
+        func: str = '_and' if isinstance(node.op, ast.And) else '_or'
+        folded: ast.expr = node.values[0]
+        for value in node.values[1:]:
+            folded = ast.Call(ast.Name(func, ast.Load()), [folded, value], [])
+        return folded
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.Call(ast.Name('_not', ast.Load()), [node.operand], [])
+        return node
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        # a < b < c -> (a < b) & (b < c)
+        operands: List[ast.expr] = [node.left] + node.comparators
+        pairs: List[ast.expr] = [ast.Compare(left, [op], [right])
+                                 for left, op, right in zip(operands, node.ops, operands[1:])]
+        return self.visit_BoolOp(ast.BoolOp(ast.And(), pairs))
+
+
+def _vectorize(formula: str) -> str:
+    """Element-wise form of a formula already accepted by _check_formula"""
+    tree: ast.Expression = _Vectorize().visit(ast.parse(formula, mode='eval'))
+    return f"({ast.unparse(ast.fix_missing_locations(tree))})"
+
+
+def compile_template(name: str, spec: Dict[str, Any]) -> FurnitureTemplate:
+    """Compile a template spec into one generated evaluator function
+
+    Derived values become locals, parts and panels become tuple literals
+    and optional parts conditional splices, so evaluating a template is a
+    single call with no dict lookups or interpretation. A second, element-wise
+    function is generated from the same formulas for dimension sweeps, on
+    its first call, so plain runs do not pay for it at startup.
+    """
+    names: List[str] = list(DIMENSIONS)
+    body: List[str] = [f"def evaluate({', '.join(DIMENSIONS)}):"]
+    for derived, formula in spec.get('derived', {}).items():
+        body.append(f"    {derived} = {_check_formula(formula, names, f'{name}.{derived}')}")
+        names.append(derived)
+
+    def rows(key: str, fields: Tuple[str, ...]) -> str:
+        items: List[str] = []
+        for number, row in enumerate(spec.get(key, [])):
+            where: str = f"{name}.{key}[{number}]"
+            values: List[str] = [repr(row[fields[0]])]
+            values += [_check_formula(str(row[field]), names, where) for field in fields[1:-1]]
+            item: str = f"({', '.join(values + [repr(row[fields[-1]])])},)"
+            if 'when' in row:
+                item = f"*(({item},) if {_check_formula(row['when'], names, where)} else ())"
+            items.append(item)
+        return f"[{', '.join(items)}]"
+
+    scad: str = ', '.join(f"{key!r}: {_check_formula(str(formula), names, f'{name}.scad.{key}')}"
+                          for key, formula in spec.get('scad', {}).items())
+    body.append(f"    return ({rows('parts', ('lumber_type', 'length', 'quantity', 'purpose'))}, "
+                f"{rows('panels', ('material', 'width', 'height', 'quantity', 'purpose'))}, {{{scad}}})")
+
+    namespace: Dict[str, Any] = {'__builtins__': {}, **FORMULA_FUNCTIONS}
+    exec(compile('\n'.join(body), f"<template {name}>", 'exec'), namespace)
+
+    compiled: List[GridEvaluator] = []
+
+    def evaluate_grid(length: np.ndarray, width: np.ndarray,
+                      height: np.ndarray) -> Tuple[List[GridPart], List[GridPanel]]:
+        if not compiled:
+            compiled.append(compile_grid(name, spec))
+        return compiled[0](length, width, height)
+
+    model: Optional[ModelEvaluator] = None
+    if all('model' in row for key in ('parts', 'panels') for row in spec.get(key, [])):
+        model = compile_model(name, spec)
+
+    return FurnitureTemplate(
+        name=name,
+        title=spec.get('title', name.replace('_', ' ').title()),
+        defaults={dimension: spec['defaults'][dimension] for dimension in DIMENSIONS},
+        limits={dimension: tuple(spec['limits'][dimension]) for dimension in DIMENSIONS},
+        scad_names=tuple(spec.get('scad', {})),
+        supplies=spec.get('supplies'),
+        ascii_view=spec.get('ascii_view', name),
+        evaluate=namespace['evaluate'],
+        evaluate_grid=evaluate_grid,
+        evaluate_model=model
+    )
+
+
+def sheet_thickness(material: str) -> float:
+    """Thickness of a sheet good from its name, e.g. 0.75 for '3/4 plywood'"""
+    try:
+        return float(Fraction(material.split()[0]))
+    except (ValueError, ZeroDivisionError, IndexError):
+        raise ValueError(f"Can't read a thickness from sheet material '{material}'") from None
+
+
+def compile_model(name: str, spec: Dict[str, Any]) -> ModelEvaluator:
+    """The 3D model of a spec whose parts and panels all carry a 'model' placement
+
+    Every copy of a row becomes one box: the part's length and its lumber's
+    width and thickness (or the panel's width, height and sheet thickness)
+    laid along `axes`, its corner at `at`, moved by `exploded` in the
+    exploded view. Placement formulas may also use `i`, the copy's index.
+    The placement's own `length` and `quantity` replace the row's where the
+    drawing in src/templates differs from the cut list.
+    """
+    names: List[str] = list(DIMENSIONS) + list(spec.get('derived', {})) + ['i']
+    body: List[str] = [f"def evaluate_model({', '.join(DIMENSIONS)}, exploded):"]
+    for derived, formula in spec.get('derived', {}).items():
+        body.append(f"    {derived} = ({formula})")  # checked by compile_template
+    body.append("    boxes = []")
+    for key in ('parts', 'panels'):
+        for number, row in enumerate(spec.get(key, [])):
+            where: str = f"{name}.{key}[{number}].model"
+            placement: Dict[str, Any] = row['model']
+            axes: str = placement.get('axes', AXES)
+            if sorted(axes) != list(AXES):
+                raise ValueError(f"{where}: axes must list x, y and z once each, not '{axes}'")
+            extents: List[str]
+            if key == 'parts':
+                if row['lumber_type'] not in LUMBER_SIZES:
+                    raise ValueError(f"{where}: no actual size for lumber '{row['lumber_type']}'")
+                thickness, board_width = LUMBER_SIZES[row['lumber_type']]
+                extents = [_check_formula(str(placement.get('length', row['length'])), names, where),
+                           repr(board_width), repr(thickness)]
+            else:
+                extents = [_check_formula(str(row['width']), names, where),
+                           _check_formula(str(row['height']), names, where), repr(sheet_thickness(row['material']))]
+            size: List[str] = [extents[axes.index(axis)] for axis in AXES]
+            corner: List[Any] = placement['at']
+            offset: List[Any] = placement.get('exploded', [0, 0, 0])
+            if len(corner) != 3 or len(offset) != 3:
+                raise ValueError(f"{where}: 'at' and 'exploded' need x, y and z")
+            position: List[str] = [f"{_check_formula(str(a), names, where)} + exploded * "
+                                   f"{_check_formula(str(o), names, where)}" for a, o in zip(corner, offset)]
+            count: str = _check_formula(str(placement.get('quantity', row['quantity'])), names, where)
+            if 'when' in row:
+                count = f"({count} if {_check_formula(row['when'], names, where)} else 0)"
+            body.append(f"    for i in _range(int({count})):")
+            body.append(f"        boxes.append((({', '.join(position)}), ({', '.join(size)})))")
+    body.append("    return boxes")
+    namespace: Dict[str, Any] = {'__builtins__': {}, **FORMULA_FUNCTIONS, '_range': range}
+    exec(compile('\n'.join(body), f"<template {name} model>", 'exec'), namespace)
+    return namespace['evaluate_model']
+
+
+def compile_grid(name: str, spec: Dict[str, Any]) -> GridEvaluator:
+    """The element-wise evaluator of a spec already accepted by compile_template"""
+    grid: List[str] = [f"def evaluate_grid({', '.join(DIMENSIONS)}):",
+                       f"    shape = _shape({', '.join(f'_shape_of({d})' for d in DIMENSIONS)})"]
+    for derived, formula in spec.get('derived', {}).items():
+        grid.append(f"    {derived} = {_vectorize(formula)}")
+
+    def grid_rows(key: str, fields: Tuple[str, ...]) -> str:
+        items: List[str] = []
+        for row in spec.get(key, []):
+            values: List[str] = [repr(row[fields[0]])]
+            values += [f"_grid({_vectorize(str(row[field]))}, shape)" for field in fields[1:-2]]
+            count: str = f"_count({_vectorize(str(row[fields[-2]]))}, shape)"
+            if 'when' in row:
+                count = f"{count} * _grid({_vectorize(row['when'])}, shape).astype(_int64)"
+            items.append(f"({', '.join(values + [count, repr(row[fields[-1]])])})")
+        return f"[{', '.join(items)}]"
+
+    grid.append(f"    return ({grid_rows('parts', ('lumber_type', 'length', 'quantity', 'purpose'))}, "
+                f"{grid_rows('panels', ('material', 'width', 'height', 'quantity', 'purpose'))})")
+    grid_namespace: Dict[str, Any] = {
+        '__builtins__': {}, **GRID_FUNCTIONS, '_shape': np.broadcast_shapes, '_shape_of': np.shape,
+        '_grid': lambda value, shape: np.broadcast_to(np.asarray(value, dtype=np.float64), shape),
+        '_count': lambda value, shape: np.broadcast_to(np.asarray(value).astype(np.int64), shape),
+        '_int64': np.int64
+    }
+    exec(compile('\n'.join(grid), f"<template {name} grid>", 'exec'), grid_namespace)
+    return grid_namespace['evaluate_grid']
+
+
+def load_templates(path: Path = DEFAULT_PATH) -> Dict[str, FurnitureTemplate]:
+    """Read and compile every template in the registry file"""
+    with open(path, 'r') as f:
+        specs: Dict[str, Dict[str, Any]] = json.load(f)
+    return {name: compile_template(name, spec) for name, spec in specs.items()}
+
+
+TEMPLATES: Dict[str, FurnitureTemplate] = load_templates()
+FURNITURE_TYPES: Tuple[str, ...] = tuple(TEMPLATES)
+
+
+def get_template(furniture_type: str) -> FurnitureTemplate:
+    """The compiled template for a furniture type"""
+    try:
+        return TEMPLATES[furniture_type]
+    except KeyError:
+        raise ValueError(f"Unknown furniture type '{furniture_type}' "
+                         f"(expected one of: {', '.join(FURNITURE_TYPES)})") from None
+
+
+def scad_literal(value: Any) -> str:
+    """A parameter value as OpenSCAD source"""
+    if isinstance(value, (str, bool)):
+        return json.dumps(value)
+    return f"{value:g}"
+
+
+def scad_assignments(parameters: Dict[str, Any]) -> str:
+    """OpenSCAD assignments for evaluated template parameters"""
+    lines: List[str] = ["// Generated parameters"]
+    for name, value in parameters.items():
+        lines.append(f"{name} = {scad_literal(value)};")
+    return "\n".join(lines)
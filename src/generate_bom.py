@@ -1,201 +1,276 @@
 #!/usr/bin/env python3
-import json
-from typing import List, Dict, Any
-from dataclasses import dataclass
-from optimize_cuts import CutPiece
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from dataclasses import dataclass, asdict
+from optimize_cuts import CutOptimizer, CutPiece
+from furniture_templates import get_template
+from sheet_nesting import PanelPiece, Sheet, SheetNester
+from price_catalog import PriceCatalog, get_catalog
+from units import format_length, stock_label
 
-@dataclass
+@dataclass(frozen=True)
 class Material:
     lumber_type: str
     length: float
     quantity: int
     purpose: str
 
+@dataclass(frozen=True)
+class Panel:
+    material: str
+    width: float
+    height: float
+    quantity: int
+    purpose: str
+
+@dataclass(frozen=True)
+class BillOfMaterials:
+    """Immutable bill of materials; safe to share between threads"""
+    furniture_type: str
+    dimensions: Tuple[float, float, float]  # length, width, height
+    materials: Tuple[Material, ...]
+    panels: Tuple[Panel, ...] = ()
+    
+    def cut_pieces(self) -> List[CutPiece]:
+        """Lumber as pieces for the cut optimizer"""
+        return to_cut_pieces(self.materials)
+    
+    def panel_pieces(self) -> List[PanelPiece]:
+        """Sheet goods as pieces for the sheet nester"""
+        return to_panel_pieces(self.panels)
+    
+    def format_text(self, unit: str = 'in') -> str:
+        return format_bom_text(self.materials, self.panels, unit)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        length, width, height = self.dimensions
+        return {
+            'type': self.furniture_type,
+            'dimensions': {'length': length, 'width': width, 'height': height},
+            'materials': [asdict(mat) for mat in self.materials],
+            'panels': [asdict(panel) for panel in self.panels]
+        }
+
+
+def build_bom(furniture_type: str, length: float, width: float, height: float) -> BillOfMaterials:
+    """Bill of materials for a registered furniture type, without shared state"""
+    parts, panels, _ = get_template(furniture_type).evaluate(length, width, height)
+    return BillOfMaterials(furniture_type, (length, width, height),
+                           tuple(Material(*part) for part in parts), tuple(Panel(*panel) for panel in panels))
+
+
+def price_bom(bom: BillOfMaterials, kerf: float = 0.125, strategy: str = 'ffd') -> Dict[str, Any]:
+    """Cut list, sheet layout and shopping list for a bill of materials
+    
+    The optimizer and nester are built per call, so concurrent calls share
+    nothing mutable.
+    """
+    optimizer: CutOptimizer = CutOptimizer(kerf=kerf, strategy=strategy)
+    optimized: Dict[str, List] = optimizer.optimize(bom.cut_pieces())
+    nested: Dict[str, List[Sheet]] = {}
+    sheet_layout: Dict[str, Any] = {}
+    panels: List[PanelPiece] = bom.panel_pieces()
+    if panels:
+        nester: SheetNester = SheetNester(kerf=kerf)
+        nested = nester.nest(panels)
+        sheet_layout = nester.generate_cut_list(nested)
+    return {
+        'cut_list': optimizer.generate_cut_list(optimized),
+        'sheet_layout': sheet_layout,
+        'shopping_list': generate_shopping_list(optimized, nested, get_template(bom.furniture_type).supplies)
+    }
+
+
+def to_cut_pieces(materials: Iterable[Material]) -> List[CutPiece]:
+    """Convert materials to cut pieces"""
+    return [CutPiece(length=mat.length, lumber_type=mat.lumber_type, quantity=mat.quantity, label=mat.purpose)
+            for mat in materials]
+
+
+def to_panel_pieces(panels: Iterable[Panel]) -> List[PanelPiece]:
+    """Convert panels to pieces for the sheet nester"""
+    return [PanelPiece(panel.width, panel.height, panel.material, panel.quantity, panel.purpose)
+            for panel in panels]
+
+
 class BOMGenerator:
+    """Stateful builder kept for scripts that add materials by hand
+    
+    Its lists are per instance, so don't share one between threads; use
+    `build_bom` and the module-level functions instead.
+    """
+    
     def __init__(self) -> None:
         self.materials: List[Material] = []
+        self.panels: List[Panel] = []
         
     def add_material(self, lumber_type: str, length: float, quantity: int, purpose: str) -> None:
         """Add material to bill of materials"""
         self.materials.append(Material(lumber_type, length, quantity, purpose))
     
+    def add_panel(self, material: str, width: float, height: float, quantity: int, purpose: str) -> None:
+        """Add a sheet-goods part (plywood, MDF) to bill of materials"""
+        self.panels.append(Panel(material, width, height, quantity, purpose))
+    
     def clear_materials(self) -> None:
         """Clear existing materials"""
         self.materials = []
+        self.panels = []
+    
+    def generate_bom(self, furniture_type: str, length: float, width: float, height: float) -> List[CutPiece]:
+        """Generate bill of materials for any registered furniture type"""
+        bom: BillOfMaterials = build_bom(furniture_type, length, width, height)
+        self.materials = list(bom.materials)
+        self.panels = list(bom.panels)
+        return bom.cut_pieces()
     
     def generate_workbench_bom(self, length: float, width: float, height: float) -> List[CutPiece]:
         """Generate bill of materials for workbench"""
-        self.clear_materials()
-        
-        # Legs - 4x4
-        self.add_material("4x4", height, 4, "Legs")
-        
-        # Top boards - 2x6
-        num_top_boards = int(width / 5.5) + (1 if width % 5.5 > 0 else 0)
-        self.add_material("2x6", length, num_top_boards, "Top")
-        
-        # Long stretchers - 2x4
-        stretcher_length = length - 8  # Account for leg insets
-        self.add_material("2x4", stretcher_length, 4, "Long stretchers")
-        
-        # Short stretchers - 2x4
-        short_stretcher_length = width - 8
-        self.add_material("2x4", short_stretcher_length, 4, "Short stretchers")
-        
-        return self._convert_to_cut_pieces()
+        return self.generate_bom('workbench', length, width, height)
     
     def generate_storage_bench_bom(self, length: float, width: float, height: float) -> List[CutPiece]:
         """Generate bill of materials for storage bench"""
-        self.clear_materials()
-        
-        # Frame - 2x4
-        self.add_material("2x4", height, 4, "Corner posts")
-        self.add_material("2x4", length, 4, "Long frame pieces")
-        self.add_material("2x4", width - 7, 4, "Short frame pieces")
-        
-        # Top - 1x6
-        num_top_boards = int(width / 5.5) + (1 if width % 5.5 > 0 else 0)
-        self.add_material("1x6", length, num_top_boards, "Top boards")
-        
-        # Optional divider
-        if length > 36:
-            self.add_material("1x4", width - 7, 1, "Center divider")
-        
-        return self._convert_to_cut_pieces()
+        return self.generate_bom('storage_bench', length, width, height)
     
     def generate_bed_frame_bom(self, length: float, width: float, height: float) -> List[CutPiece]:
         """Generate bill of materials for bed frame"""
-        self.clear_materials()
-        
-        # Posts - 4x4
-        self.add_material("4x4", height + 10, 2, "Foot posts")  # Regular height
-        self.add_material("4x4", min(48, height + 22), 2, "Head posts")  # Taller for headboard
-        
-        # Rails - 2x10
-        self.add_material("2x10", length - 7, 2, "Side rails")
-        self.add_material("2x10", width - 7, 2, "Head/foot rails")
-        
-        # Center support - 2x6
-        self.add_material("2x6", length - 7, 1, "Center support beam")
-        
-        # Slats - 1x4
-        num_slats = max(9, int(length / 8))
-        self.add_material("1x4", width - 7, num_slats, "Support slats")
-        
-        # Headboard
-        self.add_material("2x4", min(48, height + 22), 2, "Headboard posts")
-        self.add_material("2x6", width, 3, "Headboard rails")
-        self.add_material("1x4", min(48, height + 22) - 7, 5, "Headboard slats")
-        
-        return self._convert_to_cut_pieces()
+        return self.generate_bom('bed_frame', length, width, height)
     
     def generate_bookshelf_bom(self, length: float, width: float, height: float) -> List[CutPiece]:
         """Generate bill of materials for bookshelf"""
-        self.clear_materials()
-        
-        # Sides - 1x12
-        self.add_material("1x12", height, 2, "Side panels")
-        
-        # Shelves - 1x12
-        num_shelves = max(3, min(8, int(height / 12)))
-        self.add_material("1x12", length - 1.5, num_shelves, "Shelves")
-        
-        # Back support - 1x4
-        self.add_material("1x4", height, 2, "Back vertical supports")
-        self.add_material("1x4", length - 1.5, 2, "Back horizontal supports")
-        
-        # Face frame (optional for tall shelves)
-        if height > 48:
-            self.add_material("1x2", length, 2, "Face frame rails")
-        
-        return self._convert_to_cut_pieces()
+        return self.generate_bom('bookshelf', length, width, height)
+    
+    def panel_pieces(self) -> List[PanelPiece]:
+        """Convert panels to pieces for the sheet nester"""
+        return to_panel_pieces(self.panels)
     
     def _convert_to_cut_pieces(self) -> List[CutPiece]:
         """Convert materials to cut pieces"""
-        cut_pieces = []
-        for mat in self.materials:
-            cut_pieces.append(CutPiece(
-                length=mat.length,
-                lumber_type=mat.lumber_type,
-                quantity=mat.quantity,
-                label=mat.purpose
-            ))
-        
-        return cut_pieces
-    
-    def generate_shopping_list(self, optimized_cuts: Dict[str, List]) -> Dict[str, Any]:
-        """Generate shopping list from optimized cuts"""
-        shopping_list: Dict[str, Any] = {
-            'lumber': {},
-            'total_cost': 0,
-            'items': []
-        }
-        
-        # Load prices
-        with open('config/lumber_prices.json', 'r') as f:
-            prices = json.load(f)['lumber_prices']
-        
-        # Count required boards by type and length
-        for lumber_type, stocks in optimized_cuts.items():
-            if lumber_type not in shopping_list['lumber']:
-                shopping_list['lumber'][lumber_type] = {}
-            
-            for stock in stocks:
-                length_feet = int(stock.length / 12)
-                length_key = f"{length_feet}'"
-                
-                if length_key not in shopping_list['lumber'][lumber_type]:
-                    shopping_list['lumber'][lumber_type][length_key] = {
-                        'quantity': 0,
-                        'unit_price': prices[lumber_type][str(length_feet)],
-                        'subtotal': 0
-                    }
-                
-                shopping_list['lumber'][lumber_type][length_key]['quantity'] += 1
-        
-        # Calculate totals and create item list
-        for lumber_type, lengths in shopping_list['lumber'].items():
-            for length, info in lengths.items():
-                info['subtotal'] = info['quantity'] * info['unit_price']
-                shopping_list['total_cost'] += info['subtotal']
-                
-                shopping_list['items'].append({
-                    'description': f"{lumber_type} x {length}",
-                    'quantity': info['quantity'],
-                    'unit_price': info['unit_price'],
-                    'subtotal': info['subtotal']
-                })
-        
-        # Add other supplies
-        shopping_list['other_supplies'] = [
-            {'item': 'Wood screws (3" deck screws)', 'quantity': '2 lbs', 'est_cost': 15.00},
-            {'item': 'Wood glue', 'quantity': '1 bottle', 'est_cost': 8.00},
-            {'item': 'Sandpaper (80, 120, 220 grit)', 'quantity': '1 pack each', 'est_cost': 12.00},
-            {'item': 'Wood finish/polyurethane', 'quantity': '1 quart', 'est_cost': 20.00}
-        ]
-        
-        shopping_list['estimated_total'] = shopping_list['total_cost'] + sum(
-            item['est_cost'] for item in shopping_list['other_supplies']
-        )
-        
-        return shopping_list
+        return to_cut_pieces(self.materials)
+    
+    def generate_shopping_list(self, optimized_cuts: Dict[str, List],
+                               nested_sheets: Optional[Dict[str, List[Sheet]]] = None) -> Dict[str, Any]:
+        """Generate shopping list from optimized cuts and nested sheet goods"""
+        return generate_shopping_list(optimized_cuts, nested_sheets)
     
     def format_bom_text(self) -> str:
         """Format bill of materials as text"""
-        lines: List[str] = ["BILL OF MATERIALS", "=" * 50, ""]
-        
-        # Group by lumber type
-        by_type: Dict[str, List[Material]] = {}
-        for mat in self.materials:
-            if mat.lumber_type not in by_type:
-                by_type[mat.lumber_type] = []
-            by_type[mat.lumber_type].append(mat)
-        
-        # Format each group
-        for lumber_type, materials in by_type.items():
-            lines.append(f"{lumber_type}:")
-            for mat in materials:
-                lines.append(f"  {mat.quantity}x @ {mat.length}\" - {mat.purpose}")
-            lines.append("")
-        
-        return "\n".join(lines)
\ No newline at end of file
+        return format_bom_text(self.materials, self.panels)
+
+
+def generate_shopping_list(optimized_cuts: Dict[str, List],
+                           nested_sheets: Optional[Dict[str, List[Sheet]]] = None,
+                           supplies: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Generate shopping list from optimized cuts and nested sheet goods
+    
+    `supplies` replaces the generic list of screws, glue and finish.
+    """
+    shopping_list: Dict[str, Any] = {
+        'lumber': {},
+        'total_cost': 0,
+        'items': []
+    }
+
+    prices: PriceCatalog = get_catalog()
+
+    # Count required boards by type and length
+    for lumber_type, stocks in optimized_cuts.items():
+        if lumber_type not in shopping_list['lumber']:
+            shopping_list['lumber'][lumber_type] = {}
+
+        for stock in stocks:
+            if stock.from_inventory:
+                continue  # already on the racks
+            length_key = stock_label(stock.length)
+
+            if length_key not in shopping_list['lumber'][lumber_type]:
+                shopping_list['lumber'][lumber_type][length_key] = {
+                    'quantity': 0,
+                    'unit_price': prices.price(lumber_type, stock.length),
+                    'subtotal': 0
+                }
+
+            shopping_list['lumber'][lumber_type][length_key]['quantity'] += stock.count
+
+    # Calculate totals and create item list
+    for lumber_type, lengths in shopping_list['lumber'].items():
+        for length, info in lengths.items():
+            info['subtotal'] = info['quantity'] * info['unit_price']
+            shopping_list['total_cost'] += info['subtotal']
+
+            shopping_list['items'].append({
+                'description': f"{lumber_type} x {length}",
+                'quantity': info['quantity'],
+                'unit_price': info['unit_price'],
+                'subtotal': info['subtotal']
+            })
+
+    # Sheet goods, counted per material and sheet size like boards per length
+    for material, sheets in (nested_sheets or {}).items():
+        by_size: Dict[str, int] = {}
+        for sheet in sheets:
+            size_key = f"{sheet.height / 12:g}x{sheet.width / 12:g}"
+            by_size[size_key] = by_size.get(size_key, 0) + 1
+        shopping_list.setdefault('sheets', {})[material] = {}
+        for size_key, quantity in by_size.items():
+            unit_price = prices.sheet_price(material, size_key)
+            if unit_price is None:
+                raise KeyError(f"No price for {material} sheet {size_key}' in {prices.path}")
+            subtotal = quantity * unit_price
+            shopping_list['sheets'][material][size_key] = {
+                'quantity': quantity,
+                'unit_price': unit_price,
+                'subtotal': subtotal
+            }
+            shopping_list['total_cost'] += subtotal
+            shopping_list['items'].append({
+                'description': f"{material} sheet {size_key}'",
+                'quantity': quantity,
+                'unit_price': unit_price,
+                'subtotal': subtotal
+            })
+
+    # Add other supplies
+    shopping_list['other_supplies'] = [dict(supply) for supply in supplies] if supplies is not None else [
+        {'item': 'Wood screws (3" deck screws)', 'quantity': '2 lbs', 'est_cost': 15.00},
+        {'item': 'Wood glue', 'quantity': '1 bottle', 'est_cost': 8.00},
+        {'item': 'Sandpaper (80, 120, 220 grit)', 'quantity': '1 pack each', 'est_cost': 12.00},
+        {'item': 'Wood finish/polyurethane', 'quantity': '1 quart', 'est_cost': 20.00}
+    ]
+
+    shopping_list['estimated_total'] = shopping_list['total_cost'] + sum(
+        item['est_cost'] for item in shopping_list['other_supplies']
+    )
+
+    return shopping_list
+
+
+def format_bom_text(materials: Iterable[Material], panels: Iterable[Panel] = (), unit: str = 'in') -> str:
+    """Format bill of materials as text, lengths in the display unit"""
+    lines: List[str] = ["BILL OF MATERIALS", "=" * 50, ""]
+
+    # Group by lumber type
+    by_type: Dict[str, List[Material]] = {}
+    for mat in materials:
+        if mat.lumber_type not in by_type:
+            by_type[mat.lumber_type] = []
+        by_type[mat.lumber_type].append(mat)
+
+    # Format each group
+    for lumber_type, group in by_type.items():
+        lines.append(f"{lumber_type}:")
+        for mat in group:
+            lines.append(f"  {mat.quantity}x @ {format_length(mat.length, unit)} - {mat.purpose}")
+        lines.append("")
+
+    # Sheet goods, grouped by material
+    by_material: Dict[str, List[Panel]] = {}
+    for panel in panels:
+        by_material.setdefault(panel.material, []).append(panel)
+    for material, sheet_parts in by_material.items():
+        lines.append(f"{material}:")
+        for panel in sheet_parts:
+            lines.append(f"  {panel.quantity}x @ {format_length(panel.width, unit)} x "
+                         f"{format_length(panel.height, unit)} - {panel.purpose}")
+        lines.append("")
+
+    return "\n".join(lines)
\ No newline at end of file
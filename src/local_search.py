@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Local Search Cut Plan Improver
+Anytime move/swap search that tries to empty whole boards of a cut plan
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import random
+import time
+from bisect import bisect_left
+from typing import List, Dict, Tuple, Optional, Iterator, Callable, Sequence
+from optimize_cuts import Stock
+from bounds import lower_bound
+
+# One board during the search: [stock_length, used_length, cuts]
+Board = List
+
+
+class LocalSearchImprover:
+    """Improve a cut plan by relocating and swapping cuts between boards
+
+    Every move is evaluated by its change in purchased stock length (the
+    waste), using the running cut total of each board, so a move costs
+    O(boards) regardless of how many cuts the plan holds. Runs are
+    reproducible for a given seed when bounded by max_iterations.
+    """
+
+    def __init__(self, kerf: float = 0.125, standard_lengths: Sequence[float] = (96, 120, 144, 192),
+                 time_limit: float = 2.0, max_iterations: int = 100000, seed: int = 0) -> None:
+        self.kerf: float = kerf
+        self.standard_lengths: List[float] = sorted(standard_lengths)
+        self.time_limit: float = time_limit
+        self.max_iterations: int = max_iterations
+        self.seed: int = seed
+
+    def run(self, plan: Dict[str, List[Stock]],
+            callback: Optional[Callable[[Dict[str, List[Stock]]], None]] = None) -> Dict[str, List[Stock]]:
+        """Run to the budget and return the best plan, reporting each improvement"""
+        best: Dict[str, List[Stock]] = plan
+        for better in self.improve(plan):
+            best = better
+            if callback is not None:
+                callback(better)
+        return best
+
+    def improve(self, plan: Dict[str, List[Stock]]) -> Iterator[Dict[str, List[Stock]]]:
+        """Yield successively better copies of the plan until the budget runs out"""
+        rng: random.Random = random.Random(self.seed)
+        deadline: float = time.monotonic() + self.time_limit
+        # Boards from the offcut inventory keep their cuts; only bought stock is searched
+        self._fixed: Dict[str, List[Stock]] = {
+            lumber_type: [stock for stock in stocks if stock.from_inventory]
+            for lumber_type, stocks in plan.items()
+        }
+        boards: Dict[str, List[Board]] = {
+            lumber_type: [[stock.length, sum(cut[0] for cut in stock.cuts), list(stock.cuts)]
+                          for stock in stocks if not stock.from_inventory for _ in range(stock.count)]
+            for lumber_type, stocks in plan.items()
+        }
+        bounds: Dict[str, float] = {
+            lumber_type: lower_bound([(cut[0], 1) for board in type_boards for cut in board[2]],
+                                     self.standard_lengths, self.kerf).material
+            for lumber_type, type_boards in boards.items()
+        }
+        searchable: List[str] = [t for t, b in boards.items() if len(b) > 1 and not self._optimal(b, bounds[t])]
+
+        for iteration in range(self.max_iterations):
+            if not searchable or (iteration % 64 == 0 and time.monotonic() >= deadline):
+                return
+            lumber_type: str = rng.choice(searchable)
+            if self._step(boards[lumber_type], rng):
+                yield self._snapshot(boards)
+                # Nothing left to gain once a type meets its lower bound
+                if len(boards[lumber_type]) < 2 or self._optimal(boards[lumber_type], bounds[lumber_type]):
+                    searchable.remove(lumber_type)
+
+    @staticmethod
+    def _optimal(boards: List[Board], bound: float) -> bool:
+        return sum(board[0] for board in boards) <= bound + 1e-6
+
+    def _step(self, boards: List[Board], rng: random.Random) -> bool:
+        """Try one move on a lumber type; True when the waste went down"""
+        # Tournament selection favours emptying the emptiest boards
+        a: int = rng.randrange(len(boards))
+        b: int = rng.randrange(len(boards))
+        victim: int = a if boards[a][1] / boards[a][0] <= boards[b][1] / boards[b][0] else b
+
+        if self._try_empty(boards, victim):
+            return True
+        return self._try_swap(boards, victim, rng)
+
+    def _try_empty(self, boards: List[Board], victim: int) -> bool:
+        """Relocate every cut of the victim board, growing other boards if that pays"""
+        lengths: Dict[int, float] = {}
+        used: Dict[int, float] = {}
+        moves: List[Tuple[int, Tuple[float, str]]] = []
+        delta: float = -boards[victim][0]
+
+        for cut in sorted(boards[victim][2], key=lambda c: c[0], reverse=True):
+            best: Optional[Tuple[float, float, int, float]] = None
+            for i, board in enumerate(boards):
+                if i == victim:
+                    continue
+                length: float = lengths.get(i, board[0])
+                total: float = used.get(i, board[1]) + cut[0]
+                if total + self.kerf <= length:
+                    new_length: float = length
+                else:
+                    grown: Optional[float] = self._stock_for(total)
+                    if grown is None:
+                        continue
+                    new_length = grown
+                candidate = (new_length - length, -total, i, new_length)
+                if best is None or candidate < best:
+                    best = candidate
+            if best is None or delta + best[0] >= 0:
+                return False
+            growth, _, target, new_length = best
+            delta += growth
+            lengths[target] = new_length
+            used[target] = used.get(target, boards[target][1]) + cut[0]
+            moves.append((target, cut))
+
+        for target, cut in moves:
+            boards[target][2].append(cut)
+        for target in used:
+            boards[target][0] = lengths[target]
+            boards[target][1] = used[target]
+        del boards[victim]
+        return True
+
+    def _try_swap(self, boards: List[Board], victim: int, rng: random.Random) -> bool:
+        """Trade a cut of the victim for a shorter one from a fuller board"""
+        source: Board = boards[victim]
+        if not source[2]:
+            return False
+        p: int = rng.randrange(len(source[2]))
+        piece: Tuple[float, str] = source[2][p]
+        target: int = rng.randrange(len(boards))
+        if target == victim:
+            return False
+        board: Board = boards[target]
+        for q, other in enumerate(board[2]):
+            if other[0] >= piece[0] or board[1] - other[0] + piece[0] + self.kerf > board[0]:
+                continue
+            # Same stock bought; the fuller board gets fuller, so the victim can shrink
+            source[2][p], board[2][q] = other, piece
+            source[1] += other[0] - piece[0]
+            board[1] += piece[0] - other[0]
+            shorter: Optional[float] = self._stock_for(source[1])
+            if shorter is not None and shorter < source[0]:
+                source[0] = shorter
+                return True
+            return False
+        return False
+
+    def _stock_for(self, used: float) -> Optional[float]:
+        """Shortest standard length that holds `used` inches of cuts"""
+        i: int = bisect_left(self.standard_lengths, used + self.kerf)
+        return self.standard_lengths[i] if i < len(self.standard_lengths) else None
+
+    def _snapshot(self, boards: Dict[str, List[Board]]) -> Dict[str, List[Stock]]:
+        return {
+            lumber_type: self._fixed[lumber_type] + [
+                Stock(board[0], lumber_type, sorted(board[2], key=lambda c: c[0], reverse=True))
+                for board in type_boards
+            ]
+            for lumber_type, type_boards in boards.items()
+        }
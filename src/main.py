@@ -7,15 +7,31 @@ MIT License
 import click
 import json
 import os
-import subprocess
+import re
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-from optimize_cuts import CutOptimizer, CutPiece
-from generate_bom import BOMGenerator
-from visualize_terminal import TerminalVisualizer
-from rich.console import Console
+from typing import Dict, Any, Optional, List, TYPE_CHECKING
+from optimize_cuts import CutOptimizer, CutPiece, STRATEGIES, load_cut_list, plan_delta
+from furniture_templates import FURNITURE_TYPES, FurnitureTemplate, get_template, scad_assignments
+from generate_bom import BillOfMaterials, build_bom, generate_shopping_list
+from price_catalog import get_catalog
+from units import UNITS, format_length, from_ticks, to_inches, to_ticks
 
-console: Console = Console()
+# Solvers, stores, rich and the visualizer are imported where they are used, so
+# a --no-visualize run (the web UI, batches) loads only what it needs
+if TYPE_CHECKING:
+    from rich.console import Console
+
+
+class PlainConsole:
+    """Stand-in for rich's Console when nothing is visualized: print() with the markup stripped"""
+    MARKUP = re.compile(r'\[/?[a-z][a-z_ ]*\]')
+    
+    def __init__(self, quiet: bool = False) -> None:
+        self.quiet: bool = quiet
+    
+    def print(self, *objects: Any, style: Optional[str] = None) -> None:
+        if not self.quiet:
+            print(*(self.MARKUP.sub('', str(obj)) for obj in objects))
 
 # The banner of shame and hope
 BANNER = """
@@ -30,46 +46,98 @@ BANNER = """
 ╚═══════════════════════════════════════════════════════════════╝
 """
 
-def get_furniture_defaults(furniture_type: str) -> Dict[str, int]:
+def get_furniture_defaults(furniture_type: str) -> Dict[str, float]:
     """Get default dimensions for different furniture types"""
-    defaults: Dict[str, Dict[str, int]] = {
-        'workbench': {'length': 72, 'width': 24, 'height': 34},
-        'storage_bench': {'length': 48, 'width': 18, 'height': 18},
-        'bed_frame': {'length': 80, 'width': 60, 'height': 14},
-        'bookshelf': {'length': 36, 'width': 12, 'height': 72}
-    }
-    return defaults.get(furniture_type, defaults['workbench'])
+    template: FurnitureTemplate = get_template(furniture_type if furniture_type in FURNITURE_TYPES else 'workbench')
+    return dict(template.defaults)
 
 @click.command()
 @click.option('--type', 'furniture_type', default='workbench', 
-              type=click.Choice(['workbench', 'storage_bench', 'bed_frame', 'bookshelf']), 
+              type=click.Choice(list(FURNITURE_TYPES)), 
               help='Furniture type')
-@click.option('--length', type=int, help='Length in inches')
-@click.option('--width', type=int, help='Width in inches')
-@click.option('--height', type=int, help='Height in inches')
-@click.option('--kerf', default=0.125, help='Saw blade width (default: 1/8")')
+@click.option('--length', type=float, help='Length, in --units')
+@click.option('--width', type=float, help='Width, in --units')
+@click.option('--height', type=float, help='Height, in --units')
+@click.option('--kerf', type=float, default=None, help='Saw blade width, in --units (default: 1/8")')
+@click.option('--units', default='in', type=click.Choice(list(UNITS)),
+              help='Unit of the dimensions on the command line and in the text reports')
+@click.option('--stock-catalog', default='imperial',
+              help='Standard board lengths to buy, from config/lumber_prices.json (imperial, metric)')
+@click.option('--strategy', default='ffd', type=click.Choice(list(STRATEGIES) + ['column_generation']),
+              help='Cut packing strategy (patterns = repeated layouts for large orders, '
+                   'subset_sum = fill each board as tightly as possible, '
+                   'column_generation = cost-minimizing exact solver, '
+                   'auto = pick a solver per lumber type by instance size)')
+@click.option('--time-limit', default=5.0,
+              help='Seconds the column_generation or auto solvers may spend in total')
+@click.option('--improve', 'improve_seconds', default=0.0,
+              help='Seconds of local search to refine the cut plan after packing')
+@click.option('--seed', default=0, help='Random seed for --improve, for reproducible runs')
+@click.option('--jobs', default=1, help='Worker processes for per-lumber-type optimization')
+@click.option('--cache-dir', default=None, help='Reuse optimization results stored in this directory')
+@click.option('--offcuts', 'offcuts_db', default=None,
+              help='Cut from this offcut inventory first and return usable leftovers to it')
+@click.option('--reuse-plan', default=None, type=click.Path(exists=True, dir_okay=False),
+              help='Repair this cut_list.json for changed parts instead of re-optimizing')
 @click.option('--output-dir', default='./output', help='Output directory')
+@click.option('--render-timeout', default=None, type=float,
+              help='Seconds before an OpenSCAD render is abandoned (default: 300)')
 @click.option('--visualize/--no-visualize', default=True, help='Show terminal visualization')
-def design_furniture(furniture_type: str, length: Optional[int], width: Optional[int], 
-                   height: Optional[int], kerf: float, output_dir: str, visualize: bool) -> None:
+def design_furniture(furniture_type: str, length: Optional[float], width: Optional[float], 
+                   height: Optional[float], kerf: Optional[float], units: str, stock_catalog: str,
+                   strategy: str, time_limit: float,
+                   improve_seconds: float, seed: int, jobs: int, cache_dir: Optional[str],
+                   offcuts_db: Optional[str], reuse_plan: Optional[str], output_dir: str,
+                   render_timeout: Optional[float], visualize: bool) -> None:
     """Generate furniture design and cut lists"""
     
-    # Show our banner of shame
+    console: Any = PlainConsole()
     if visualize:
+        from rich.console import Console
+        console = Console()
+        # Show our banner of shame
         console.print(BANNER, style="bright_blue")
     
+    try:
+        run_design(furniture_type, length, width, height, kerf=kerf, units=units, stock_catalog=stock_catalog,
+                   strategy=strategy, time_limit=time_limit, improve_seconds=improve_seconds, seed=seed,
+                   jobs=jobs, cache_dir=cache_dir, offcuts_db=offcuts_db, reuse_plan=reuse_plan,
+                   output_dir=output_dir, render_timeout=render_timeout, visualize=visualize, console=console)
+    except ValueError as e:
+        console.print(f"\n[red]{e}[/red]")
+
+def run_design(furniture_type: str, length: Optional[float] = None, width: Optional[float] = None,
+               height: Optional[float] = None, kerf: Optional[float] = None, units: str = 'in',
+               stock_catalog: str = 'imperial', strategy: str = 'ffd', time_limit: float = 5.0,
+               improve_seconds: float = 0.0, seed: int = 0, jobs: int = 1, cache_dir: Optional[str] = None,
+               offcuts_db: Optional[str] = None, reuse_plan: Optional[str] = None,
+               output_dir: str = './output', visualize: bool = False, models: bool = True,
+               render_timeout: Optional[float] = None,
+               console: Optional['Console'] = None) -> Dict[str, Any]:
+    """Design one piece of furniture and write its files to `output_dir`
+    
+    Dimensions and kerf are in `units`; None takes the furniture type's
+    defaults. Raises ValueError for an unknown type, stock catalog or
+    out-of-range dimensions. `models=False` skips the OpenSCAD files;
+    each STL render is abandoned after `render_timeout` seconds.
+    Returns a summary of what was written. Progress goes to `console`, a
+    PlainConsole by default.
+    """
+    console = console or PlainConsole()
     # Get default dimensions for furniture type
-    defaults: Dict[str, int] = get_furniture_defaults(furniture_type)
-    if length is None:
-        length = defaults['length']
-    if width is None:
-        width = defaults['width']
-    if height is None:
-        height = defaults['height']
+    template: FurnitureTemplate = get_template(furniture_type)
+    defaults: Dict[str, float] = template.defaults
+    # Everything past this point works in inches; --units only changes what is typed and printed
+    length = defaults['length'] if length is None else to_inches(length, units)
+    width = defaults['width'] if width is None else to_inches(width, units)
+    height = defaults['height'] if height is None else to_inches(height, units)
+    kerf = 0.125 if kerf is None else to_inches(kerf, units)
+    standard_lengths: List[float] = get_catalog().stock_lengths(stock_catalog)
     
     console.print(f"\nGenerating {furniture_type.replace('_', ' ')}")
-    console.print(f"Dimensions: {length}\" x {width}\" x {height}\"")
-    console.print(f"Kerf: {kerf}\"")
+    console.print(f"Dimensions: {format_length(length, units)} x {format_length(width, units)} x "
+                  f"{format_length(height, units)}")
+    console.print(f"Kerf: {format_length(kerf, units)}")
     
     # Create output directory
     Path(output_dir).mkdir(parents=True, exist_ok=True)
@@ -78,158 +146,194 @@ def design_furniture(furniture_type: str, length: Optional[int], width: Optional
     with open('config/design_params.json', 'r') as f:
         design_params = json.load(f)
     
-    # Validate dimensions based on furniture type
-    # Note: Different furniture types might have different constraints
-    max_length = 96 if furniture_type != 'bed_frame' else 120
-    max_width = 60 if furniture_type == 'bed_frame' else 36
-    max_height = 80 if furniture_type == 'bookshelf' else 40
-    
-    if not (12 <= length <= max_length):
-        console.print(f"\n[red]Length must be between 12 and {max_length} inches[/red]")
-        return
-    if not (8 <= width <= max_width):
-        console.print(f"\n[red]Width must be between 8 and {max_width} inches[/red]")
-        return
-    if not (8 <= height <= max_height):
-        console.print(f"\n[red]Height must be between 8 and {max_height} inches[/red]")
-        return
+    # Validate dimensions against the furniture type's limits
+    error: Optional[str] = template.check_dimensions(length, width, height)
+    if error:
+        raise ValueError(error)
     
     # Generate bill of materials based on furniture type
     console.print("\nCalculating materials...")
-    bom_gen: BOMGenerator = BOMGenerator()
-    
-    # Call appropriate BOM generator method based on furniture type
-    cut_pieces: List[CutPiece]
-    if furniture_type == 'workbench':
-        cut_pieces = bom_gen.generate_workbench_bom(length, width, height)
-    elif furniture_type == 'storage_bench':
-        cut_pieces = bom_gen.generate_storage_bench_bom(length, width, height)
-    elif furniture_type == 'bed_frame':
-        cut_pieces = bom_gen.generate_bed_frame_bom(length, width, height)
-    elif furniture_type == 'bookshelf':
-        cut_pieces = bom_gen.generate_bookshelf_bom(length, width, height)
+    bom: BillOfMaterials = build_bom(furniture_type, length, width, height)
+    cut_pieces: List[CutPiece] = bom.cut_pieces()
     
     # Save BOM
-    bom_text: str = bom_gen.format_bom_text()
+    bom_text: str = bom.format_text(units)
     with open(f"{output_dir}/bill_of_materials.txt", 'w') as f:
         f.write(bom_text)
     
     # Optimize cuts
     console.print("Optimizing cuts...")
-    optimizer: CutOptimizer = CutOptimizer(kerf=kerf)
-    optimized: Dict[str, List] = optimizer.optimize(cut_pieces)
-    cut_list: Dict[str, Any] = optimizer.generate_cut_list(optimized)
-    
-    # Save cut list
-    with open(f"{output_dir}/cut_list.json", 'w') as f:
-        json.dump(cut_list, f, indent=2)
-    
-    # Generate shopping list
-    console.print("Creating shopping list...")
-    shopping_list: Dict[str, Any] = bom_gen.generate_shopping_list(optimized)
-    
-    # Adjust supplies based on furniture type
-    if furniture_type == 'bed_frame':
-        shopping_list['other_supplies'] = [
-            {'item': 'Bed rail brackets', 'quantity': '4 sets', 'est_cost': 25.00},
-            {'item': 'Wood screws (3" and 2")', 'quantity': '2 lbs', 'est_cost': 15.00},
-            {'item': 'Wood glue', 'quantity': '1 bottle', 'est_cost': 8.00},
-            {'item': 'Sandpaper (120, 220 grit)', 'quantity': '1 pack each', 'est_cost': 10.00},
-            {'item': 'Wood stain or finish', 'quantity': '1 quart', 'est_cost': 25.00}
-        ]
-    elif furniture_type == 'bookshelf':
-        shopping_list['other_supplies'] = [
-            {'item': 'Wood screws (1.5" and 2")', 'quantity': '1 lb', 'est_cost': 10.00},
-            {'item': 'Shelf pins', 'quantity': '20', 'est_cost': 5.00},
-            {'item': 'Wood glue', 'quantity': '1 bottle', 'est_cost': 8.00},
-            {'item': 'Sandpaper (120, 220 grit)', 'quantity': '1 pack each', 'est_cost': 10.00},
-            {'item': 'Wood finish', 'quantity': '1 quart', 'est_cost': 20.00}
-        ]
-    
-    shopping_list['estimated_total'] = shopping_list['total_cost'] + sum(
-        item['est_cost'] for item in shopping_list['other_supplies']
-    )
-    
-    # Save shopping list
-    with open(f"{output_dir}/shopping_list.json", 'w') as f:
-        json.dump(shopping_list, f, indent=2)
-    
-    # Create text versions
-    with open(f"{output_dir}/cut_list.txt", 'w') as f:
-        f.write(f"OPTIMIZED CUT LIST - {furniture_type.upper().replace('_', ' ')}\n")
-        f.write("=" * 50 + "\n\n")
-        for lumber_type, data in cut_list.items():
-            if lumber_type == 'summary':
-                continue
-            f.write(f"{lumber_type}:\n")
-            for stock in data['stocks']:
-                f.write(f"  Stock #{stock['stock_number']} ({stock['length']}\" / {stock['length_feet']}')\n")
-                for cut in stock['cuts']:
-                    f.write(f"    - {cut[0]}\" ({cut[1]})\n")
-                f.write(f"    Waste: {stock['waste']:.2f}\" (Efficiency: {stock['efficiency']:.1f}%)\n\n")
+    cache: Optional[Any] = None
+    if cache_dir:
+        from optimization_cache import OptimizationCache
+        cache = OptimizationCache(cache_dir=cache_dir)
+    inventory: Optional[Any] = None
+    if offcuts_db:
+        from offcut_inventory import OffcutInventory
+        inventory = OffcutInventory(offcuts_db)
+    try:
+        optimizer: CutOptimizer
+        if strategy == 'column_generation':
+            from column_generation import ColumnGenerationOptimizer
+            optimizer = ColumnGenerationOptimizer(kerf=kerf, time_limit=time_limit, workers=jobs, cache=cache,
+                                                  inventory=inventory, standard_lengths=standard_lengths)
+        else:
+            optimizer = CutOptimizer(kerf=kerf, strategy=strategy, workers=jobs, cache=cache,
+                                     time_limit=time_limit, inventory=inventory, standard_lengths=standard_lengths)
+        optimized: Dict[str, List]
+        if reuse_plan:
+            # Keep the existing shop-floor plan; only the stocks touched by the change move
+            previous: Dict[str, List] = load_cut_list(reuse_plan)
+            added, removed = plan_delta(previous, cut_pieces)
+            optimized = optimizer.reoptimize(previous, added, removed)
+            console.print(f"Repaired {reuse_plan}: {sum(p.quantity for p in added)} piece(s) added, "
+                          f"{sum(p.quantity for p in removed)} removed")
+        else:
+            optimized = optimizer.optimize(cut_pieces)
+        if cache is not None:
+            stats: Dict[str, int] = cache.stats()
+            console.print(f"Optimization cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+    
+        # Refine the plan, reporting each better one as soon as it is found
+        if improve_seconds > 0:
+            from local_search import LocalSearchImprover
+            improver: LocalSearchImprover = LocalSearchImprover(
+                kerf=kerf, standard_lengths=optimizer.standard_lengths,
+                time_limit=improve_seconds, seed=seed
+            )
+            for better in improver.improve(optimized):
+                optimized = better
+                boards: int = sum(len(stocks) for stocks in optimized.values())
+                waste: float = sum(stock.waste for stocks in optimized.values() for stock in stocks)
+                console.print(f"  Improved plan: {boards} boards, {format_length(waste, units, 2)} waste")
+        cut_list: Dict[str, Any] = optimizer.generate_cut_list(optimized)
+    
+        # Save cut list
+        with open(f"{output_dir}/cut_list.json", 'w') as f:
+            json.dump(cut_list, f, indent=2)
+    
+        # Nest sheet goods (plywood, MDF) onto 4' x 8' sheets
+        nested: Dict[str, List] = {}
+        sheet_layout: Dict[str, Any] = {}
+        panels = bom.panel_pieces()
+        if panels:
+            console.print("Nesting sheet goods...")
+            from sheet_nesting import SheetNester
+            nester: SheetNester = SheetNester(kerf=kerf)
+            nested = nester.nest(panels)
+            sheet_layout = nester.generate_cut_list(nested)
+            with open(f"{output_dir}/sheet_layout.json", 'w') as f:
+                json.dump(sheet_layout, f, indent=2)
+    
+        # Generate shopping list
+        console.print("Creating shopping list...")
+        shopping_list: Dict[str, Any] = generate_shopping_list(optimized, nested, template.supplies)
+    
+        # Save shopping list
+        with open(f"{output_dir}/shopping_list.json", 'w') as f:
+            json.dump(shopping_list, f, indent=2)
+    
+        # Create text versions
+        def coordinate(inches: float) -> str:
+            return f"{from_ticks(to_ticks(inches), units):g}"
+    
+        with open(f"{output_dir}/cut_list.txt", 'w') as f:
+            f.write(f"OPTIMIZED CUT LIST - {furniture_type.upper().replace('_', ' ')}\n")
+            f.write("=" * 50 + "\n\n")
+            for lumber_type, data in cut_list.items():
+                if lumber_type == 'summary':
+                    continue
+                f.write(f"{lumber_type}: (solver: {data['engine']})\n")
+                for stock in data['stocks']:
+                    repeat: str = f" x {stock['quantity']}" if stock['quantity'] > 1 else ""
+                    if 'offcut_id' in stock:
+                        repeat += f" [offcut #{stock['offcut_id']}]"
+                    size: str = (f"{stock['length']}\" / {stock['length_feet']}'" if units == 'in'
+                                 else format_length(stock['length'], units))
+                    f.write(f"  Stock #{stock['stock_number']} ({size}){repeat}\n")
+                    for cut in stock['cuts']:
+                        f.write(f"    - {format_length(cut[0], units)} ({cut[1]})\n")
+                    f.write(f"    Waste: {format_length(stock['waste'], units, 2)} "
+                            f"(Efficiency: {stock['efficiency']:.1f}%)\n\n")
+        
+            summary = cut_list['summary']
+            f.write(f"\nSUMMARY:\n")
+            if units == 'in':
+                f.write(f"Total waste: {summary['total_waste_inches']:.2f}\" ({summary['total_waste_feet']:.2f}')\n")
+            else:
+                f.write(f"Total waste: {format_length(summary['total_waste_inches'], units, 1)}\n")
+            f.write(f"Overall efficiency: {summary['efficiency']:.1f}%\n")
+            f.write(f"Optimality gap: {summary['optimality_gap']:.1f}% "
+                    f"(lower bound: {summary['lower_bound_boards']} boards, "
+                    f"{format_length(summary['lower_bound_length'], units, 2)} of stock)\n")
+            f.write(f"Total cost: ${summary['total_cost']:.2f}\n")
         
-        summary = cut_list['summary']
-        f.write(f"\nSUMMARY:\n")
-        f.write(f"Total waste: {summary['total_waste_inches']:.2f}\" ({summary['total_waste_feet']:.2f}')\n")
-        f.write(f"Overall efficiency: {summary['efficiency']:.1f}%\n")
-        f.write(f"Total cost: ${summary['total_cost']:.2f}\n")
-    
-    with open(f"{output_dir}/shopping_list.txt", 'w') as f:
-        f.write(f"SHOPPING LIST - {furniture_type.upper().replace('_', ' ')}\n")
-        f.write("=" * 50 + "\n\n")
-        f.write("LUMBER:\n")
-        for item in shopping_list['items']:
-            f.write(f"  {item['quantity']}x {item['description']} @ ${item['unit_price']:.2f} = ${item['subtotal']:.2f}\n")
-        f.write(f"\nLumber Total: ${shopping_list['total_cost']:.2f}\n\n")
+            for material, data in sheet_layout.items():
+                if material == 'summary':
+                    continue
+                f.write(f"\nSHEET GOODS - {material} ({data['sheet_size']}' sheets, "
+                        f"{data['efficiency']:.1f}% used):\n")
+                for sheet in data['sheets']:
+                    f.write(f"  Sheet #{sheet['sheet_number']}\n")
+                    for part in sheet['placements']:
+                        turned: str = " (rotated)" if part['rotated'] else ""
+                        f.write(f"    - {format_length(part['width'], units)} x {format_length(part['height'], units)} "
+                                f"at ({coordinate(part['x'])}, {coordinate(part['y'])}) "
+                                f"({part['label']}){turned}\n")
+    
+        with open(f"{output_dir}/shopping_list.txt", 'w') as f:
+            f.write(f"SHOPPING LIST - {furniture_type.upper().replace('_', ' ')}\n")
+            f.write("=" * 50 + "\n\n")
+            f.write("LUMBER:\n")
+            for item in shopping_list['items']:
+                f.write(f"  {item['quantity']}x {item['description']} @ ${item['unit_price']:.2f} = ${item['subtotal']:.2f}\n")
+            f.write(f"\nLumber Total: ${shopping_list['total_cost']:.2f}\n\n")
         
-        f.write("OTHER SUPPLIES:\n")
-        for supply in shopping_list['other_supplies']:
-            f.write(f"  - {supply['item']}: {supply['quantity']} (~${supply['est_cost']:.2f})\n")
-        f.write(f"\nESTIMATED TOTAL: ${shopping_list['estimated_total']:.2f}\n")
+            f.write("OTHER SUPPLIES:\n")
+            for supply in shopping_list['other_supplies']:
+                f.write(f"  - {supply['item']}: {supply['quantity']} (~${supply['est_cost']:.2f})\n")
+            f.write(f"\nESTIMATED TOTAL: ${shopping_list['estimated_total']:.2f}\n")
+    
+        # Only the final plan's leftovers go on the racks; a repaired plan's were stored when it was made
+        if inventory is not None and not reuse_plan:
+            optimizer.return_leftovers(optimized)
+    except BaseException:
+        # Nothing was written that uses the offcuts, so they stay on the racks
+        if inventory is not None:
+            inventory.rollback()
+            inventory.close()
+        raise
+    if inventory is not None:
+        inventory.commit()
+        inventory.close()
+    
+    summary: Dict[str, Any] = {
+        'type': furniture_type,
+        'length': length,
+        'width': width,
+        'height': height,
+        'kerf': kerf,
+        'output_dir': str(output_dir),
+        'boards': sum(stock.count for stocks in optimized.values() for stock in stocks),
+        'sheets': sum(len(sheets) for sheets in nested.values()),
+        'efficiency': cut_list['summary']['efficiency'],
+        'total_cost': shopping_list['total_cost'],
+        'estimated_total': shopping_list['estimated_total']
+    }
+    if not models:
+        return summary
     
     # Generate OpenSCAD model
     console.print("Generating 3D model...")
+    import shutil
+    from scad_render import DEFAULT_TIMEOUT, RenderJob, render_all, view_jobs
     
     # Get appropriate template file
     template_file: str = f'src/templates/{furniture_type}.scad'
     
-    # Generate parameters based on furniture type
-    scad_params: str
-    if furniture_type == 'workbench':
-        scad_params = f"""
-// Generated parameters
-bench_length = {length};
-bench_width = {width};
-bench_height = {height};
-top_thickness = 3;
-"""
-    elif furniture_type == 'storage_bench':
-        scad_params = f"""
-// Generated parameters
-bench_length = {length};
-bench_width = {width};
-bench_height = {height};
-storage_depth = {height - 4};
-"""
-    elif furniture_type == 'bed_frame':
-        scad_params = f"""
-// Generated parameters
-bed_length = {length};
-bed_width = {width};
-bed_height = {height};
-headboard_height = {min(48, height + 22)};
-mattress_support_slats = {max(9, int(length / 8))};
-"""
-    elif furniture_type == 'bookshelf':
-        num_shelves: int = max(3, min(8, int(height / 12)))
-        scad_params = f"""
-// Generated parameters
-shelf_height = {height};
-shelf_width = {length};
-shelf_depth = {width};
-num_shelves = {num_shelves};
-shelf_thickness = "1x12";
-"""
+    # Generate parameters from the furniture template
+    parameters: Dict[str, Any] = template.evaluate(length, width, height)[2]
+    scad_params: str = scad_assignments(parameters)
     
     # Read template and prepend parameters
     with open(template_file, 'r') as f:
@@ -244,8 +348,7 @@ shelf_thickness = "1x12";
             skip_params = True
             new_lines.append(line)
             new_lines.append(scad_params.strip())
-        elif skip_params and line.strip() and not any(line.strip().startswith(p) for p in 
-                ['bench_', 'top_', 'bed_', 'shelf_', 'storage_', 'headboard_', 'mattress_', 'num_']):
+        elif skip_params and line.strip() and not line.strip().startswith(template.scad_names):
             skip_params = False
             new_lines.append(line)
         elif not skip_params:
@@ -258,32 +361,23 @@ shelf_thickness = "1x12";
         f.write(custom_scad)
     
     # Copy lumber_lib.scad to output directory
-    import shutil
     shutil.copy('src/lumber_lib.scad', f'{output_dir}/lumber_lib.scad')
     
-    # Generate STL files (both assembled and exploded views)
-    for view_mode, suffix in [("assembled", ""), ("exploded", "_exploded")]:
-        output_stl_name: str = f"{furniture_type}{suffix}.stl"
-        try:
-            # Create a temporary scad file with the view mode set
-            temp_scad_content = custom_scad.replace('view_mode = "assembled";', f'view_mode = "{view_mode}";')
-            temp_scad_name = f"{furniture_type}_custom_{view_mode}.scad"
-            with open(f"{output_dir}/{temp_scad_name}", 'w') as f:
-                f.write(temp_scad_content)
-            
-            subprocess.run([
-                'openscad',
-                '-o', output_stl_name,
-                temp_scad_name
-            ], check=True, capture_output=True, cwd=output_dir)
-            console.print(f"[green]✓ Generated {output_stl_name} ({view_mode} view)[/green]")
-        except subprocess.CalledProcessError as e:
-            console.print(f"[red]OpenSCAD error: {e.stderr.decode()}[/red]")
-        except FileNotFoundError:
+    # Render both views (assembled and exploded) at once, parameters passed as -D overrides
+    render_jobs: List[RenderJob] = view_jobs(furniture_type, parameters, output_dir, (length, width, height))
+    output_stl_name: str = render_jobs[-1].output.name
+    for result in render_all(render_jobs, timeout=render_timeout or DEFAULT_TIMEOUT):
+        if result.ok:
+            console.print(f"[green]✓ Generated {result.job.output.name} ({result.job.view} view)[/green]")
+        elif result.status == 'missing':
             console.print("[yellow]OpenSCAD not found. Install from openscad.org[/yellow]")
+            break
+        else:
+            console.print(f"[red]OpenSCAD error ({result.job.view} view): {result.error}[/red]")
     
     # Terminal visualization
     if visualize:
+        from visualize_terminal import TerminalVisualizer
         viz: TerminalVisualizer = TerminalVisualizer()
         
         # Display ASCII art (adapted for furniture type)
@@ -314,6 +408,9 @@ shelf_thickness = "1x12";
     console.print("bill_of_materials.txt - Parts list")
     console.print("cut_list.txt - Cut instructions")
     console.print("shopping_list.txt - Shopping list")
+    if sheet_layout:
+        console.print("sheet_layout.json - Sheet goods layout")
+    return summary
 
 if __name__ == '__main__':
     design_furniture()
\ No newline at end of file
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Model Meshes
+Writes STL files of a template's registry model without running OpenSCAD
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+from pathlib import Path
+from typing import Sequence
+import numpy as np
+from furniture_templates import Box
+
+# Corners of the unit cube (index 4x + 2y + z) and its triangles, counter-clockwise seen from outside
+UNIT_CORNERS: np.ndarray = np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=np.float64)
+CUBE_TRIANGLES: np.ndarray = np.array([
+    (0, 1, 3), (0, 3, 2), (4, 6, 7), (4, 7, 5),  # -x, +x
+    (0, 4, 5), (0, 5, 1), (2, 3, 7), (2, 7, 6),  # -y, +y
+    (0, 2, 6), (0, 6, 4), (1, 5, 7), (1, 7, 3)   # -z, +z
+])
+STL_HEADER: bytes = b'OpenCraftShop binary STL'.ljust(80, b' ')
+STL_RECORD: np.dtype = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+
+def box_triangles(boxes: Sequence[Box]) -> np.ndarray:
+    """(N * 12, 3, 3) triangle vertices of the boxes, wound outward"""
+    array: np.ndarray = np.array(boxes, dtype=np.float64).reshape(-1, 2, 3)
+    corners: np.ndarray = array[:, None, 0] + UNIT_CORNERS * array[:, None, 1]
+    return corners[:, CUBE_TRIANGLES].reshape(-1, 3, 3)
+
+
+def write_stl(path: Path, triangles: np.ndarray) -> None:
+    """Write triangles as binary STL with unit facet normals"""
+    records: np.ndarray = np.zeros(len(triangles), dtype=STL_RECORD)
+    normals: np.ndarray = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths: np.ndarray = np.linalg.norm(normals, axis=1, keepdims=True)
+    records['normal'] = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    records['vertices'] = triangles
+    with open(path, 'wb') as f:
+        f.write(STL_HEADER)
+        f.write(np.uint32(len(records)).tobytes())
+        records.tofile(f)
+
+
+def render_native(boxes: Sequence[Box], output: Path) -> int:
+    """Mesh a model's boxes straight to binary STL; returns the triangle count
+
+    Parts are written as separate closed boxes rather than one merged solid,
+    so touching boards keep their faces where OpenSCAD would union them.
+    """
+    triangles: np.ndarray = box_triangles(boxes)
+    write_stl(Path(output), triangles)
+    return len(triangles)
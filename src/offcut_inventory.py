@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Offcut Inventory
+Persistent store of the offcuts on the racks, for "I have this wood already" mode
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import json
+import sqlite3
+import click
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple, Iterable
+
+DEFAULT_PATH: str = 'offcuts.db'
+DESIGN_PARAMS_PATH: Path = Path(__file__).resolve().parent.parent / 'config' / 'design_params.json'
+
+
+@dataclass
+class Offcut:
+    id: int
+    lumber_type: str
+    length: float
+    source: str = ''  # where it came from, e.g. the job that left it over
+
+
+def load_min_waste_length(path: Path = DESIGN_PARAMS_PATH) -> float:
+    """Shortest leftover worth keeping, from the manufacturing parameters"""
+    with open(path, 'r') as f:
+        return float(json.load(f)['manufacturing']['min_waste_length'])
+
+
+class OffcutInventory:
+    """SQLite store of offcuts indexed on (lumber_type, length)
+
+    `find_fit` is a single index range scan, so nearest-fit queries stay
+    fast with thousands of offcuts. `take` and `add` run inside the open
+    transaction until `commit`, so a plan that is thrown away can be
+    rolled back without touching the racks.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self.path: str = path
+        self.connection: sqlite3.Connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS offcuts ("
+            " id INTEGER PRIMARY KEY,"
+            " lumber_type TEXT NOT NULL,"
+            " length REAL NOT NULL,"
+            " source TEXT NOT NULL DEFAULT '')"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS offcuts_by_fit ON offcuts (lumber_type, length)"
+        )
+        self.connection.commit()
+
+    def add(self, lumber_type: str, length: float, source: str = '') -> int:
+        """Put an offcut on the racks and return its id"""
+        cursor = self.connection.execute(
+            "INSERT INTO offcuts (lumber_type, length, source) VALUES (?, ?, ?)",
+            (lumber_type, length, source)
+        )
+        return int(cursor.lastrowid)
+
+    def add_many(self, offcuts: Iterable[Tuple[str, float, str]]) -> None:
+        """Add (lumber_type, length, source) rows in one statement"""
+        self.connection.executemany(
+            "INSERT INTO offcuts (lumber_type, length, source) VALUES (?, ?, ?)", offcuts
+        )
+
+    def find_fit(self, lumber_type: str, need: float) -> Optional[Offcut]:
+        """Shortest offcut of the type that is at least `need` long"""
+        row = self.connection.execute(
+            "SELECT id, lumber_type, length, source FROM offcuts"
+            " WHERE lumber_type = ? AND length >= ? ORDER BY length, id LIMIT 1",
+            (lumber_type, need)
+        ).fetchone()
+        return Offcut(*row) if row else None
+
+    def longest(self, lumber_type: str) -> float:
+        """Length of the longest offcut of the type, 0 when there is none"""
+        row = self.connection.execute(
+            "SELECT MAX(length) FROM offcuts WHERE lumber_type = ?", (lumber_type,)
+        ).fetchone()
+        return row[0] or 0.0
+
+    def take(self, offcut_id: int) -> None:
+        """Remove an offcut that is going to be cut"""
+        self.connection.execute("DELETE FROM offcuts WHERE id = ?", (offcut_id,))
+
+    def list(self, lumber_type: Optional[str] = None) -> List[Offcut]:
+        """Offcuts on the racks, by type and length"""
+        if lumber_type is None:
+            rows = self.connection.execute(
+                "SELECT id, lumber_type, length, source FROM offcuts ORDER BY lumber_type, length, id")
+        else:
+            rows = self.connection.execute(
+                "SELECT id, lumber_type, length, source FROM offcuts"
+                " WHERE lumber_type = ? ORDER BY length, id", (lumber_type,))
+        return [Offcut(*row) for row in rows]
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def rollback(self) -> None:
+        self.connection.rollback()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'OffcutInventory':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        self.close()
+
+
+@click.group()
+@click.option('--db', default=DEFAULT_PATH, help='Offcut inventory database')
+@click.pass_context
+def cli(ctx: click.Context, db: str) -> None:
+    """Manage the offcuts on the racks"""
+    ctx.obj = db
+
+
+@cli.command()
+@click.argument('lumber_type')
+@click.argument('lengths', nargs=-1, type=float, required=True)
+@click.option('--source', default='', help='Where the offcuts came from')
+@click.pass_obj
+def add(db: str, lumber_type: str, lengths: Tuple[float, ...], source: str) -> None:
+    """Add offcuts, e.g.: add 2x4 30.5 47 22.25"""
+    with OffcutInventory(db) as inventory:
+        inventory.add_many((lumber_type, length, source) for length in lengths)
+    click.echo(f"Added {len(lengths)} {lumber_type} offcut(s)")
+
+
+@cli.command(name='list')
+@click.argument('lumber_type', required=False)
+@click.pass_obj
+def list_offcuts(db: str, lumber_type: Optional[str]) -> None:
+    """List offcuts, optionally of one lumber type"""
+    with OffcutInventory(db) as inventory:
+        for offcut in inventory.list(lumber_type):
+            click.echo(f"#{offcut.id:<6} {offcut.lumber_type:<6} {offcut.length:8.3f}\"  {offcut.source}")
+
+
+if __name__ == '__main__':
+    cli()
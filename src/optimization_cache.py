@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Optimization Result Cache
+Two-tier (memory LRU + disk) memoization of cut plans
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Any
+from optimize_cuts import CutPiece, Stock, CutPattern
+
+
+def plan_to_payload(plan: Dict[str, List[Stock]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Convert a cut plan into JSON-ready data"""
+    payload: Dict[str, List[Dict[str, Any]]] = {}
+    for lumber_type, stocks in plan.items():
+        entries: List[Dict[str, Any]] = []
+        for stock in stocks:
+            entry: Dict[str, Any] = {'length': stock.length, 'cuts': [list(cut) for cut in stock.cuts]}
+            if isinstance(stock, CutPattern):
+                entry['count'] = stock.count
+            entries.append(entry)
+        payload[lumber_type] = entries
+    return payload
+
+
+def plan_from_payload(payload: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Stock]]:
+    """Rebuild a cut plan from plan_to_payload() data"""
+    plan: Dict[str, List[Stock]] = {}
+    for lumber_type, entries in payload.items():
+        stocks: List[Stock] = []
+        for entry in entries:
+            cuts: List[Tuple[float, str]] = [(cut[0], cut[1]) for cut in entry['cuts']]
+            if 'count' in entry:
+                stocks.append(CutPattern(entry['length'], lumber_type, cuts, entry['count']))
+            else:
+                stocks.append(Stock(entry['length'], lumber_type, cuts))
+        plan[lumber_type] = stocks
+    return plan
+
+
+class OptimizationCache:
+    """Memoizes CutOptimizer results by a canonical hash of the job
+
+    Entries live in an in-memory LRU and, when `cache_dir` is set, as JSON
+    files on disk that are evicted oldest-access-first once the directory
+    grows past `max_disk_bytes`.
+    """
+
+    def __init__(self, max_entries: int = 256, cache_dir: Optional[str] = None,
+                 max_disk_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries: int = max_entries
+        self.cache_dir: Optional[Path] = Path(cache_dir) if cache_dir else None
+        self.max_disk_bytes: int = max_disk_bytes
+        self._memory: 'OrderedDict[str, Dict[str, List[Dict[str, Any]]]]' = OrderedDict()
+        self.memory_hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(cut_list: List[CutPiece], signature: Dict[str, Any]) -> str:
+        """Hash the merged, sorted pieces together with the solver signature"""
+        merged: Dict[Tuple[str, float, str], int] = {}
+        for piece in cut_list:
+            key: Tuple[str, float, str] = (piece.lumber_type, piece.length, piece.label)
+            merged[key] = merged.get(key, 0) + piece.quantity
+        canonical: str = json.dumps({
+            'pieces': sorted([*key, quantity] for key, quantity in merged.items()),
+            'solver': signature
+        }, sort_keys=True)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, List[Stock]]]:
+        """Return a fresh copy of the cached plan, or None"""
+        payload = self._memory.get(key)
+        if payload is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return plan_from_payload(payload)
+
+        if self.cache_dir:
+            path: Path = self.cache_dir / f"{key}.json"
+            try:
+                with open(path, 'r') as f:
+                    payload = json.load(f)
+                os.utime(path)  # mark as recently used for eviction
+            except (OSError, ValueError):
+                payload = None
+            if payload is not None:
+                self._remember(key, payload)
+                self.disk_hits += 1
+                return plan_from_payload(payload)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, plan: Dict[str, List[Stock]]) -> None:
+        """Store a plan in both tiers"""
+        payload: Dict[str, List[Dict[str, Any]]] = plan_to_payload(plan)
+        self._remember(key, payload)
+        if self.cache_dir:
+            path: Path = self.cache_dir / f"{key}.json"
+            temp: Path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(temp, 'w') as f:
+                json.dump(payload, f)
+            os.replace(temp, path)
+            self._evict_disk()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for monitoring"""
+        return {
+            'hits': self.memory_hits + self.disk_hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory)
+        }
+
+    def _remember(self, key: str, payload: Dict[str, List[Dict[str, Any]]]) -> None:
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        assert self.cache_dir is not None
+        entries: List[Tuple[float, int, Path]] = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                info = path.stat()
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        total: int = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
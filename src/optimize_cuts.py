@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 """
 OpenCraftShop - Cut Optimization Engine
-Implements First-Fit Decreasing bin packing algorithm for lumber optimization
+Implements First-Fit and Best-Fit Decreasing bin packing for lumber optimization
 
 Copyright (c) 2024 OpenCraftShop Contributors
 Licensed under the MIT License
 """
 
 import json
-from typing import List, Dict, Tuple, Optional, Any
-from dataclasses import dataclass, field
+import math
+import time
+from typing import List, Dict, Tuple, Optional, Any, ClassVar, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field, replace
 import numpy as np
+from packing import BestFitIndex, OnlinePacker, pack_decreasing, pack_patterns, pack_subset_sum
+from bounds import LowerBound, lower_bound
+from price_catalog import get_catalog
+from units import Ticks, TICKS_PER_INCH, from_ticks, to_ticks
 
 @dataclass
 class CutPiece:
@@ -24,96 +30,577 @@ class Stock:
     length: float
     lumber_type: str
     cuts: List[Tuple[float, str]] = field(default_factory=list)
+    count: ClassVar[int] = 1  # a Stock is always a single board
+    from_inventory: ClassVar[bool] = False  # True for boards already on the racks
     
     @property
     def waste(self) -> float:
         used: float = sum(cut[0] for cut in self.cuts)
         return self.length - used
 
+@dataclass
+class CutPattern(Stock):
+    """A cutting pattern for one board, repeated `count` times"""
+    count: int = 1
+    
+    def describe(self) -> str:
+        """Format as e.g. '37 x 96" stock: [22.5, 22.5, 22.5, 22.5]'"""
+        lengths: str = ", ".join(f"{cut[0]:g}" for cut in self.cuts)
+        return f"{self.count} x {self.length:g}\" stock: [{lengths}]"
+    
+    def to_stocks(self) -> List[Stock]:
+        """Expand into individual boards"""
+        return [Stock(self.length, self.lumber_type, list(self.cuts)) for _ in range(self.count)]
+
+@dataclass
+class OffcutStock(Stock):
+    """A board taken from the offcut inventory instead of bought"""
+    offcut_id: int = 0
+    from_inventory: ClassVar[bool] = True
+
+@dataclass
+class StreamStats:
+    """Running counters for CutOptimizer.optimize_stream()"""
+    pieces: int = 0
+    stocks: int = 0
+    skipped: int = 0      # pieces longer than every standard length
+    started: float = 0.0  # time.monotonic() at the first piece
+    finished: Optional[float] = None
+    
+    @property
+    def elapsed(self) -> float:
+        return (self.finished if self.finished is not None else time.monotonic()) - self.started
+    
+    @property
+    def pieces_per_second(self) -> float:
+        return self.pieces / self.elapsed if self.pieces and self.elapsed > 0 else 0.0
+
+NEG_ROOM: float = float('-inf')  # room of a stock removed from a plan under repair
+
+STRATEGIES: Tuple[str, ...] = ('ffd', 'bfd', 'patterns', 'subset_sum', 'auto')
+
+# Portfolio limits: instances within them go to the exact column generation solver
+EXACT_MAX_PIECES: int = 5000
+EXACT_MAX_LENGTHS: int = 40
+EXACT_MAX_PER_BOARD: float = 16.0
+# Bitset subset-sum cost grows with the distinct lengths times the board length
+SUBSET_SUM_MAX_LENGTHS: int = 400
+# Subset-sum weights are 1/32", expressed per tick
+SUBSET_SUM_GRID: float = 32 / TICKS_PER_INCH
+
+@dataclass
+class InstanceFeatures:
+    """Size and shape of one lumber type's packing problem"""
+    pieces: int           # total pieces to cut
+    distinct_lengths: int
+    length_ratio: float   # mean piece length over the longest stock
+
+    @property
+    def pieces_per_board(self) -> float:
+        return 1 / self.length_ratio if self.length_ratio else float('inf')
+
 class CutOptimizer:
-    def __init__(self, kerf: float = 0.125) -> None:
+    def __init__(self, kerf: float = 0.125, strategy: str = 'ffd', workers: int = 1,
+                 cache: Optional[Any] = None, time_limit: float = 5.0,
+                 inventory: Optional[Any] = None, standard_lengths: Optional[Sequence[float]] = None) -> None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {', '.join(STRATEGIES)}")
         self.kerf: float = kerf
-        self.standard_lengths: List[int] = [96, 120, 144, 192]  # 8', 10', 12', 16'
+        self.strategy: str = strategy
+        self.workers: int = workers
+        self.cache: Optional[Any] = cache  # an optimization_cache.OptimizationCache
+        # Stock lengths in inches; 8', 10', 12', 16' unless a catalog (e.g. metric) is given
+        self.standard_lengths: List[float] = list(standard_lengths or [96, 120, 144, 192])
+        self.time_limit: float = time_limit  # total budget for the 'auto' portfolio
+        self.engine_log: Dict[str, str] = {}  # lumber type -> engine that packed it
+        self.stream_stats: StreamStats = StreamStats()
+        self.inventory: Optional[Any] = inventory  # an offcut_inventory.OffcutInventory; the caller commits
+        # Leftovers at least this long go back on the racks
+        self.min_offcut_length: float = 0.0
+        if inventory is not None:
+            from offcut_inventory import load_min_waste_length
+            self.min_offcut_length = load_min_waste_length()
         
     def optimize(self, cut_list: List[CutPiece]) -> Dict[str, List[Stock]]:
-        """Optimize cuts using first-fit decreasing bin packing algorithm"""
-        results: Dict[str, List[Stock]] = {}
+        """Optimize cuts per lumber type using the configured packing strategy"""
+        key: Optional[str] = None
+        # With an inventory the result depends on the racks, so it is never cached
+        if self.cache is not None and self.inventory is None:
+            key = self.cache.make_key(cut_list, self.cache_signature())
+            cached: Optional[Dict[str, List[Stock]]] = self.cache.get(key)
+            if cached is not None:
+                self.engine_log = {lumber_type: 'cache' for lumber_type in cached}
+                return cached
+        
+        by_type: Dict[str, List[CutPiece]] = self._group_by_type(cut_list)
+        order: List[str] = list(by_type)
+        offcuts: Dict[str, List[Stock]] = {}
+        if self.inventory is not None:
+            for lumber_type in order:
+                offcuts[lumber_type], remaining = self._fill_offcuts(lumber_type, by_type[lumber_type])
+                if remaining:
+                    by_type[lumber_type] = remaining
+                else:
+                    del by_type[lumber_type]
+        parallel: bool = self.workers > 1 and len(by_type) > 1
+        
+        # The portfolio shares one deadline; each type gets its share of the time left,
+        # so a type that finishes early hands its unused time to the ones after it
+        self._deadline = time.monotonic() + self.time_limit
+        after: List[int] = []
+        left: int = 0
+        for pieces in reversed(list(by_type.values())):
+            after.insert(0, left)
+            left += sum(piece.quantity for piece in pieces)
+        if parallel and self.workers >= len(by_type):
+            after = [0] * len(by_type)  # all types run at once
+        
+        # Lumber types share no state, so they can be packed in separate processes.
+        # map() yields in submission order, keeping the output identical to a serial run.
+        solved: List[Tuple[List[Stock], str]]
+        if parallel:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(by_type))) as pool:
+                solved = list(pool.map(self._solve_type, by_type.keys(), by_type.values(), after))
+        else:
+            solved = [self._solve_type(lumber_type, pieces, later)
+                      for (lumber_type, pieces), later in zip(by_type.items(), after)]
+        
+        packed: Dict[str, List[Stock]] = {t: stocks for t, (stocks, _) in zip(by_type.keys(), solved)}
+        self.engine_log = {t: engine for t, (_, engine) in zip(by_type.keys(), solved)}
+        results: Dict[str, List[Stock]] = {t: offcuts.get(t, []) + packed.get(t, []) for t in order}
+        if self.inventory is not None:
+            for lumber_type in order:
+                self.engine_log.setdefault(lumber_type, 'offcuts')
+        if key is not None:
+            self.cache.put(key, results)
+        return results
+    
+    def optimize_stream(self, pieces: Iterable[CutPiece], max_open: int = 4,
+                        policy: str = 'next_k_fit') -> Iterator[Stock]:
+        """Pack an unbounded stream of pieces, yielding each stock once it closes
+        
+        At most `max_open` stocks per lumber type are held at any time (see
+        packing.OnlinePacker for the policies), so memory does not grow with
+        the length of the stream. The remaining open stocks are yielded when
+        the stream ends. Progress is kept in `stream_stats`.
+        """
+        packers: Dict[str, OnlinePacker] = {}
+        lengths: Dict[Tuple[Ticks, str], float] = {}
+        stats: StreamStats = StreamStats(started=time.monotonic())
+        self.stream_stats = stats
+        for piece in pieces:
+            packer: Optional[OnlinePacker] = packers.get(piece.lumber_type)
+            if packer is None:
+                packer = packers[piece.lumber_type] = OnlinePacker(
+                    self.stock_ticks, self.kerf_ticks, max_open, policy)
+            ticks: Ticks = to_ticks(piece.length)
+            lengths[ticks, piece.label] = piece.length
+            if not packer.fits(ticks):
+                stats.skipped += piece.quantity
+                continue
+            for _ in range(piece.quantity):
+                stats.pieces += 1
+                for length, cuts in packer.add(ticks, piece.label):
+                    stats.stocks += 1
+                    yield self._stock_from_ticks(Stock(length, piece.lumber_type, cuts), lengths)
+        for lumber_type, packer in packers.items():
+            for length, cuts in packer.flush():
+                stats.stocks += 1
+                yield self._stock_from_ticks(Stock(length, lumber_type, cuts), lengths)
+        stats.finished = time.monotonic()
+    
+    def reoptimize(self, plan: Dict[str, List[Stock]], added: List[CutPiece],
+                   removed: List[CutPiece]) -> Dict[str, List[Stock]]:
+        """Repair an existing plan for added and removed pieces
+        
+        Removed pieces come off the emptiest stock holding them, which then
+        drops to the shortest standard length that still holds its cuts, or
+        out of the plan when empty. Added pieces go best-fit, longest first,
+        into the room left on existing stocks; the rest are packed onto new
+        stocks appended to the plan. Stocks that keep their cuts are returned
+        as the same objects, in the same order. A repeated CutPattern that
+        changes splits off the one changed board.
+        """
+        repaired: Dict[str, List[Optional[Stock]]] = {
+            lumber_type: list(stocks) for lumber_type, stocks in plan.items()
+        }
+        for lumber_type, pieces in self._group_by_type(removed).items():
+            self._remove_pieces(repaired.get(lumber_type, []), lumber_type, pieces)
+        for lumber_type, pieces in self._group_by_type(added).items():
+            self._add_pieces(repaired.setdefault(lumber_type, []), lumber_type, pieces)
+        
+        result: Dict[str, List[Stock]] = {}
+        for lumber_type, stocks in repaired.items():
+            kept: List[Stock] = [stock for stock in stocks if stock is not None]
+            if kept:
+                result[lumber_type] = kept
+        self.engine_log = {lumber_type: 'repair' for lumber_type in result}
+        return result
+    
+    def lower_bounds(self, optimized: Dict[str, List[Stock]]) -> Dict[str, LowerBound]:
+        """Lower bounds on boards and stock length for the cuts of each lumber type"""
+        bounds: Dict[str, LowerBound] = {}
+        for lumber_type, stocks in optimized.items():
+            demands: Dict[Ticks, int] = {}
+            for stock in stocks:
+                if stock.from_inventory:
+                    continue
+                for cut in stock.cuts:
+                    ticks: Ticks = to_ticks(cut[0])
+                    demands[ticks] = demands.get(ticks, 0) + stock.count
+            bound: LowerBound = lower_bound(demands.items(), self.stock_ticks, self.kerf_ticks)
+            bounds[lumber_type] = LowerBound(bound.boards, round(bound.material) / TICKS_PER_INCH)
+        return bounds
+    
+    def cache_signature(self) -> Dict[str, Any]:
+        """Everything besides the pieces that decides the packing result"""
+        signature: Dict[str, Any] = {
+            'solver': type(self).__name__,
+            'strategy': self.strategy,
+            'kerf': self.kerf,
+            'standard_lengths': list(self.standard_lengths)
+        }
+        if self.strategy == 'auto':
+            # the portfolio may hand types to column generation, which picks boards by price
+            signature['time_limit'] = self.time_limit
+            signature['prices'] = get_catalog().table.digest
+        return signature
+    
+    @property
+    def engine_name(self) -> str:
+        """Name recorded in engine_log for types packed by _optimize_type"""
+        return self.strategy
+    
+    def features(self, pieces: List[CutPiece]) -> InstanceFeatures:
+        """Measure one lumber type's instance for the portfolio"""
+        count: int = sum(piece.quantity for piece in pieces)
+        total: float = sum(piece.length * piece.quantity for piece in pieces)
+        return InstanceFeatures(
+            pieces=count,
+            distinct_lengths=len({piece.length for piece in pieces}),
+            length_ratio=total / count / max(self.standard_lengths) if count else 0.0
+        )
+    
+    def choose_engine(self, features: InstanceFeatures) -> str:
+        """Exact solver for small instances, heuristics as they grow"""
+        if (features.pieces <= EXACT_MAX_PIECES and features.distinct_lengths <= EXACT_MAX_LENGTHS
+                and features.pieces_per_board <= EXACT_MAX_PER_BOARD):
+            return 'column_generation'
+        if features.distinct_lengths <= SUBSET_SUM_MAX_LENGTHS:
+            return 'subset_sum'
+        return 'patterns'
+    
+    def stock_costs(self, lumber_type: str) -> Dict[float, float]:
+        """Price of each standard length, or its length when the type is unpriced"""
+        costs: np.ndarray = get_catalog().stock_costs(lumber_type, self.standard_lengths)
+        priced: Dict[float, float] = {length: float(cost) for length, cost in zip(self.standard_lengths, costs)
+                                      if not np.isnan(cost)}
+        return priced or {length: float(length) for length in self.standard_lengths}
+    
+    @property
+    def stock_ticks(self) -> List[Ticks]:
+        """Standard lengths in ticks, the unit the packing engines work in"""
+        return [to_ticks(length) for length in self.standard_lengths]
+    
+    @property
+    def kerf_ticks(self) -> Ticks:
+        return to_ticks(self.kerf)
+    
+    def _stock_costs_ticks(self, lumber_type: str) -> Dict[Ticks, float]:
+        return {to_ticks(length): cost for length, cost in self.stock_costs(lumber_type).items()}
+    
+    @staticmethod
+    def _stock_from_ticks(stock: Stock, lengths: Dict[Tuple[Ticks, str], float]) -> Stock:
+        """The same stock back in inches, each cut with the length its piece was given
+
+        `lengths` maps (ticks, label) to the piece's own length, so a cut of
+        12.1" stays 12.1 rather than the tick grid's 12.100000000000001.
+        """
+        return replace(stock, length=from_ticks(stock.length),
+                       cuts=[(lengths.get((length, label), from_ticks(length)), label)
+                             for length, label in stock.cuts])
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes only pack; don't ship the cache or inventory to them
+        state: Dict[str, Any] = self.__dict__.copy()
+        state['cache'] = None
+        state['inventory'] = None
+        return state
+    
+    def _fill_offcuts(self, lumber_type: str,
+                      pieces: List[CutPiece]) -> Tuple[List[Stock], List[CutPiece]]:
+        """Cut what the racks can hold first, longest piece into the nearest-fit offcut
         
-        # Group by lumber type
-        by_type: Dict[str, List[Tuple[float, str]]] = {}
+        Returns the offcut boards and the pieces still to be cut from new stock.
+        """
+        boards: List[Stock] = []
+        used: List[float] = []
+        room: BestFitIndex = BestFitIndex()
+        longest: float = self.inventory.longest(lumber_type)
+        exhausted: float = float('inf')  # no offcut left holds this much
+        left: Dict[int, int] = {}
+        
+        for position, piece in sorted(enumerate(pieces), key=lambda p: p[1].length, reverse=True):
+            need: float = piece.length + self.kerf
+            for _ in range(piece.quantity):
+                slot: int = room.find(need)
+                if slot < 0 and need <= min(longest, exhausted):
+                    offcut = self.inventory.find_fit(lumber_type, need)
+                    if offcut is None:
+                        exhausted = need - 1e-9
+                    else:
+                        self.inventory.take(offcut.id)
+                        boards.append(OffcutStock(offcut.length, lumber_type, [], offcut.id))
+                        used.append(0.0)
+                        slot = room.append(offcut.length)
+                if slot < 0:
+                    left[position] = left.get(position, 0) + 1
+                    continue
+                boards[slot].cuts.append((piece.length, piece.label))
+                used[slot] += piece.length
+                room.update(slot, boards[slot].length - used[slot])
+        
+        remaining: List[CutPiece] = [replace(piece, quantity=left[position])
+                                     for position, piece in enumerate(pieces) if position in left]
+        return boards, remaining
+    
+    def return_leftovers(self, plan: Dict[str, List[Stock]]) -> None:
+        """Put every leftover of the final plan long enough to reuse back on the racks
+
+        Called by the owner of the inventory once the plan will not change
+        again (after any local search), before it commits.
+        """
+        rows: List[Tuple[str, float, str]] = []
+        for lumber_type, stocks in plan.items():
+            for stock in stocks:
+                leftover: float = stock.waste - self.kerf  # the last cut frees it
+                if leftover >= self.min_offcut_length:
+                    rows.extend([(lumber_type, leftover, 'leftover')] * stock.count)
+        self.inventory.add_many(rows)
+    
+    def _group_by_type(self, cut_list: List[CutPiece]) -> Dict[str, List[CutPiece]]:
+        """Group pieces by lumber type, keeping first-seen order"""
+        by_type: Dict[str, List[CutPiece]] = {}
         for piece in cut_list:
-            if piece.lumber_type not in by_type:
-                by_type[piece.lumber_type] = []
+            by_type.setdefault(piece.lumber_type, []).append(piece)
+        return by_type
+    
+    def _shortest_stock(self, used: float) -> float:
+        """Shortest standard length holding `used` inches of cuts"""
+        return next((s for s in sorted(self.standard_lengths) if s >= used + self.kerf),
+                    max(self.standard_lengths))
+    
+    @staticmethod
+    def _split_copy(stocks: List[Optional[Stock]], position: int) -> None:
+        """Move one board of a repeated pattern into its own entry at the end"""
+        pattern: Stock = stocks[position]
+        rest: int = pattern.count - 1
+        stocks[position] = (CutPattern(pattern.length, pattern.lumber_type, pattern.cuts, rest) if rest > 1
+                            else Stock(pattern.length, pattern.lumber_type, pattern.cuts))
+        stocks.append(Stock(pattern.length, pattern.lumber_type, list(pattern.cuts)))
+    
+    def _remove_pieces(self, stocks: List[Optional[Stock]], lumber_type: str,
+                       pieces: List[CutPiece]) -> None:
+        holders: Dict[Tuple[float, str], List[int]] = {}
+        for position, stock in enumerate(stocks):
+            for cut in set(stock.cuts):
+                holders.setdefault(cut, []).append(position)
+        
+        for piece in pieces:
+            cut: Tuple[float, str] = (piece.length, piece.label)
             for _ in range(piece.quantity):
-                by_type[piece.lumber_type].append((piece.length, piece.label))
+                candidates: List[int] = [p for p in holders.get(cut, [])
+                                         if stocks[p] is not None and cut in stocks[p].cuts]
+                if not candidates:
+                    raise ValueError(f"Cannot remove {piece.length}\" {piece.label} ({lumber_type}): "
+                                     f"not in the plan")
+                position: int = min(candidates, key=lambda p: stocks[p].length - stocks[p].waste)
+                if stocks[position].count > 1:
+                    self._split_copy(stocks, position)
+                    position = len(stocks) - 1
+                    holders[cut].append(position)
+                stock: Stock = stocks[position]
+                cuts: List[Tuple[float, str]] = list(stock.cuts)
+                cuts.remove(cut)
+                if not cuts:
+                    stocks[position] = None
+                elif stock.from_inventory:
+                    stocks[position] = replace(stock, cuts=cuts)  # an offcut keeps its length
+                else:
+                    used: float = sum(c[0] for c in cuts)
+                    stocks[position] = Stock(min(stock.length, self._shortest_stock(used)), lumber_type, cuts)
+    
+    def _add_pieces(self, stocks: List[Optional[Stock]], lumber_type: str,
+                    pieces: List[CutPiece]) -> None:
+        items: List[Tuple[float, str]] = sorted(
+            ((piece.length, piece.label) for piece in pieces for _ in range(piece.quantity)),
+            key=lambda item: item[0], reverse=True
+        )
+        if not items:
+            return
+        min_need: float = items[-1][0] + self.kerf
+        index: BestFitIndex = BestFitIndex.from_capacities(
+            [stock.waste if stock is not None else NEG_ROOM for stock in stocks], min_need)
+        slots: List[int] = list(range(len(stocks)))  # index id -> position in stocks
         
-        # Optimize each lumber type
-        for lumber_type, pieces in by_type.items():
-            # Sort pieces by length (descending)
-            pieces.sort(key=lambda x: x[0], reverse=True)
-            
-            stocks: List[Stock] = []
-            for length, label in pieces:
-                placed: bool = False
-                
-                # Try to fit in existing stock
-                for stock in stocks:
-                    if stock.waste >= length + self.kerf:
-                        stock.cuts.append((length, label))
-                        placed = True
-                        break
-                
-                # If not placed, find optimal new stock
-                if not placed:
-                    for std_length in self.standard_lengths:
-                        if std_length >= length + self.kerf:
-                            new_stock: Stock = Stock(std_length, lumber_type)
-                            new_stock.cuts.append((length, label))
-                            stocks.append(new_stock)
-                            break
-            
-            results[lumber_type] = stocks
+        leftovers: List[Tuple[float, str]] = []
+        for length, label in items:
+            slot: int = index.find(length + self.kerf)
+            if slot < 0:
+                leftovers.append((length, label))
+                continue
+            position: int = slots[slot]
+            if stocks[position].count > 1:
+                # The other copies keep their room; the split-off board takes the piece
+                self._split_copy(stocks, position)
+                position = len(stocks) - 1
+                slot = index.append(stocks[position].waste)
+                slots.append(position)
+            stocks[position] = replace(stocks[position], cuts=stocks[position].cuts + [(length, label)])
+            remaining: float = stocks[position].waste
+            if remaining < min_need:
+                index.discard(slot)
+            else:
+                index.update(slot, remaining)
         
-        return results
+        for length, cuts in pack_decreasing(leftovers, self.standard_lengths, self.kerf):
+            stocks.append(Stock(length, lumber_type, cuts))
+    
+    def _solve_type(self, lumber_type: str, pieces: List[CutPiece],
+                    pieces_after: int) -> Tuple[List[Stock], str]:
+        """Pack one lumber type and name the engine that did it
+        
+        The engines work in integer ticks (see units), so fit checks and kerf
+        totals are exact and the plan is the same whatever unit the lengths
+        were entered in. Stocks come back in inches, cuts at their pieces' lengths.
+        """
+        ticks: List[CutPiece] = [replace(piece, length=to_ticks(piece.length)) for piece in pieces]
+        lengths: Dict[Tuple[Ticks, str], float] = {(tick.length, piece.label): piece.length
+                                                   for tick, piece in zip(ticks, pieces)}
+        stocks: List[Stock]
+        engine: str
+        if self.strategy != 'auto':
+            stocks, engine = self._optimize_type(lumber_type, ticks), self.engine_name
+        else:
+            stocks, engine = self._solve_auto(lumber_type, ticks, self.features(pieces), pieces_after)
+        return [self._stock_from_ticks(stock, lengths) for stock in stocks], engine
+    
+    def _solve_auto(self, lumber_type: str, pieces: List[CutPiece], features: InstanceFeatures,
+                    pieces_after: int) -> Tuple[List[Stock], str]:
+        """Portfolio run for one lumber type; pieces in ticks"""
+        demands: List[Tuple[Ticks, str, int]] = [
+            (piece.length, piece.label, piece.quantity) for piece in pieces
+        ]
+        # The fast pattern plan is the fallback, and is final when it meets the lower bound
+        plan: List[Tuple[Ticks, List[Tuple[Ticks, str]], int]] = pack_patterns(
+            demands, self.stock_ticks, self.kerf_ticks)
+        bound: float = lower_bound([(piece.length, piece.quantity) for piece in pieces],
+                                   self.stock_ticks, self.kerf_ticks).material
+        engine: str = 'patterns'
+        if sum(length * count for length, _, count in plan) > bound:
+            count: int = features.pieces
+            budget: float = max(0.0, self._deadline - time.monotonic()) * count / (count + pieces_after)
+            choice: str = self.choose_engine(features)
+            challenger: Optional[List[Tuple[Ticks, List[Tuple[Ticks, str]], int]]] = None
+            costs: Dict[Ticks, float] = self._stock_costs_ticks(lumber_type)
+            if choice == 'column_generation' and budget > 0:
+                # Imported here: column_generation builds on this module
+                from column_generation import solve_cutting_stock
+                challenger = solve_cutting_stock(demands, costs, self.kerf_ticks, time.monotonic() + budget)
+            elif choice == 'subset_sum':
+                challenger = pack_subset_sum(demands, self.stock_ticks, self.kerf_ticks, grid=SUBSET_SUM_GRID)
+            # Both plans are judged the same way; the chosen engine's plan stays unless it is worse
+            if challenger is not None and self._plan_score(challenger, costs) <= self._plan_score(plan, costs):
+                plan, engine = challenger, choice
+        return [CutPattern(length, lumber_type, cuts, count) for length, cuts, count in plan], engine
+    
+    @staticmethod
+    def _plan_score(plan: List[Tuple[Ticks, List[Tuple[Ticks, str]], int]],
+                    costs: Dict[Ticks, float]) -> Tuple[float, int, Ticks]:
+        """(cost, boards, material) of a plan in ticks; lower is better, unpriced boards cost infinity"""
+        return (sum(costs.get(length, math.inf) * count for length, _, count in plan),
+                sum(count for _, _, count in plan),
+                sum(length * count for length, _, count in plan))
+    
+    def _optimize_type(self, lumber_type: str, pieces: List[CutPiece]) -> List[Stock]:
+        """Pack the pieces of one lumber type into stock; lengths in ticks"""
+        if self.strategy in ('patterns', 'subset_sum'):
+            demands: List[Tuple[Ticks, str, int]] = [
+                (piece.length, piece.label, piece.quantity) for piece in pieces
+            ]
+            plan = (pack_patterns(demands, self.stock_ticks, self.kerf_ticks) if self.strategy == 'patterns'
+                    else pack_subset_sum(demands, self.stock_ticks, self.kerf_ticks, grid=SUBSET_SUM_GRID))
+            return [CutPattern(length, lumber_type, cuts, count) for length, cuts, count in plan]
+        
+        items: List[Tuple[Ticks, str]] = [
+            (piece.length, piece.label) for piece in pieces for _ in range(piece.quantity)
+        ]
+        bins = pack_decreasing(items, self.stock_ticks, self.kerf_ticks,
+                               best_fit=self.strategy == 'bfd')
+        return [Stock(length, lumber_type, cuts) for length, cuts in bins]
     
     def generate_cut_list(self, optimized: Dict[str, List[Stock]]) -> Dict[str, Any]:
         """Generate detailed cut list with statistics"""
         cut_list: Dict[str, Any] = {}
         total_waste: float = 0
         total_cost: float = 0
+        total_material: float = 0
+        total_length: float = 0
+        bound_material: float = 0
+        bound_boards: int = 0
+        
+        # Price every board of the plan in one gather; NaN marks unpriced stock
+        prices: np.ndarray = get_catalog().costs(
+            [lumber_type for lumber_type, stocks in optimized.items() for _ in stocks],
+            [stock.length for stocks in optimized.values() for stock in stocks]
+        )
+        board: int = 0
         
-        # Load prices
-        with open('config/lumber_prices.json', 'r') as f:
-            prices: Dict[str, Dict[str, float]] = json.load(f)['lumber_prices']
+        bounds: Dict[str, LowerBound] = self.lower_bounds(optimized)
         
         for lumber_type, stocks in optimized.items():
+            # Offcuts are already paid for; only bought stock counts against the bound
+            material: float = sum(stock.length * stock.count for stock in stocks if not stock.from_inventory)
+            bound: LowerBound = bounds[lumber_type]
             cut_list[lumber_type] = {
                 'stocks': [],
-                'total_stocks': len(stocks),
+                'total_stocks': sum(stock.count for stock in stocks),
                 'total_waste': 0,
-                'total_cost': 0
+                'total_cost': 0,
+                'lower_bound_boards': bound.boards,
+                'lower_bound_length': bound.material,
+                'optimality_gap': self._gap(material, bound.material),
+                'engine': self.engine_log.get(lumber_type, self.engine_name)
             }
+            total_material += material
+            total_length += sum(stock.length * stock.count for stock in stocks)
+            bound_material += bound.material
+            bound_boards += bound.boards
             
             for i, stock in enumerate(stocks):
                 stock_info: Dict[str, Any] = {
                     'stock_number': i + 1,
                     'length': stock.length,
                     'length_feet': stock.length / 12,
+                    'quantity': stock.count,
                     'cuts': stock.cuts,
                     'waste': stock.waste,
                     'efficiency': (1 - stock.waste / stock.length) * 100
                 }
                 
                 # Calculate cost
-                length_feet: int = int(stock.length / 12)
-                if lumber_type in prices and str(length_feet) in prices[lumber_type]:
-                    stock_cost: float = prices[lumber_type][str(length_feet)]
+                stock_cost: float = float(prices[board])
+                board += 1
+                if stock.from_inventory:
+                    stock_info['offcut_id'] = stock.offcut_id
+                elif not np.isnan(stock_cost):
                     stock_info['cost'] = stock_cost
-                    cut_list[lumber_type]['total_cost'] += stock_cost
+                    cut_list[lumber_type]['total_cost'] += stock_cost * stock.count
                 
                 cut_list[lumber_type]['stocks'].append(stock_info)
-                cut_list[lumber_type]['total_waste'] += stock.waste
-                total_waste += stock.waste
+                cut_list[lumber_type]['total_waste'] += stock.waste * stock.count
+                total_waste += stock.waste * stock.count
             
             total_cost += cut_list[lumber_type]['total_cost']
         
@@ -121,7 +608,72 @@ class CutOptimizer:
             'total_waste_inches': total_waste,
             'total_waste_feet': total_waste / 12,
             'total_cost': total_cost,
-            'efficiency': (1 - total_waste / sum(s.length for stocks in optimized.values() for s in stocks)) * 100
+            'efficiency': (1 - total_waste / total_length) * 100 if total_length else 100.0,
+            'lower_bound_boards': bound_boards,
+            'lower_bound_length': bound_material,
+            'optimality_gap': self._gap(total_material, bound_material),
+            'proven_optimal': total_material <= bound_material + 1e-6
         }
         
-        return cut_list
\ No newline at end of file
+        return cut_list
+    
+    @staticmethod
+    def _gap(material: float, bound: float) -> float:
+        """Percent of purchased stock length that a better plan might still save"""
+        return max(0.0, (material - bound) / material * 100) if material else 0.0
+
+
+def load_cut_list(path: str) -> Dict[str, List[Stock]]:
+    """Read a plan back from a cut_list.json written by generate_cut_list()"""
+    with open(path, 'r') as f:
+        data: Dict[str, Any] = json.load(f)
+    plan: Dict[str, List[Stock]] = {}
+    for lumber_type, entry in data.items():
+        if lumber_type == 'summary':
+            continue
+        stocks: List[Stock] = []
+        for stock in entry['stocks']:
+            cuts: List[Tuple[float, str]] = [(cut[0], cut[1]) for cut in stock['cuts']]
+            count: int = stock.get('quantity', 1)
+            if 'offcut_id' in stock:
+                stocks.append(OffcutStock(stock['length'], lumber_type, cuts, stock['offcut_id']))
+            elif count > 1:
+                stocks.append(CutPattern(stock['length'], lumber_type, cuts, count))
+            else:
+                stocks.append(Stock(stock['length'], lumber_type, cuts))
+        plan[lumber_type] = stocks
+    return plan
+
+
+def plan_delta(plan: Dict[str, List[Stock]],
+               cut_list: List[CutPiece]) -> Tuple[List[CutPiece], List[CutPiece]]:
+    """Pieces to add to and remove from `plan` so it cuts exactly `cut_list`
+
+    Lengths are matched in ticks, so a cut stored as 12.100000000000001 is
+    the same piece as 12.1. Added pieces keep the cut list's length and
+    removed ones the plan's, so reoptimize() finds them on the stocks.
+    """
+    have: Dict[Tuple[str, Ticks, str], int] = {}
+    have_lengths: Dict[Tuple[str, Ticks, str], float] = {}
+    for lumber_type, stocks in plan.items():
+        for stock in stocks:
+            for length, label in stock.cuts:
+                key: Tuple[str, Ticks, str] = (lumber_type, to_ticks(length), label)
+                have[key] = have.get(key, 0) + stock.count
+                have_lengths.setdefault(key, length)
+    want: Dict[Tuple[str, Ticks, str], int] = {}
+    want_lengths: Dict[Tuple[str, Ticks, str], float] = {}
+    for piece in cut_list:
+        key = (piece.lumber_type, to_ticks(piece.length), piece.label)
+        want[key] = want.get(key, 0) + piece.quantity
+        want_lengths.setdefault(key, piece.length)
+    added: List[CutPiece] = []
+    removed: List[CutPiece] = []
+    for key in list(want) + [key for key in have if key not in want]:
+        lumber_type, _, label = key
+        change: int = want.get(key, 0) - have.get(key, 0)
+        if change > 0:
+            added.append(CutPiece(want_lengths[key], lumber_type, change, label))
+        elif change < 0:
+            removed.append(CutPiece(have_lengths[key], lumber_type, -change, label))
+    return added, removed
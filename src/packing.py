@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Bin Packing Engines
+Indexed open-stock structures and online packers used by the cut optimizer
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Deque, Dict, List, Tuple, Sequence, Optional
+
+NEG_INF: float = float('-inf')
+
+
+class FirstFitIndex:
+    """Max segment tree over remaining stock capacity for leftmost-fit queries"""
+
+    def __init__(self, size_hint: int = 16) -> None:
+        self.size: int = 1
+        while self.size < size_hint:
+            self.size *= 2
+        self.tree: List[float] = [NEG_INF] * (2 * self.size)
+        self.count: int = 0
+
+    def append(self, capacity: float) -> int:
+        """Register a new stock and return its index"""
+        if self.count == self.size:
+            self._grow()
+        index: int = self.count
+        self.count += 1
+        self.update(index, capacity)
+        return index
+
+    def update(self, index: int, capacity: float) -> None:
+        """Set the remaining capacity of a stock"""
+        i: int = index + self.size
+        self.tree[i] = capacity
+        i //= 2
+        while i:
+            left: float = self.tree[2 * i]
+            right: float = self.tree[2 * i + 1]
+            self.tree[i] = left if left >= right else right
+            i //= 2
+
+    def find(self, need: float) -> int:
+        """Return the first stock with capacity >= need, or -1"""
+        if self.tree[1] < need:
+            return -1
+        i: int = 1
+        while i < self.size:
+            i *= 2
+            if self.tree[i] < need:
+                i += 1
+        return i - self.size
+
+    def _grow(self) -> None:
+        leaves: List[float] = self.tree[self.size:]
+        self.size *= 2
+        self.tree = [NEG_INF] * self.size + leaves + [NEG_INF] * (self.size - len(leaves))
+        for i in range(self.size - 1, 0, -1):
+            left: float = self.tree[2 * i]
+            right: float = self.tree[2 * i + 1]
+            self.tree[i] = left if left >= right else right
+
+
+class BestFitIndex:
+    """Sorted remaining capacities for tightest-fit queries"""
+
+    def __init__(self) -> None:
+        self.keys: List[Tuple[float, int]] = []
+        self.capacity: List[float] = []
+
+    @classmethod
+    def from_capacities(cls, capacities: Sequence[float], min_capacity: float = NEG_INF) -> 'BestFitIndex':
+        """Index existing stocks with one sort; stock i has capacities[i]
+
+        Stocks below `min_capacity` get an index but are never offered.
+        """
+        index: BestFitIndex = cls()
+        index.capacity = list(capacities)
+        index.keys = sorted((capacity, i) for i, capacity in enumerate(index.capacity)
+                            if capacity >= min_capacity)
+        return index
+
+    def append(self, capacity: float) -> int:
+        """Register a new stock and return its index"""
+        index: int = len(self.capacity)
+        self.capacity.append(capacity)
+        insort(self.keys, (capacity, index))
+        return index
+
+    def update(self, index: int, capacity: float) -> None:
+        """Set the remaining capacity of a stock"""
+        self.discard(index)
+        self.capacity[index] = capacity
+        insort(self.keys, (capacity, index))
+
+    def discard(self, index: int) -> None:
+        """Stop offering a stock to future queries"""
+        key: Tuple[float, int] = (self.capacity[index], index)
+        pos: int = bisect_left(self.keys, key)
+        if pos < len(self.keys) and self.keys[pos] == key:
+            del self.keys[pos]
+
+    def find(self, need: float) -> int:
+        """Return the stock with the smallest capacity >= need, or -1"""
+        pos: int = bisect_left(self.keys, (need, -1))
+        if pos == len(self.keys):
+            return -1
+        return self.keys[pos][1]
+
+
+ONLINE_POLICIES: Tuple[str, ...] = ('next_k_fit', 'harmonic')
+
+
+class OnlinePacker:
+    """Pack pieces as they arrive, keeping at most `max_open` stocks open
+
+    Open stocks are sized at the longest standard length and cut down to
+    the shortest length that holds their cuts when they close.
+
+    - next_k_fit: a piece goes into the first open stock it fits; when
+      none fits and all are open, the oldest one is closed.
+    - harmonic: pieces that fit j to a stock (j < max_open) share a stock
+      that closes once it holds j of them; smaller pieces go next-fit into
+      one shared stock.
+    """
+
+    def __init__(self, standard_lengths: Sequence[float], kerf: float, max_open: int = 4,
+                 policy: str = 'next_k_fit') -> None:
+        if policy not in ONLINE_POLICIES:
+            raise ValueError(f"Unknown policy '{policy}', expected one of {', '.join(ONLINE_POLICIES)}")
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self.standard_lengths: List[float] = sorted(standard_lengths)
+        self.kerf: float = kerf
+        self.max_open: int = max_open
+        self.policy: str = policy
+        self.capacity: float = self.standard_lengths[-1] - kerf
+        # Open stocks as [used, cuts]; keyed by size class under the harmonic policy
+        self._open: Deque[List] = deque()
+        self._classes: Dict[int, List] = {}
+
+    def add(self, length: float, label: str) -> List[Tuple[float, List[Tuple[float, str]]]]:
+        """Place one piece; returns the stocks this closed as (stock_length, cuts)
+
+        Pieces longer than every standard length are skipped, as in
+        pack_decreasing(); check `fits()` first to detect them.
+        """
+        if not self.fits(length):
+            return []
+        if self.policy == 'harmonic':
+            return self._add_harmonic(length, label)
+
+        closed: List[Tuple[float, List[Tuple[float, str]]]] = []
+        target: Optional[List] = next((b for b in self._open if b[0] + length <= self.capacity), None)
+        if target is None:
+            if len(self._open) == self.max_open:
+                closed.append(self._close(self._open.popleft()))
+            target = [0.0, []]
+            self._open.append(target)
+        target[0] += length
+        target[1].append((length, label))
+        return closed
+
+    def flush(self) -> List[Tuple[float, List[Tuple[float, str]]]]:
+        """Close every open stock, oldest first"""
+        stocks: List[List] = list(self._open) + list(self._classes.values())
+        self._open.clear()
+        self._classes.clear()
+        return [self._close(stock) for stock in stocks]
+
+    def fits(self, length: float) -> bool:
+        return length <= self.capacity
+
+    def _add_harmonic(self, length: float, label: str) -> List[Tuple[float, List[Tuple[float, str]]]]:
+        per_stock: int = min(self.max_open, int(self.capacity // length))
+        closed: List[Tuple[float, List[Tuple[float, str]]]] = []
+        stock: Optional[List] = self._classes.get(per_stock)
+        if stock is not None and stock[0] + length > self.capacity:
+            closed.append(self._close(self._classes.pop(per_stock)))
+            stock = None
+        if stock is None:
+            stock = self._classes[per_stock] = [0.0, []]
+        stock[0] += length
+        stock[1].append((length, label))
+        if per_stock < self.max_open and len(stock[1]) == per_stock:
+            closed.append(self._close(self._classes.pop(per_stock)))
+        return closed
+
+    def _close(self, stock: List) -> Tuple[float, List[Tuple[float, str]]]:
+        used, cuts = stock
+        i: int = bisect_left(self.standard_lengths, used + self.kerf)
+        return self.standard_lengths[min(i, len(self.standard_lengths) - 1)], cuts
+
+
+def pack_decreasing(items: Sequence[Tuple[float, str]], standard_lengths: Sequence[float],
+                    kerf: float, best_fit: bool = False) -> List[Tuple[float, List[Tuple[float, str]]]]:
+    """Pack (length, label) items into stock with first-fit or best-fit decreasing
+
+    A piece fits a stock when the uncut length left on it is at least the
+    piece length plus one kerf. New stock is the first standard length that
+    holds the piece; pieces longer than every standard length are skipped.
+    Returns a list of (stock_length, cuts) in the order stocks were opened.
+    """
+    ordered: List[Tuple[float, str]] = sorted(items, key=lambda x: x[0], reverse=True)
+    bins: List[Tuple[float, List[Tuple[float, str]]]] = []
+    used: List[float] = []
+    index = BestFitIndex() if best_fit else FirstFitIndex(len(ordered))
+    min_need: float = ordered[-1][0] + kerf if ordered else 0
+
+    for length, label in ordered:
+        need: float = length + kerf
+        slot: int = index.find(need)
+
+        if slot < 0:
+            stock_length = next((s for s in standard_lengths if s >= need), None)
+            if stock_length is None:
+                continue
+            bins.append((stock_length, []))
+            used.append(0)
+            slot = index.append(stock_length)
+
+        stock_length, cuts = bins[slot]
+        cuts.append((length, label))
+        used[slot] += length
+        remaining: float = stock_length - used[slot]
+        if best_fit and remaining < min_need:
+            index.discard(slot)
+        else:
+            index.update(slot, remaining)
+
+    return bins
+
+
+def pack_patterns(demands: Sequence[Tuple[float, str, int]], standard_lengths: Sequence[float],
+                  kerf: float) -> List[Tuple[float, List[Tuple[float, str]], int]]:
+    """Pack (length, label, quantity) demands into repeated cutting patterns
+
+    Produces the same boards as first-fit decreasing on the expanded piece
+    list, but fills one board at a time and repeats it while every length
+    it uses still has enough demand left. Work grows with the number of
+    distinct lengths rather than the total piece count.
+    Returns a list of (stock_length, cuts, count).
+    """
+    groups: List[Tuple[float, str]] = []
+    remaining: List[int] = []
+    slot_of: Dict[Tuple[float, str], int] = {}
+    for length, label, quantity in demands:
+        key: Tuple[float, str] = (length, label)
+        if key not in slot_of:
+            slot_of[key] = len(groups)
+            groups.append(key)
+            remaining.append(0)
+        remaining[slot_of[key]] += quantity
+
+    order: List[int] = sorted(range(len(groups)), key=lambda i: groups[i][0], reverse=True)
+    groups = [groups[i] for i in order]
+    remaining = [remaining[i] for i in order]
+
+    patterns: List[Tuple[float, List[Tuple[float, str]], int]] = []
+    first: int = 0
+    while True:
+        while first < len(groups) and remaining[first] <= 0:
+            first += 1
+        if first == len(groups):
+            break
+
+        need: float = groups[first][0] + kerf
+        stock_length = next((s for s in standard_lengths if s >= need), None)
+        if stock_length is None:
+            remaining[first] = 0
+            continue
+
+        used: float = 0
+        taken: List[Tuple[int, int]] = []
+        for i in range(first, len(groups)):
+            length: float = groups[i][0]
+            copies: int = 0
+            while copies < remaining[i] and stock_length - used >= length + kerf:
+                used += length
+                copies += 1
+            if copies:
+                taken.append((i, copies))
+
+        count: int = min(remaining[i] // copies for i, copies in taken)
+        cuts: List[Tuple[float, str]] = []
+        for i, copies in taken:
+            remaining[i] -= copies * count
+            cuts.extend([groups[i]] * copies)
+        patterns.append((stock_length, cuts, count))
+
+    return patterns
+
+
+def pack_subset_sum(demands: Sequence[Tuple[float, str, int]], standard_lengths: Sequence[float],
+                    kerf: float, grid: float = 32) -> List[Tuple[float, List[Tuple[float, str]], int]]:
+    """Minimum-slack packing with bitset subset-sum on an integer length grid
+
+    Lengths are rounded up and stock capacity down to 1/grid of the length
+    unit (1/32" by default), so every board stays feasible under the fit rule. Each new board takes
+    the longest remaining piece and the subset of the rest that leaves the
+    least leftover, over every standard length that holds that piece.
+    A board is repeated while the remaining demand would produce it again.
+    Returns a list of (stock_length, cuts, count).
+    """
+    pools: Dict[int, List[List]] = {}  # weight -> [[length, label, remaining], ...]
+    for length, label, quantity in sorted(demands, key=lambda d: d[0], reverse=True):
+        if quantity <= 0:
+            continue
+        weight: int = math.ceil(length * grid - 1e-9)
+        pool: List[List] = pools.setdefault(weight, [])
+        match = next((entry for entry in pool if entry[0] == length and entry[1] == label), None)
+        if match is not None:
+            match[2] += quantity
+        else:
+            pool.append([length, label, quantity])
+    weights: List[int] = sorted(pools, reverse=True)
+    remaining: Dict[int, int] = {w: sum(entry[2] for entry in pools[w]) for w in weights}
+    capacities: List[Tuple[float, int]] = [
+        (stock, math.floor((stock - kerf) * grid + 1e-9)) for stock in standard_lengths
+    ]
+
+    patterns: List[Tuple[float, List[Tuple[float, str]], int]] = []
+    while weights:
+        first: int = weights[0]
+        options: List[Tuple[float, int]] = [(s, c) for s, c in capacities if c >= first]
+        if not options:
+            # Longer than every stock: skipped, as in first-fit decreasing
+            remaining[first] = 0
+            pools[first].clear()
+            weights.pop(0)
+            continue
+
+        room: int = max(c for _, c in options) - first
+        # Binary-split the bounded counts into 0/1 items and keep every bitset for backtracking
+        items: List[Tuple[int, int]] = []  # (weight, copies)
+        caps: Dict[int, int] = {}
+        for w in weights:
+            available: int = remaining[w] - (1 if w == first else 0)
+            caps[w] = min(available, room // w)
+            chunk: int = 1
+            left: int = caps[w]
+            while left > 0:
+                take: int = min(chunk, left)
+                items.append((w, take))
+                left -= take
+                chunk *= 2
+        mask: int = (1 << (room + 1)) - 1
+        layers: List[int] = [1]
+        for w, copies in items:
+            layers.append((layers[-1] | (layers[-1] << (w * copies))) & mask)
+        reach: int = layers[-1]
+
+        best: Optional[Tuple[float, float, int]] = None  # (waste, stock, fill)
+        for stock, capacity in options:
+            fill: int = (reach & ((1 << (capacity - first + 1)) - 1)).bit_length() - 1
+            waste: float = stock - (first + fill) / grid
+            if best is None or (waste, stock) < best[:2]:
+                best = (waste, stock, fill)
+        assert best is not None
+        _, stock_length, fill = best
+
+        used: Dict[int, int] = {first: 1}
+        for k in range(len(items), 0, -1):
+            if not (layers[k - 1] >> fill) & 1:
+                w, copies = items[k - 1]
+                used[w] = used.get(w, 0) + copies
+                fill -= w * copies
+
+        # Repeat while the counts the bitsets saw (and each label pool) stay the same
+        count: int = min(remaining[w] // n for w, n in used.items())
+        for w, n in used.items():
+            spare: int = remaining[w] - (1 if w == first else 0) - caps[w]
+            extra: int = n - (1 if w == first else 0)
+            if extra:
+                count = min(count, 1 + spare // extra)
+            head: int = pools[w][0][2]
+            count = min(count, head // n) if head >= n else 1
+
+        cuts: List[Tuple[float, str]] = []
+        for w in weights:
+            n = used.get(w, 0)
+            if not n:
+                continue
+            remaining[w] -= n * count
+            pool = pools[w]
+            for _ in range(n):
+                cuts.append((pool[0][0], pool[0][1]))
+                pool[0][2] -= count
+                if pool[0][2] == 0:
+                    pool.pop(0)
+        weights = [w for w in weights if remaining[w] > 0]
+        patterns.append((stock_length, cuts, count))
+
+    return patterns
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Price Catalog
+Lumber and sheet prices from config/lumber_prices.json, loaded once and hot-reloaded
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Any, Sequence, Union
+import numpy as np
+from units import Ticks, TICKS_PER_INCH, stock_label, to_inches, to_ticks
+
+DEFAULT_PATH: Path = Path(__file__).resolve().parent.parent / 'config' / 'lumber_prices.json'
+
+
+def price_key_ticks(key: str) -> Ticks:
+    """Stock length of a price table key: '8' is feet, '2400mm' millimetres"""
+    if key.endswith('mm'):
+        return to_ticks(float(key[:-2]), 'mm')
+    return to_ticks(float(key), 'ft')
+
+
+@dataclass(frozen=True)
+class PriceTable:
+    """One parsed version of the price file
+
+    `prices[i, j]` is the price of lumber type `lumber_types[i]` at stock
+    length `lengths[j]` (ticks, ascending), NaN where it is not sold.
+    `digest` hashes the lumber prices, for cache keys of cost-driven plans.
+    """
+    lumber_types: Dict[str, int]
+    lengths: np.ndarray
+    prices: np.ndarray
+    sheets: Dict[str, Dict[str, float]]
+    stock_catalogs: Dict[str, Dict[str, Any]]
+    currency: str
+    digest: str
+
+
+def load_table(path: Union[str, Path]) -> PriceTable:
+    """Parse a price file into a dense (lumber type, stock length) table"""
+    with open(path, 'r') as f:
+        data: Dict[str, Any] = json.load(f)
+    lumber: Dict[str, Dict[str, float]] = data['lumber_prices']
+    lengths: List[Ticks] = sorted({price_key_ticks(key) for by_length in lumber.values() for key in by_length})
+    column: Dict[Ticks, int] = {ticks: j for j, ticks in enumerate(lengths)}
+    prices: np.ndarray = np.full((len(lumber), len(lengths)), np.nan)
+    for i, by_length in enumerate(lumber.values()):
+        for key, price in by_length.items():
+            prices[i, column[price_key_ticks(key)]] = price
+    return PriceTable(
+        lumber_types={lumber_type: i for i, lumber_type in enumerate(lumber)},
+        lengths=np.array(lengths, dtype=np.int64),
+        prices=prices,
+        sheets=data.get('sheet_prices', {}),
+        stock_catalogs=data.get('stock_catalogs', {}),
+        currency=data.get('currency', 'USD'),
+        digest=hashlib.sha256(json.dumps(lumber, sort_keys=True).encode('utf-8')).hexdigest()
+    )
+
+
+class PriceCatalog:
+    """Shared, read-mostly view of the price file
+
+    The file is parsed once into a `PriceTable`; every lookup first checks
+    the file's mtime and size and re-parses only when they changed, so price
+    edits show up in a long-running server without a restart. Costing many
+    boards is one NumPy gather (`costs`) rather than nested dict lookups.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_PATH) -> None:
+        self.path: Path = Path(path)
+        self.loads: int = 0  # times the file was parsed
+        self._lock: threading.Lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._table: Optional[PriceTable] = None
+
+    @property
+    def table(self) -> PriceTable:
+        """The current prices, re-read if the file changed since the last look"""
+        stat: os.stat_result = os.stat(self.path)
+        stamp: Tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._table = load_table(self.path)
+                    self._stamp = stamp
+                    self.loads += 1
+        return self._table
+
+    def costs(self, lumber_types: Sequence[str], lengths: Sequence[float]) -> np.ndarray:
+        """Price of each (lumber type, length in inches) board; NaN where unpriced"""
+        table: PriceTable = self.table
+        out: np.ndarray = np.full(len(lumber_types), np.nan)
+        if not len(table.lengths):
+            return out
+        rows: np.ndarray = np.array([table.lumber_types.get(lumber_type, -1) for lumber_type in lumber_types],
+                                    dtype=np.int64)
+        ticks: np.ndarray = np.rint(np.asarray(lengths, dtype=np.float64) * TICKS_PER_INCH).astype(np.int64)
+        columns: np.ndarray = np.minimum(np.searchsorted(table.lengths, ticks), len(table.lengths) - 1)
+        found: np.ndarray = (rows >= 0) & (table.lengths[columns] == ticks)
+        out[found] = table.prices[rows[found], columns[found]]
+        return out
+
+    def stock_costs(self, lumber_type: str, lengths: Sequence[float]) -> np.ndarray:
+        """Price of each stock length of one lumber type; NaN where unpriced"""
+        return self.costs([lumber_type] * len(lengths), lengths)
+
+    def price(self, lumber_type: str, length: float) -> float:
+        """Price of one board; KeyError if the type is not sold at that length"""
+        price: float = float(self.stock_costs(lumber_type, [length])[0])
+        if np.isnan(price):
+            raise KeyError(f"No price for {lumber_type} x {stock_label(length)} in {self.path}")
+        return price
+
+    def sheet_price(self, material: str, size: str) -> Optional[float]:
+        """Price of one sheet of a material at a size such as '4x8', or None"""
+        return self.table.sheets.get(material, {}).get(size)
+
+    def stock_lengths(self, catalog: str = 'imperial') -> List[Union[int, float]]:
+        """Standard stock lengths of a stock catalog, in inches"""
+        catalogs: Dict[str, Dict[str, Any]] = self.table.stock_catalogs
+        if catalog not in catalogs:
+            raise ValueError(f"Unknown stock catalog '{catalog}', expected one of {', '.join(catalogs)}")
+        spec: Dict[str, Any] = catalogs[catalog]
+        return sorted(to_inches(length, spec['unit']) for length in spec['lengths'])
+
+
+_catalogs: Dict[Path, PriceCatalog] = {}
+
+
+def get_catalog(path: Union[str, Path] = DEFAULT_PATH) -> PriceCatalog:
+    """The process-wide catalog for a price file"""
+    key: Path = Path(path).resolve()
+    if key not in _catalogs:
+        _catalogs[key] = PriceCatalog(key)
+    return _catalogs[key]
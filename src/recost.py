@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Re-costing
+Applies a new price file to stored cut plans without packing them again
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Any, Iterable
+import click
+import numpy as np
+from price_catalog import DEFAULT_PATH, PriceCatalog
+from units import stock_label, to_ticks
+
+
+@dataclass
+class StoredPlan:
+    """The files main.py wrote for one project
+
+    The stocks and cuts in cut_list.json and the sheets in sheet_layout.json
+    are the packing; every price and total in them is derived and can be
+    recomputed from a price file alone.
+    """
+    directory: Path
+    cut_list: Dict[str, Any]
+    sheet_layout: Optional[Dict[str, Any]] = None
+    shopping_list: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class RecostResult:
+    plan: StoredPlan
+    old_total: Optional[float]                             # shopping list estimated total before
+    new_total: Optional[float]                             # and after; None if the plan could not be priced
+    missing: List[str] = field(default_factory=list)       # boards or sheets the price file does not sell
+
+
+def load_plan(directory: Path) -> StoredPlan:
+    """Read a project's cut list and, when present, its sheet layout and shopping list"""
+    def read(name: str) -> Optional[Dict[str, Any]]:
+        path: Path = directory / name
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+    return StoredPlan(directory, read('cut_list.json'), read('sheet_layout.json'), read('shopping_list.json'))
+
+
+def find_plans(paths: Iterable[str]) -> List[Path]:
+    """Project directories under `paths` (a cut_list.json or a directory searched recursively)"""
+    found: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            found += sorted(cut_list.parent for cut_list in path.rglob('cut_list.json'))
+        elif path.name == 'cut_list.json':
+            found.append(path.parent)
+    return found
+
+
+class Recoster:
+    """Re-prices many stored plans in one pass
+
+    Every bought board of every plan is flattened into arrays and priced
+    with a single `PriceCatalog.costs` gather; per-type, per-plan and
+    shopping-list totals are then `np.bincount` sums. bincount adds in input
+    order, so with unchanged prices the files come out exactly as
+    `generate_cut_list` and `generate_shopping_list` wrote them.
+    """
+
+    def __init__(self, catalog: PriceCatalog) -> None:
+        self.catalog: PriceCatalog = catalog
+
+    def recost(self, plans: List[StoredPlan]) -> List[RecostResult]:
+        """Update the plans' costs in place and report old and new totals"""
+        # One row per stock entry: its plan, its (plan, lumber type) slot and what was bought
+        slot_plan: List[int] = []
+        slot_type: List[str] = []
+        board_slot: List[int] = []
+        lengths: List[float] = []
+        quantities: List[int] = []
+        offcut: List[bool] = []
+        entries: List[Dict[str, Any]] = []
+        for p, plan in enumerate(plans):
+            for lumber_type, data in plan.cut_list.items():
+                if lumber_type == 'summary':
+                    continue
+                for stock in data['stocks']:
+                    board_slot.append(len(slot_plan))
+                    lengths.append(stock['length'])
+                    quantities.append(stock.get('quantity', 1))
+                    offcut.append('offcut_id' in stock)
+                    entries.append(stock)
+                slot_plan.append(p)
+                slot_type.append(lumber_type)
+
+        slots: np.ndarray = np.array(board_slot, dtype=np.int64)
+        counts: np.ndarray = np.array(quantities, dtype=np.int64)
+        bought: np.ndarray = ~np.array(offcut, dtype=bool)
+        prices: np.ndarray = self.catalog.costs([slot_type[s] for s in board_slot], lengths)
+        priced: np.ndarray = bought & ~np.isnan(prices)
+        cost: np.ndarray = np.where(priced, prices * counts, 0.0)
+        type_cost: np.ndarray = np.bincount(slots, weights=cost, minlength=len(slot_plan))
+        type_priced: np.ndarray = np.bincount(slots, weights=priced, minlength=len(slot_plan)) > 0
+        plans_of_slots: np.ndarray = np.array(slot_plan, dtype=np.int64)
+        plan_cost: np.ndarray = np.bincount(plans_of_slots, weights=type_cost, minlength=len(plans))
+        plan_priced: np.ndarray = np.bincount(plans_of_slots, weights=type_priced, minlength=len(plans)) > 0
+
+        for stock, price, is_priced in zip(entries, prices.tolist(), priced.tolist()):
+            stock.pop('cost', None)
+            if is_priced:
+                stock['cost'] = price
+        for s, (p, lumber_type) in enumerate(zip(slot_plan, slot_type)):
+            plans[p].cut_list[lumber_type]['total_cost'] = float(type_cost[s]) if type_priced[s] else 0
+        for p, plan in enumerate(plans):
+            plan.cut_list['summary']['total_cost'] = float(plan_cost[p]) if plan_priced[p] else 0
+
+        # Shopping list lines: bought boards grouped by (plan, type, length) in first-seen order
+        keys: np.ndarray = np.stack([slots, np.array([to_ticks(length) for length in lengths], dtype=np.int64)],
+                                    axis=1)[bought] if len(slots) else np.zeros((0, 2), dtype=np.int64)
+        _, first, group = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        order: np.ndarray = np.argsort(first)
+        rank: np.ndarray = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        group = rank[group.reshape(-1)]
+        line_count: np.ndarray = np.bincount(group, weights=counts[bought], minlength=len(order)).astype(np.int64)
+        line_board: np.ndarray = np.flatnonzero(bought)[first[order]]
+        return self._shopping_lists(plans, slot_plan, slot_type, slots, line_board, line_count, lengths, prices)
+
+    def _shopping_lists(self, plans: List[StoredPlan], slot_plan: List[int], slot_type: List[str],
+                        slots: np.ndarray, line_board: np.ndarray, line_count: np.ndarray,
+                        lengths: List[float], prices: np.ndarray) -> List[RecostResult]:
+        """Rebuild each plan's shopping list from its grouped board lines and its sheets"""
+        lines: List[List[Tuple[str, str, int, float]]] = [[] for _ in plans]
+        missing: List[List[str]] = [[] for _ in plans]
+        for board, count in zip(line_board.tolist(), line_count.tolist()):
+            slot: int = int(slots[board])
+            label: str = stock_label(lengths[board])
+            lumber_type: str = slot_type[slot]
+            if np.isnan(prices[board]):
+                missing[slot_plan[slot]].append(f"{lumber_type} x {label}")
+            lines[slot_plan[slot]].append((lumber_type, label, count, float(prices[board])))
+
+        results: List[RecostResult] = []
+        for p, plan in enumerate(plans):
+            old_total: Optional[float] = plan.shopping_list.get('estimated_total') if plan.shopping_list else None
+            sheet_lines: List[Tuple[str, str, int, Optional[float]]] = self._sheet_lines(plan)
+            missing[p] += [f"{material} sheet {size}'" for material, size, _, price in sheet_lines if price is None]
+            if missing[p]:
+                results.append(RecostResult(plan, old_total, None, missing[p]))
+                continue
+            types: List[str] = [lumber_type for lumber_type in plan.cut_list if lumber_type != 'summary']
+            supplies: List[Dict[str, Any]] = plan.shopping_list['other_supplies'] if plan.shopping_list else []
+            plan.shopping_list = build_shopping_list(types, lines[p], sheet_lines, supplies)
+            results.append(RecostResult(plan, old_total, plan.shopping_list['estimated_total']))
+        return results
+
+    def _sheet_lines(self, plan: StoredPlan) -> List[Tuple[str, str, int, Optional[float]]]:
+        """(material, size, sheets, unit price) per material and sheet size; updates the layout's costs"""
+        if not plan.sheet_layout:
+            return []
+        lines: List[Tuple[str, str, int, Optional[float]]] = []
+        total_cost: float = 0
+        for material, data in plan.sheet_layout.items():
+            if material == 'summary':
+                continue
+            by_size: Dict[str, int] = {}
+            for sheet in data['sheets']:
+                size_key: str = f"{sheet['height'] / 12:g}x{sheet['width'] / 12:g}"
+                by_size[size_key] = by_size.get(size_key, 0) + 1
+            lines += [(material, size, quantity, self.catalog.sheet_price(material, size))
+                      for size, quantity in by_size.items()]
+            price: Optional[float] = self.catalog.sheet_price(material, data['sheet_size'])
+            data.pop('unit_price', None)
+            data['total_cost'] = price * data['total_sheets'] if price is not None else 0
+            if price is not None:
+                data['unit_price'] = price
+            total_cost += data['total_cost']
+        plan.sheet_layout['summary']['total_cost'] = total_cost
+        return lines
+
+
+def build_shopping_list(lumber_types: List[str], lumber: List[Tuple[str, str, int, float]],
+                        sheets: List[Tuple[str, str, int, float]],
+                        supplies: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """A shopping list in generate_shopping_list()'s layout from priced lines"""
+    shopping_list: Dict[str, Any] = {'lumber': {lumber_type: {} for lumber_type in lumber_types},
+                                     'total_cost': 0, 'items': []}
+    for lumber_type, label, quantity, unit_price in lumber:
+        subtotal: float = quantity * unit_price
+        shopping_list['lumber'][lumber_type][label] = {
+            'quantity': quantity, 'unit_price': unit_price, 'subtotal': subtotal
+        }
+    for lumber_type, lengths in shopping_list['lumber'].items():
+        for label, info in lengths.items():
+            shopping_list['total_cost'] += info['subtotal']
+            shopping_list['items'].append({
+                'description': f"{lumber_type} x {label}",
+                'quantity': info['quantity'],
+                'unit_price': info['unit_price'],
+                'subtotal': info['subtotal']
+            })
+    for material, size_key, quantity, unit_price in sheets:
+        subtotal = quantity * unit_price
+        shopping_list.setdefault('sheets', {}).setdefault(material, {})[size_key] = {
+            'quantity': quantity, 'unit_price': unit_price, 'subtotal': subtotal
+        }
+        shopping_list['total_cost'] += subtotal
+        shopping_list['items'].append({
+            'description': f"{material} sheet {size_key}'",
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'subtotal': subtotal
+        })
+    shopping_list['other_supplies'] = supplies
+    shopping_list['estimated_total'] = shopping_list['total_cost'] + sum(item['est_cost'] for item in supplies)
+    return shopping_list
+
+
+def write_plan(plan: StoredPlan) -> None:
+    """Write a re-costed plan's JSON files back"""
+    files: Dict[str, Optional[Dict[str, Any]]] = {
+        'cut_list.json': plan.cut_list, 'sheet_layout.json': plan.sheet_layout,
+        'shopping_list.json': plan.shopping_list
+    }
+    for name, data in files.items():
+        if data is not None:
+            with open(plan.directory / name, 'w') as f:
+                json.dump(data, f, indent=2)
+
+
+@click.command()
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--prices', default=str(DEFAULT_PATH), type=click.Path(exists=True, dir_okay=False),
+              help='Price file to apply (default: config/lumber_prices.json)')
+@click.option('--write/--dry-run', default=True, help='Update the stored JSON files, or only report')
+@click.option('--report', default=None, help='Write old and new totals per project to this JSON file')
+def run_recost(paths: Tuple[str, ...], prices: str, write: bool, report: Optional[str]) -> None:
+    """Re-price stored plans (output directories holding a cut_list.json)"""
+    plans: List[StoredPlan] = [load_plan(directory) for directory in find_plans(paths)]
+    results: List[RecostResult] = Recoster(PriceCatalog(prices)).recost(plans)
+    rows: List[Dict[str, Any]] = []
+    for result in results:
+        name: str = str(result.plan.directory)
+        if result.new_total is None:
+            click.echo(f"  {name}: not priced ({', '.join(result.missing)})")
+        else:
+            before: str = f"${result.old_total:.2f}" if result.old_total is not None else "-"
+            click.echo(f"  {name}: {before} -> ${result.new_total:.2f}")
+            if write:
+                write_plan(result.plan)
+        rows.append({'project': name, 'old_total': result.old_total, 'new_total': result.new_total,
+                     'lumber_cost': result.plan.cut_list['summary']['total_cost'], 'missing': result.missing})
+    priced: int = sum(1 for result in results if result.new_total is not None)
+    click.echo(f"Re-costed {priced} of {len(results)} plans{'' if write else ' (dry run)'}")
+    if report:
+        with open(report, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    run_recost()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - OpenSCAD Rendering
+Renders STL views through a bounded pool of openscad processes
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Any, Sequence
+import click
+from furniture_templates import FURNITURE_TYPES, Box, get_template, scad_literal
+from model_mesh import render_native
+
+SRC_DIR: Path = Path(__file__).resolve().parent
+TEMPLATE_DIR: Path = SRC_DIR / 'templates'
+DEFAULT_TIMEOUT: float = 300.0  # seconds per render
+# (view_mode, STL file suffix)
+VIEWS: Tuple[Tuple[str, str], ...] = (('assembled', ''), ('exploded', '_exploded'))
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    source: Path                           # .scad file to render
+    output: Path                           # .stl to write
+    defines: Tuple[Tuple[str, Any], ...]   # -D overrides, applied after the file's own assignments
+    view: str = ''                         # view_mode, for messages
+    model: Tuple[Box, ...] = ()            # the view's boxes from the template registry, if it has a model
+
+
+@dataclass
+class RenderResult:
+    job: RenderJob
+    status: str        # 'ok', 'failed', 'timeout' or 'missing' (no openscad on PATH)
+    seconds: float
+    error: str = ''
+    backend: str = 'openscad'  # or 'native' for templates meshed in Python from their registry model
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'ok'
+
+
+def render_command(job: RenderJob, openscad: str = 'openscad') -> List[str]:
+    """The openscad command line of a job"""
+    command: List[str] = [openscad, '-o', str(job.output)]
+    for name, value in job.defines:
+        command += ['-D', f"{name}={scad_literal(value)}"]
+    return command + [str(job.source)]
+
+
+def view_jobs(furniture_type: str, parameters: Dict[str, Any], output_dir: str,
+              dimensions: Optional[Tuple[float, float, float]] = None) -> List[RenderJob]:
+    """Both views of a design, rendered straight from its template with the parameters as -D
+
+    Given the design's (length, width, height), jobs also carry the boxes of
+    the template's registry model, when it has one, for native meshing.
+    """
+    source: Path = TEMPLATE_DIR / f"{furniture_type}.scad"
+    evaluate_model = get_template(furniture_type).evaluate_model if dimensions else None
+    return [
+        RenderJob(source, Path(output_dir) / f"{furniture_type}{suffix}.stl",
+                  tuple(parameters.items()) + (('view_mode', view_mode),), view_mode,
+                  tuple(evaluate_model(*dimensions, view_mode == 'exploded')) if evaluate_model else ())
+        for view_mode, suffix in VIEWS
+    ]
+
+
+def _render(job: RenderJob, timeout: float, openscad: str, native: bool) -> RenderResult:
+    started: float = time.perf_counter()
+    if native and job.model:
+        try:
+            render_native(job.model, job.output)
+            status, error = 'ok', ''
+        except OSError as e:
+            status, error = 'failed', str(e)
+        return RenderResult(job, status, time.perf_counter() - started, error, backend='native')
+    # Templates `include <lumber_lib.scad>`, which lives next to this module
+    env: Dict[str, str] = dict(os.environ)
+    env['OPENSCADPATH'] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get('OPENSCADPATH')]))
+    try:
+        subprocess.run(render_command(job, openscad), check=True, capture_output=True, timeout=timeout, env=env)
+        status, error = 'ok', ''
+    except subprocess.CalledProcessError as e:
+        status, error = 'failed', e.stderr.decode(errors='replace').strip()
+    except subprocess.TimeoutExpired:
+        status, error = 'timeout', f"gave up after {timeout:g}s"
+    except FileNotFoundError:
+        status, error = 'missing', f"{openscad} not found"
+    return RenderResult(job, status, time.perf_counter() - started, error)
+
+
+def render_all(jobs: Sequence[RenderJob], workers: Optional[int] = None, timeout: float = DEFAULT_TIMEOUT,
+               openscad: str = 'openscad', native: bool = True) -> List[RenderResult]:
+    """Render every job, at most `workers` openscad processes at a time; results in job order
+
+    Jobs carrying a registry model are meshed natively in milliseconds unless
+    `native` is False; the rest go to openscad. openscad is single-threaded, so by
+    default one process runs per CPU. Threads only wait on the child processes.
+    """
+    if not jobs:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda job: _render(job, timeout, openscad, native), jobs))
+
+
+@click.command()
+@click.option('--type', 'furniture_types', multiple=True, type=click.Choice(list(FURNITURE_TYPES)),
+              help='Furniture type to render (repeatable; default: all)')
+@click.option('--output-dir', default='./output/renders', help='Output directory')
+@click.option('--jobs', default=None, type=int, help='openscad processes at once (default: one per CPU)')
+@click.option('--timeout', default=DEFAULT_TIMEOUT, help='Seconds before a render is abandoned')
+@click.option('--native/--openscad-only', default=True,
+              help='Mesh templates with a registry model in Python (default) or render everything with openscad')
+def run_render(furniture_types: Tuple[str, ...], output_dir: str, jobs: Optional[int], timeout: float,
+               native: bool) -> None:
+    """Render both views of furniture templates at their default sizes"""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    render_jobs: List[RenderJob] = []
+    for furniture_type in furniture_types or FURNITURE_TYPES:
+        template = get_template(furniture_type)
+        dimensions: Tuple[float, float, float] = tuple(template.defaults.values())
+        parameters: Dict[str, Any] = template.evaluate(*dimensions)[2]
+        render_jobs += view_jobs(furniture_type, parameters, output_dir, dimensions)
+    started: float = time.perf_counter()
+    results: List[RenderResult] = render_all(render_jobs, jobs, timeout, native=native)
+    for result in results:
+        mark: str = '✓' if result.ok else '✗'
+        detail: str = f" - {result.status}: {result.error}" if not result.ok else ''
+        click.echo(f"  {mark} {result.job.output.name} ({result.backend}, {result.seconds:.3f}s){detail}")
+    failed: int = sum(1 for result in results if not result.ok)
+    click.echo(f"{len(results) - failed} of {len(results)} rendered in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    run_render()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Sheet Goods Nesting
+Packs rectangular plywood and MDF parts onto sheets with guillotine cuts
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple, Optional, Any
+from price_catalog import PriceCatalog, get_catalog
+
+
+@dataclass
+class PanelPiece:
+    width: float
+    height: float
+    material: str     # e.g. '3/4 plywood'
+    quantity: int
+    label: str
+    rotatable: bool = True  # False when the grain direction matters
+
+
+@dataclass
+class Placement:
+    x: float
+    y: float
+    width: float      # as placed, after any rotation
+    height: float
+    label: str
+    rotated: bool = False
+
+
+@dataclass
+class Sheet:
+    width: float
+    height: float
+    material: str
+    placements: List[Placement] = field(default_factory=list)
+
+    @property
+    def waste(self) -> float:
+        """Unused area in square inches"""
+        return self.width * self.height - sum(p.width * p.height for p in self.placements)
+
+
+class FreeRectIndex:
+    """Free rectangles of all open sheets, bucketed by quantized (width, height)
+
+    A query only inspects buckets that can hold the part and stops early
+    on buckets whose smallest possible rectangle is already no better than
+    the best fit found, so the cost does not grow with the number of parts.
+    """
+
+    def __init__(self, quantum: float = 4.0) -> None:
+        self.quantum: float = quantum
+        self.rects: Dict[int, Tuple[int, float, float, float, float]] = {}  # id -> (sheet, x, y, w, h)
+        self.buckets: Dict[Tuple[int, int], Dict[int, None]] = {}
+        self._next_id: int = 0
+
+    def add(self, sheet: int, x: float, y: float, width: float, height: float) -> None:
+        rect_id: int = self._next_id
+        self._next_id += 1
+        self.rects[rect_id] = (sheet, x, y, width, height)
+        self.buckets.setdefault(self._bucket(width, height), {})[rect_id] = None
+
+    def remove(self, rect_id: int) -> Tuple[int, float, float, float, float]:
+        rect = self.rects.pop(rect_id)
+        key: Tuple[int, int] = self._bucket(rect[3], rect[4])
+        bucket: Dict[int, None] = self.buckets[key]
+        del bucket[rect_id]
+        if not bucket:
+            del self.buckets[key]
+        return rect
+
+    def best_fit(self, width: float, height: float) -> Optional[Tuple[Tuple[float, ...], int]]:
+        """Smallest free rectangle holding width x height: (score, rect id), or None"""
+        min_i, min_j = self._bucket(width, height)
+        best: Optional[Tuple[Tuple[float, ...], int]] = None
+        for (i, j), bucket in self.buckets.items():
+            if i < min_i or j < min_j:
+                continue
+            if best is not None and i * j * self.quantum ** 2 > best[0][0]:
+                continue
+            for rect_id in bucket:
+                sheet, x, y, w, h = self.rects[rect_id]
+                if w < width or h < height:
+                    continue
+                score: Tuple[float, ...] = (w * h, min(w - width, h - height), sheet, y, x)
+                if best is None or score < best[0]:
+                    best = (score, rect_id)
+        return best
+
+    def _bucket(self, width: float, height: float) -> Tuple[int, int]:
+        return int(width // self.quantum), int(height // self.quantum)
+
+
+class SheetNester:
+    """Best-area-fit guillotine nesting of panels onto 4' x 8' sheets
+
+    Kerf is handled by growing every part and the sheet by one kerf, so
+    neighbouring parts are a blade apart and parts may touch the edges.
+    Each placement splits its free rectangle in two with one straight
+    cut across it, which keeps every layout cuttable on a table or panel saw.
+    """
+
+    def __init__(self, kerf: float = 0.125, sheet_width: float = 96, sheet_height: float = 48) -> None:
+        self.kerf: float = kerf
+        self.sheet_width: float = sheet_width
+        self.sheet_height: float = sheet_height
+        self.unplaced: List[PanelPiece] = []  # parts larger than a sheet
+
+    @property
+    def sheet_size(self) -> str:
+        """Price key for the sheet, e.g. '4x8'"""
+        return f"{self.sheet_height / 12:g}x{self.sheet_width / 12:g}"
+
+    def nest(self, panels: List[PanelPiece]) -> Dict[str, List[Sheet]]:
+        """Nest panels per material, largest area first"""
+        by_material: Dict[str, List[PanelPiece]] = {}
+        for panel in panels:
+            by_material.setdefault(panel.material, []).append(panel)
+        self.unplaced = []
+        return {material: self._nest_material(material, parts) for material, parts in by_material.items()}
+
+    def _nest_material(self, material: str, parts: List[PanelPiece]) -> List[Sheet]:
+        sheets: List[Sheet] = []
+        index: FreeRectIndex = FreeRectIndex()
+        kerf: float = self.kerf
+        ordered: List[PanelPiece] = sorted(parts, key=lambda p: (p.width * p.height, max(p.width, p.height)),
+                                           reverse=True)
+
+        for part in ordered:
+            orientations: List[Tuple[float, float, bool]] = [(part.width, part.height, False)]
+            if part.rotatable and part.width != part.height:
+                orientations.append((part.height, part.width, True))
+            if not any(w <= self.sheet_width and h <= self.sheet_height for w, h, _ in orientations):
+                self.unplaced.append(part)
+                continue
+
+            for _ in range(part.quantity):
+                choice: Optional[Tuple[Tuple[float, ...], int, float, float, bool]] = None
+                for width, height, rotated in orientations:
+                    found = index.best_fit(width + kerf, height + kerf)
+                    if found is not None and (choice is None or found[0] < choice[0]):
+                        choice = (found[0], found[1], width, height, rotated)
+                if choice is None:
+                    sheets.append(Sheet(self.sheet_width, self.sheet_height, material))
+                    index.add(len(sheets) - 1, 0, 0, self.sheet_width + kerf, self.sheet_height + kerf)
+                    for width, height, rotated in orientations:
+                        found = index.best_fit(width + kerf, height + kerf)
+                        if found is not None:
+                            choice = (found[0], found[1], width, height, rotated)
+                            break
+                assert choice is not None
+
+                _, rect_id, width, height, rotated = choice
+                sheet, x, y, w, h = index.remove(rect_id)
+                sheets[sheet].placements.append(Placement(x, y, width, height, part.label, rotated))
+                self._split(index, sheet, x, y, w, h, width + kerf, height + kerf)
+
+        return sheets
+
+    @staticmethod
+    def _split(index: FreeRectIndex, sheet: int, x: float, y: float, w: float, h: float,
+               used_w: float, used_h: float) -> None:
+        """Guillotine split of the rest of a free rectangle, along its shorter leftover"""
+        right: float = w - used_w
+        top: float = h - used_h
+        if right < top:
+            # Cut across the full width: a short strip beside the part, the full-width rest above
+            pieces = [(x + used_w, y, right, used_h), (x, y + used_h, w, top)]
+        else:
+            pieces = [(x + used_w, y, right, h), (x, y + used_h, used_w, top)]
+        for px, py, pw, ph in pieces:
+            if pw > 0 and ph > 0:
+                index.add(sheet, px, py, pw, ph)
+
+    def generate_cut_list(self, nested: Dict[str, List[Sheet]]) -> Dict[str, Any]:
+        """Sheet layouts with usage and cost per material"""
+        prices: PriceCatalog = get_catalog()
+
+        layout: Dict[str, Any] = {}
+        total_cost: float = 0
+        for material, sheets in nested.items():
+            price: Optional[float] = prices.sheet_price(material, self.sheet_size)
+            used: float = sum(sheet.width * sheet.height - sheet.waste for sheet in sheets)
+            area: float = sum(sheet.width * sheet.height for sheet in sheets)
+            layout[material] = {
+                'sheet_size': self.sheet_size,
+                'total_sheets': len(sheets),
+                'efficiency': used / area * 100 if area else 100.0,
+                'total_cost': price * len(sheets) if price is not None else 0,
+                'sheets': [
+                    {
+                        'sheet_number': i + 1,
+                        'width': sheet.width,
+                        'height': sheet.height,
+                        'placements': [vars(placement) for placement in sheet.placements],
+                        'waste_sqft': sheet.waste / 144
+                    }
+                    for i, sheet in enumerate(sheets)
+                ]
+            }
+            if price is not None:
+                layout[material]['unit_price'] = price
+            total_cost += layout[material]['total_cost']
+
+        layout['summary'] = {
+            'total_sheets': sum(len(sheets) for sheets in nested.values()),
+            'total_cost': total_cost,
+            'unplaced': [vars(part) for part in self.unplaced]
+        }
+        return layout
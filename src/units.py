@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+OpenCraftShop - Length Units
+Integer fixed-point lengths shared by the optimizer, BOM and writers
+
+Copyright (c) 2024 OpenCraftShop Contributors
+Licensed under the MIT License
+"""
+
+from typing import Dict, Tuple, Optional, Union
+
+# One tick is 1/203200": 1/64" is 3175 ticks and 0.1 mm is 800, so both
+# imperial fractions and metric lengths are whole numbers of ticks.
+TICKS_PER_INCH: int = 203200
+UNIT_TICKS: Dict[str, int] = {
+    'in': TICKS_PER_INCH,
+    'ft': 12 * TICKS_PER_INCH,
+    'mm': 8000,
+    'cm': 80000,
+    'm': 8000000,
+}
+UNITS: Tuple[str, ...] = ('in', 'mm')  # display units offered by the CLI
+
+Ticks = int  # a length in ticks; sums and comparisons are exact integer math
+
+
+def to_ticks(value: float, unit: str = 'in') -> Ticks:
+    """Length in `unit` to the nearest tick"""
+    return round(value * UNIT_TICKS[unit])
+
+
+def from_ticks(ticks: Ticks, unit: str = 'in') -> Union[int, float]:
+    """Ticks to `unit`; whole values come back as int, as the BOM and stock tables write them"""
+    whole, rest = divmod(ticks, UNIT_TICKS[unit])
+    return whole if rest == 0 else ticks / UNIT_TICKS[unit]
+
+
+def to_inches(value: float, unit: str) -> Union[int, float]:
+    """A length given in `unit`, in inches on the tick grid"""
+    return from_ticks(to_ticks(value, unit))
+
+
+def format_length(inches: float, unit: str = 'in', decimals: Optional[int] = None) -> str:
+    """Display a length in inches in the chosen unit, e.g. 34.5" or 876.3 mm
+
+    Without `decimals`, inches print as given and metric to 0.1.
+    """
+    if unit == 'in':
+        return f"{inches}\"" if decimals is None else f"{inches:.{decimals}f}\""
+    value: float = from_ticks(to_ticks(inches), unit)
+    return f"{round(value, 1):g} {unit}" if decimals is None else f"{value:.{decimals}f} {unit}"
+
+
+def stock_price_key(inches: float) -> str:
+    """Price table key of a stock length: feet for whole-foot boards ('8'), else millimetres ('2400mm')"""
+    ticks: Ticks = to_ticks(inches)
+    if ticks % UNIT_TICKS['ft'] == 0:
+        return str(ticks // UNIT_TICKS['ft'])
+    return f"{round(from_ticks(ticks, 'mm'), 1):g}mm"
+
+
+def stock_label(inches: float) -> str:
+    """Shopping list name of a stock length: 8' or 2400 mm"""
+    key: str = stock_price_key(inches)
+    return f"{key[:-2]} mm" if key.endswith('mm') else f"{key}'"
+
@@ -8,6 +8,7 @@ from rich.text import Text
 from rich.layout import Layout
 from rich import box
 import json
+from furniture_templates import TEMPLATES
 
 class TerminalVisualizer:
     def __init__(self) -> None:
@@ -15,16 +16,9 @@ class TerminalVisualizer:
     
     def draw_ascii_furniture(self, furniture_type: str, length: float, width: float, height: float) -> str:
         """Create simple ASCII representation of furniture"""
-        if furniture_type == 'workbench':
-            return self.draw_ascii_workbench(length, width, height)
-        elif furniture_type == 'storage_bench':
-            return self.draw_ascii_storage_bench(length, width, height)
-        elif furniture_type == 'bed_frame':
-            return self.draw_ascii_bed(length, width, height)
-        elif furniture_type == 'bookshelf':
-            return self.draw_ascii_bookshelf(length, width, height)
-        else:
-            return self.draw_ascii_workbench(length, width, height)
+        view: str = TEMPLATES[furniture_type].ascii_view if furniture_type in TEMPLATES else 'workbench'
+        draw = getattr(self, f"draw_ascii_{view}", self.draw_ascii_workbench)
+        return draw(length, width, height)
     
     def draw_ascii_workbench(self, length: float, width: float, height: float) -> str:
         """Create simple ASCII representation of workbench"""
@@ -111,7 +105,7 @@ class TerminalVisualizer:
         lines.append("└" + "─" * scale_w + "┘")
         
         lines.append(f"\nDimensions: {length}\" W x {width}\" D x {height}\" H")
-        lines.append(f"Shelves: {max(3, min(8, int(height / 12)))}")
+        lines.append(f"Shelves: {TEMPLATES['bookshelf'].evaluate(length, width, height)[2]['num_shelves']}")
         
         return "\n".join(lines)
     
@@ -132,8 +126,13 @@ class TerminalVisualizer:
             
             for stock in data['stocks']:
                 cuts_str: str = "\n".join([f"{cut[0]}\" - {cut[1]}" for cut in stock['cuts']])
+                stock_label: str = str(stock['stock_number'])
+                if stock.get('quantity', 1) > 1:
+                    stock_label += f" (x{stock['quantity']})"
+                if 'offcut_id' in stock:
+                    stock_label += f" [offcut #{stock['offcut_id']}]"
                 table.add_row(
-                    str(stock['stock_number']),
+                    stock_label,
                     f"{stock['length']}\" ({stock['length_feet']}\')",
                     cuts_str,
                     f"{stock['waste']:.2f}\"",
@@ -186,6 +185,7 @@ Dimensions: {dimensions['length']}\" L x {dimensions['width']}\" W x {dimensions
 [bold]Material Efficiency:[/bold]
 Total Waste: {summary.get('total_waste_inches', 0):.2f}\" ({summary.get('total_waste_feet', 0):.2f}')
 Overall Efficiency: {summary.get('efficiency', 0):.1f}%
+Optimality Gap: {summary.get('optimality_gap', 0):.1f}%{' (proven optimal)' if summary.get('proven_optimal') else ''}
 Total Material Cost: ${summary.get('total_cost', 0):.2f}
 """
         
@@ -7,19 +7,17 @@ import subprocess
 from typing import Dict, Any, Tuple
 import tempfile
 from pathlib import Path
+from furniture_templates import TEMPLATES
+from generate_bom import build_bom, price_bom
 
 app = Flask(__name__)
 CORS(app)
 
 OUTPUT_DIR = Path("/app/output")
 OUTPUT_DIR.mkdir(exist_ok=True)
+CACHE_DIR = OUTPUT_DIR / ".cache"
 
-FURNITURE_TYPES = {
-    "workbench": "Workbench",
-    "storage_bench": "Storage Bench", 
-    "bed_frame": "Bed Frame",
-    "bookshelf": "Bookshelf"
-}
+FURNITURE_TYPES = {name: template.title for name, template in TEMPLATES.items()}
 
 @app.route('/')
 def index():
@@ -30,10 +28,13 @@ def generate_furniture():
     try:
         data = request.json
         furniture_type = data.get('type', 'workbench')
+        if furniture_type not in TEMPLATES:
+            return jsonify({'error': f'Unknown furniture type: {furniture_type}'}), 400
+        defaults = TEMPLATES[furniture_type].defaults
         dimensions = {
-            'length': float(data.get('length', 48)),
-            'width': float(data.get('width', 24)),
-            'height': float(data.get('height', 36))
+            'length': float(data.get('length', defaults['length'])),
+            'width': float(data.get('width', defaults['width'])),
+            'height': float(data.get('height', defaults['height']))
         }
         
         # Run the main.py script to generate files
@@ -44,6 +45,7 @@ def generate_furniture():
             '--width', str(int(dimensions['width'])),
             '--height', str(int(dimensions['height'])),
             '--output-dir', str(OUTPUT_DIR),
+            '--cache-dir', str(CACHE_DIR),
             '--no-visualize'
         ]
         
@@ -84,6 +86,32 @@ def generate_furniture():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/bom', methods=['POST'])
+def quote_furniture():
+    """Bill of materials and price, computed in-process; safe under a threaded server"""
+    try:
+        data = request.json or {}
+        furniture_type = data.get('type', 'workbench')
+        if furniture_type not in TEMPLATES:
+            return jsonify({'error': f'Unknown furniture type: {furniture_type}'}), 400
+        template = TEMPLATES[furniture_type]
+        length, width, height = (float(data.get(d, template.defaults[d])) for d in ('length', 'width', 'height'))
+        error = template.check_dimensions(length, width, height)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        bom = build_bom(furniture_type, length, width, height)
+        priced = price_bom(bom, kerf=float(data.get('kerf', 0.125)))
+        return jsonify({
+            'success': True,
+            'bom': bom.to_dict(),
+            'bom_text': bom.format_text(),
+            **priced
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/download/<filename>')
 def download_file(filename):
     try:
@@ -96,4 +124,4 @@ def download_file(filename):
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
\ No newline at end of file
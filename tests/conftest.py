@@ -1,10 +1,14 @@
 """Pytest configuration and shared fixtures."""
 import pytest
+import sys
 import tempfile
 import shutil
 from pathlib import Path
 from typing import Generator
 
+# Modules in src/ import each other by bare name, as when run from src/main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
 
 @pytest.fixture
 def temp_output_dir() -> Generator[Path, None, None]:
@@ -14,6 +18,14 @@ def temp_output_dir() -> Generator[Path, None, None]:
     shutil.rmtree(temp_dir)
 
 
+@pytest.fixture
+def project_dir(monkeypatch) -> Path:
+    """Run the test from the repository root, where config/ lives."""
+    root = Path(__file__).resolve().parent.parent
+    monkeypatch.chdir(root)
+    return root
+
+
 @pytest.fixture
 def sample_cut_pieces():
     """Provide sample cut pieces for testing."""
@@ -0,0 +1,97 @@
+"""Unit tests for pooled multi-order optimization."""
+import json
+from collections import Counter
+
+import pytest
+
+from batch_orders import BatchOptimizer, Order, format_order_sheet, load_orders
+from optimize_cuts import CutOptimizer
+
+ORDERS = [
+    Order("A1", "bookshelf"),
+    Order("A2", "bookshelf", length=30),
+    Order("B1", "storage_bench"),
+]
+
+
+class TestLoadOrders:
+    """Test cases for reading order files."""
+
+    def test_json_lines_and_list(self, temp_output_dir):
+        records = [{"order_id": 7, "type": "workbench", "length": 60}, {"order_id": "x", "type": "bed_frame"}]
+        lines = temp_output_dir / "orders.jsonl"
+        lines.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+        listed = temp_output_dir / "orders.json"
+        listed.write_text(json.dumps(records))
+        expected = [Order("7", "workbench", 60), Order("x", "bed_frame")]
+        assert load_orders(str(lines)) == expected
+        assert load_orders(str(listed)) == expected
+
+    def test_rejects_unknown_type_and_duplicates(self, temp_output_dir):
+        path = temp_output_dir / "orders.jsonl"
+        path.write_text(json.dumps({"order_id": 1, "type": "sofa"}))
+        with pytest.raises(ValueError):
+            load_orders(str(path))
+        path.write_text(json.dumps({"order_id": 1, "type": "workbench"}) + "\n"
+                        + json.dumps({"order_id": 1, "type": "bookshelf"}))
+        with pytest.raises(ValueError):
+            load_orders(str(path))
+
+    def test_rejects_out_of_range_orders(self, temp_output_dir):
+        path = temp_output_dir / "orders.jsonl"
+        path.write_text(json.dumps({"order_id": "a", "type": "workbench", "length": 400}) + "\n"
+                        + json.dumps({"order_id": "b", "type": "workbench"}))
+        with pytest.raises(ValueError, match="Order a: Length must be between"):
+            load_orders(str(path))
+        with pytest.raises(ValueError):
+            BatchOptimizer().optimize([Order("a", "workbench", length=400)])
+
+    @pytest.mark.parametrize("order_id", [
+        "a: b",  # "a: b" + "Legs" and "a" + "b: Legs" would both tag as "a: b: Legs"
+        "../x", "a/b", "..", ".", "a\\b", ""
+    ])
+    def test_rejects_ids_unfit_for_tags_or_directories(self, order_id, temp_output_dir):
+        path = temp_output_dir / "orders.jsonl"
+        path.write_text(json.dumps({"order_id": order_id, "type": "workbench"}))
+        with pytest.raises(ValueError, match="may only use"):
+            load_orders(str(path))
+
+
+class TestBatchOptimizer:
+    """Test cases for pooling and splitting."""
+
+    def test_every_order_gets_exactly_its_parts(self, project_dir):
+        batch = BatchOptimizer()
+        result = batch.optimize(ORDERS)
+        for order in ORDERS:
+            pieces, panels = batch.order_parts(order)
+            wanted = Counter()
+            for piece in pieces:
+                wanted[(piece.lumber_type, piece.length, piece.label)] += piece.quantity
+            got = Counter()
+            for lumber_type, boards in result.order_sheets[order.order_id]["lumber"].items():
+                for board in boards:
+                    for length, purpose in board["cuts"]:
+                        got[(lumber_type, length, purpose)] += board["quantity"]
+            assert got == wanted
+            placed = [p["label"] for parts in result.order_sheets[order.order_id]["panels"].values()
+                      for p in parts]
+            assert sorted(placed) == sorted(p.label for p in panels for _ in range(p.quantity))
+
+    def test_pooling_never_costs_more_and_shares_are_complete(self, project_dir):
+        result = BatchOptimizer(CutOptimizer()).optimize(ORDERS, compare=True)
+        lumber = result.cut_list["summary"]["total_cost"]
+        assert lumber <= result.separate_cost
+        shares = sum(sheet["cost_share"] for sheet in result.order_sheets.values())
+        assert shares == pytest.approx(lumber)
+        assert result.purchase_list["total_cost"] == pytest.approx(
+            lumber + sum(item["subtotal"] for material in result.purchase_list.get("sheets", {}).values()
+                         for item in material.values()))
+
+    def test_shared_boards_name_the_other_orders(self, project_dir):
+        result = BatchOptimizer().optimize(ORDERS)
+        shared = [board for sheet in result.order_sheets.values() for boards in sheet["lumber"].values()
+                  for board in boards if board["shared_with"]]
+        assert shared
+        text = format_order_sheet(result.order_sheets["A1"])
+        assert text.startswith("CUT SHEET - ORDER A1")
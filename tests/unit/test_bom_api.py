@@ -0,0 +1,69 @@
+"""Unit tests for the stateless bill of materials API."""
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from generate_bom import BOMGenerator, build_bom, format_bom_text, price_bom
+
+SIZES = [
+    ("workbench", 72, 24, 34),
+    ("storage_bench", 48, 18, 18),
+    ("bed_frame", 80, 60, 14),
+    ("bookshelf", 36, 12, 72),
+]
+
+
+class TestBillOfMaterials:
+    """Test cases for build_bom and BillOfMaterials."""
+
+    def test_is_immutable(self):
+        bom = build_bom("workbench", 72, 24, 34)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            bom.materials[0].length = 10
+        with pytest.raises(AttributeError):
+            bom.materials.append(bom.materials[0])
+
+    def test_matches_stateful_generator(self):
+        for furniture_type, *size in SIZES:
+            generator = BOMGenerator()
+            pieces = generator.generate_bom(furniture_type, *size)
+            bom = build_bom(furniture_type, *size)
+            assert bom.cut_pieces() == pieces
+            assert bom.format_text() == generator.format_bom_text()
+            assert bom.panel_pieces() == generator.panel_pieces()
+
+    def test_concurrent_calls_do_not_interfere(self):
+        expected = {size: format_bom_text(build_bom(*size).materials, build_bom(*size).panels) for size in SIZES}
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda size: (size, build_bom(*size).format_text()), SIZES * 200))
+        assert all(text == expected[size] for size, text in results)
+
+    def test_to_dict(self):
+        data = build_bom("storage_bench", 48, 18, 18).to_dict()
+        assert data["dimensions"] == {"length": 48, "width": 18, "height": 18}
+        assert data["panels"][0]["material"] == "3/4 plywood"
+
+
+class TestPriceBom:
+    """Test cases for price_bom."""
+
+    def test_prices_lumber_sheets_and_supplies(self, project_dir):
+        priced = price_bom(build_bom("storage_bench", 48, 18, 18))
+        shopping = priced["shopping_list"]
+        assert shopping["total_cost"] == pytest.approx(
+            priced["cut_list"]["summary"]["total_cost"] + priced["sheet_layout"]["summary"]["total_cost"])
+        assert shopping["sheets"]["3/4 plywood"]["4x8"]["quantity"] == 1
+
+    def test_template_supplies_replace_generic_ones(self, project_dir):
+        shopping = price_bom(build_bom("bed_frame", 80, 60, 14))["shopping_list"]
+        assert shopping["other_supplies"][0]["item"] == "Bed rail brackets"
+        assert shopping["estimated_total"] == pytest.approx(
+            shopping["total_cost"] + sum(item["est_cost"] for item in shopping["other_supplies"]))
+
+    def test_concurrent_quotes_match_serial(self, project_dir):
+        boms = [build_bom(*size) for size in SIZES]
+        serial = [price_bom(bom)["shopping_list"]["total_cost"] for bom in boms]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            threaded = list(pool.map(lambda bom: price_bom(bom)["shopping_list"]["total_cost"], boms * 10))
+        assert threaded == serial * 10
@@ -0,0 +1,53 @@
+"""Unit tests for cut plan lower bounds."""
+from bounds import cost_lower_bound, lower_bound
+from optimize_cuts import CutOptimizer, CutPiece
+
+STANDARD = [96, 120, 144, 192]
+
+
+class TestLowerBound:
+    """Test cases for lower_bound."""
+
+    def test_empty(self):
+        assert lower_bound([], STANDARD, 0.125).boards == 0
+
+    def test_continuous_bound(self):
+        bound = lower_bound([(40.0, 10)], STANDARD, 0.125)
+        assert bound.boards == 3
+        assert bound.material >= 400.0 + 3 * 0.125
+
+    def test_l2_counts_big_pieces(self):
+        # No two pieces over half the longest board can share one
+        bound = lower_bound([(100.0, 3), (97.0, 3)], STANDARD, 0.125)
+        assert bound.boards == 6
+        assert bound.material == 6 * 120
+
+    def test_l2_pairs_half_length_pieces(self):
+        # The 95" pieces pair up, but never with a 100" piece
+        assert lower_bound([(100.0, 3), (95.0, 3)], STANDARD, 0.125).boards == 5
+
+    def test_material_rounds_to_stock_lengths(self):
+        assert lower_bound([(47.0, 4)], STANDARD, 0.125).material == 192
+
+    def test_bound_never_exceeds_a_plan(self):
+        pieces = [CutPiece(70.0, "2x4", 5, "A"), CutPiece(31.0, "2x4", 9, "B"), CutPiece(13.5, "2x4", 7, "C")]
+        plan = CutOptimizer().optimize(pieces)
+        bound = CutOptimizer().lower_bounds(plan)["2x4"]
+        assert bound.boards <= len(plan["2x4"])
+        assert bound.material <= sum(stock.length for stock in plan["2x4"])
+
+    def test_cost_bound(self):
+        assert cost_lower_bound([(95.875, 1)], {96: 8.5}, 0.125) == 8.5
+
+
+class TestGapReporting:
+    """Test cases for optimality gap in generate_cut_list."""
+
+    def test_summary_reports_gap(self, project_dir):
+        optimizer = CutOptimizer()
+        cut_list = optimizer.generate_cut_list(optimizer.optimize([CutPiece(47.0, "2x4", 4, "Legs")]))
+        summary = cut_list["summary"]
+        assert summary["lower_bound_boards"] == 1  # one 16' board would also do
+        assert summary["optimality_gap"] == 0.0
+        assert summary["proven_optimal"]
+        assert cut_list["2x4"]["optimality_gap"] == 0.0
@@ -0,0 +1,60 @@
+"""Unit tests for the column generation cutting-stock solver."""
+import time
+from collections import Counter
+
+import numpy as np
+
+from column_generation import ColumnGenerationOptimizer, _best_pattern, solve_cutting_stock
+from optimize_cuts import CutOptimizer, CutPiece
+
+PRICES_2X4 = {96: 8.50, 120: 10.75, 144: 13.00, 192: 17.50}
+
+
+def plan_cost(stocks, prices):
+    return sum(prices[s.length] * s.count for s in stocks)
+
+
+class TestBestPattern:
+    """Test cases for the knapsack pricing step."""
+
+    def test_finds_best_bounded_fill(self):
+        value, counts = _best_pattern(
+            np.array([3.0, 1.0]), np.array([40.0, 10.0]), np.array([5.0, 5.0]),
+            95.875, time.monotonic() + 1,
+        )
+        # Five 10" pieces are capped by demand, so one 40" piece fills the rest
+        assert list(counts) == [1, 5]
+        assert value == 8.0
+
+
+class TestColumnGeneration:
+    """Test cases for ColumnGenerationOptimizer."""
+
+    def test_beats_ffd_on_cost(self, project_dir):
+        pieces = [
+            CutPiece(40.25, "2x4", 2, "Rails"),
+            CutPiece(58.5, "2x4", 5, "Stiles"),
+            CutPiece(40.25, "2x4", 4, "Braces"),
+        ]
+        ffd = CutOptimizer(strategy="patterns").optimize(pieces)["2x4"]
+        exact = ColumnGenerationOptimizer(time_limit=2).optimize(pieces)["2x4"]
+        assert plan_cost(exact, PRICES_2X4) < plan_cost(ffd, PRICES_2X4)
+
+    def test_meets_demand_exactly(self, project_dir):
+        pieces = [
+            CutPiece(22.5, "1x4", 37, "Slats"),
+            CutPiece(70.0, "1x4", 3, "Rails"),
+            CutPiece(31.0, "1x4", 9, "Cleats"),
+        ]
+        plan = ColumnGenerationOptimizer(time_limit=2).optimize(pieces)["1x4"]
+        produced = Counter()
+        for stock in plan:
+            assert sum(cut[0] for cut in stock.cuts) + 0.125 <= stock.length
+            for cut in stock.cuts:
+                produced[cut] += stock.count
+        assert produced == Counter({(22.5, "Slats"): 37, (70.0, "Rails"): 3, (31.0, "Cleats"): 9})
+
+    def test_expired_budget_returns_a_plan(self):
+        demands = [(47.0, "Legs", 12), (13.5, "Blocks", 30)]
+        plan = solve_cutting_stock(demands, PRICES_2X4, 0.125, deadline=0)
+        assert sum(cut[0] == 47.0 for _, cuts, count in plan for cut in cuts for _ in range(count)) == 12
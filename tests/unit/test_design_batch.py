@@ -0,0 +1,59 @@
+"""Unit tests for JSONL batch designs."""
+import io
+import json
+
+import pytest
+
+from design_batch import read_requests, run_requests
+from main import run_design
+
+REQUESTS = "\n".join([
+    json.dumps({"id": "bench", "type": "workbench", "length": 60}),
+    json.dumps({"id": "shelf", "type": "bookshelf", "kerf": 0.0625}),
+    "",
+    json.dumps({"type": "bed_frame", "units": "mm", "length": 1905, "width": 1524, "height": 355.6}),
+    "{not json",
+    json.dumps({"id": "big", "type": "workbench", "length": 500}),
+    json.dumps({"id": "odd", "type": "workbench", "colour": "red"}),
+    json.dumps({"id": "../escape", "type": "workbench"}),
+    json.dumps({"id": "..", "type": "workbench"}),
+]) + "\n"
+
+
+def run(output_dir, jobs):
+    out = io.StringIO()
+    done, failed = run_requests(read_requests(io.StringIO(REQUESTS)), str(output_dir), jobs, False, out)
+    records = {record["line"]: record for record in map(json.loads, out.getvalue().splitlines())}
+    return done, failed, records
+
+
+class TestDesignBatch:
+    """Test cases for run_requests."""
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_one_record_per_request(self, project_dir, temp_output_dir, jobs):
+        done, failed, records = run(temp_output_dir, jobs)
+        assert (done, failed) == (8, 5)
+        assert sorted(records) == [1, 2, 4, 5, 6, 7, 8, 9]
+        assert [records[n]["ok"] for n in (1, 2, 4)] == [True, True, True]
+        assert records[4]["id"] == "4"
+        assert records[4]["length"] == 75
+        assert "between" in records[6]["error"]
+        assert "colour" in records[7]["error"]
+        assert not (temp_output_dir.parent / "escape").exists()
+        assert "may only use" in records[9]["error"]
+        assert not (temp_output_dir.parent / "cut_list.json").exists()
+
+    def test_each_request_gets_its_own_directory(self, project_dir, temp_output_dir):
+        _, _, records = run(temp_output_dir, 2)
+        for request_id in ("bench", "shelf", "4"):
+            assert (temp_output_dir / request_id / "cut_list.json").exists()
+        assert records[1]["output_dir"] == str(temp_output_dir / "bench")
+
+    def test_matches_a_single_run(self, project_dir, temp_output_dir):
+        _, _, records = run(temp_output_dir / "batch", 2)
+        single = run_design("workbench", 60, output_dir=str(temp_output_dir / "single"), models=False)
+        for key in ("boards", "total_cost", "estimated_total", "efficiency"):
+            assert records[1][key] == single[key]
+        assert ((temp_output_dir / "batch" / "bench" / "cut_list.json").read_text()
+                == (temp_output_dir / "single" / "cut_list.json").read_text())
@@ -0,0 +1,52 @@
+"""Unit tests for vectorized dimension sweeps."""
+import numpy as np
+import pytest
+
+from dimension_sweep import DimensionSweep, parse_range
+from generate_bom import BOMGenerator
+from optimize_cuts import CutOptimizer
+from sheet_nesting import SheetNester
+
+
+def single_run(furniture_type, length, width, height):
+    """What main.py would price one size at"""
+    bom = BOMGenerator()
+    optimizer = CutOptimizer()
+    optimized = optimizer.optimize(bom.generate_bom(furniture_type, length, width, height))
+    cut_list = optimizer.generate_cut_list(optimized)
+    nester = SheetNester()
+    sheets = nester.generate_cut_list(nester.nest(bom.panel_pieces()))['summary']
+    boards = sum(stock.count for stocks in optimized.values() for stock in stocks)
+    return cut_list['summary']['total_cost'] + sheets['total_cost'], boards, cut_list['summary']['efficiency']
+
+
+class TestDimensionSweep:
+    """Test cases for DimensionSweep."""
+
+    @pytest.mark.parametrize("furniture_type", ["workbench", "storage_bench", "bed_frame", "bookshelf"])
+    def test_matches_single_runs(self, project_dir, furniture_type):
+        result = DimensionSweep().sweep(furniture_type, [30, 47.5, 72], [12, 20], [18, 30, 60])
+        for index in zip(*np.nonzero(result.valid)):
+            size = (result.lengths[index[0]], result.widths[index[1]], result.heights[index[2]])
+            cost, boards, efficiency = single_run(furniture_type, *size)
+            assert result.cost[index] == pytest.approx(cost)
+            assert result.boards[index] == boards
+            assert result.efficiency[index] == pytest.approx(efficiency)
+
+    def test_identical_cut_lists_are_optimized_once(self, project_dir):
+        # Bed frame legs only depend on the height, so they are packed once for all lengths
+        result = DimensionSweep().sweep("bed_frame", np.arange(60, 120), [60], [14])
+        assert result.cost.shape == (60, 1, 1)
+        assert result.distinct_plans < 4 * 60
+
+    def test_out_of_limits_points_are_masked(self, project_dir):
+        result = DimensionSweep().sweep("workbench", [48, 200], 24, 34)
+        assert result.valid[:, 0, 0].tolist() == [True, False]
+        assert np.isnan(result.cost[1, 0, 0])
+        assert result.to_dict()["cost"][1][0][0] is None
+
+
+def test_parse_range():
+    assert parse_range("48:60:6").tolist() == [48, 54, 60]
+    assert parse_range("30,36").tolist() == [30, 36]
+    assert parse_range("24").tolist() == [24]
@@ -0,0 +1,83 @@
+"""Unit tests for the data-driven furniture template registry."""
+import pytest
+
+from furniture_templates import (FURNITURE_TYPES, TEMPLATES, compile_template, get_template,
+                                 scad_assignments)
+from generate_bom import BOMGenerator
+
+STOOL = {
+    "title": "Step Stool",
+    "defaults": {"length": 16, "width": 12, "height": 9},
+    "limits": {"length": [10, 24], "width": [8, 16], "height": [6, 18]},
+    "derived": {"steps": "max(1, int(height / 8))"},
+    "parts": [
+        {"lumber_type": "1x12", "length": "length", "quantity": "steps", "purpose": "Treads"},
+        {"lumber_type": "1x4", "length": "height", "quantity": "4", "purpose": "Legs"},
+        {"lumber_type": "1x2", "length": "width - 1.5", "quantity": "2", "purpose": "Braces",
+         "when": "height > 12"}
+    ],
+    "panels": [
+        {"material": "1/2 plywood", "width": "length", "height": "width", "quantity": "1", "purpose": "Deck"}
+    ],
+    "scad": {"stool_height": "height", "finish": "'oil'"}
+}
+
+
+class TestRegistry:
+    """Test cases for the shipped templates."""
+
+    def test_every_cli_type_is_registered(self):
+        assert set(FURNITURE_TYPES) == {"workbench", "storage_bench", "bed_frame", "bookshelf"}
+        for template in TEMPLATES.values():
+            assert template.check_dimensions(*template.defaults.values()) is None
+
+    def test_bed_frame_formulas(self):
+        parts, panels, scad = get_template("bed_frame").evaluate(80, 60, 14)
+        assert ("4x4", 36, 2, "Head posts") in parts
+        assert ("1x4", 53, 10, "Support slats") in parts
+        assert panels == []
+        assert scad["headboard_height"] == 36 and scad["mattress_support_slats"] == 10
+
+    def test_optional_parts_follow_their_condition(self):
+        purposes = lambda height: [p[3] for p in get_template("bookshelf").evaluate(36, 12, height)[0]]
+        assert "Face frame rails" in purposes(72)
+        assert "Face frame rails" not in purposes(40)
+
+    def test_bom_generator_uses_registry(self):
+        bom = BOMGenerator()
+        pieces = bom.generate_bom("storage_bench", 48, 18, 18)
+        assert [(p.lumber_type, p.length, p.quantity) for p in pieces][-1] == ("1x4", 11, 1)
+        assert [(p.width, p.height) for p in bom.panel_pieces()] == [(41, 11)]
+
+    def test_unknown_type(self):
+        with pytest.raises(ValueError):
+            get_template("sofa")
+
+    def test_limits(self):
+        assert get_template("bed_frame").check_dimensions(120, 60, 14) is None
+        assert "Length" in get_template("workbench").check_dimensions(120, 24, 34)
+
+
+class TestCompile:
+    """Test cases for compiling template specs."""
+
+    def test_new_template_needs_no_code(self):
+        template = compile_template("step_stool", STOOL)
+        parts, panels, scad = template.evaluate(16, 12, 16)
+        assert parts == [("1x12", 16, 2, "Treads"), ("1x4", 16, 4, "Legs"), ("1x2", 10.5, 2, "Braces")]
+        assert panels == [("1/2 plywood", 16, 12, 1, "Deck")]
+        assert scad_assignments(scad).splitlines()[1:] == ["stool_height = 16;", 'finish = "oil";']
+        assert len(template.evaluate(16, 12, 9)[0]) == 2
+
+    @pytest.mark.parametrize("formula", [
+        "__import__('os').getcwd()",
+        "length.__class__",
+        "[length]",
+        "depth * 2",
+        "sorted(length)",
+        "length +",
+    ])
+    def test_rejects_unsafe_or_unknown_formulas(self, formula):
+        spec = dict(STOOL, parts=[{"lumber_type": "2x4", "length": formula, "quantity": "1", "purpose": "x"}])
+        with pytest.raises(ValueError):
+            compile_template("bad", spec)
@@ -0,0 +1,55 @@
+"""Unit tests for the local search plan improver."""
+import random
+from collections import Counter
+
+from local_search import LocalSearchImprover
+from optimize_cuts import CutOptimizer, CutPiece
+
+
+def material(plan):
+    return sum(stock.length * stock.count for stocks in plan.values() for stock in stocks)
+
+
+def mixed_pieces(seed):
+    rng = random.Random(seed)
+    return [
+        CutPiece(rng.choice([13.5, 22.5, 31.0, 40.25, 47.0, 58.5, 70.0, 89.0]), "2x4",
+                 rng.randint(1, 30), f"part{i}")
+        for i in range(6)
+    ]
+
+
+class TestLocalSearchImprover:
+    """Test cases for LocalSearchImprover."""
+
+    def test_improvements_strictly_reduce_waste(self):
+        plan = CutOptimizer().optimize(mixed_pieces(2))
+        previous = material(plan)
+        improver = LocalSearchImprover(time_limit=30, max_iterations=5000, seed=1)
+        for better in improver.improve(plan):
+            assert material(better) < previous
+            previous = material(better)
+        assert previous < material(plan)
+
+    def test_keeps_every_cut_and_respects_kerf(self):
+        plan = CutOptimizer(strategy="patterns").optimize(mixed_pieces(3))
+        best = LocalSearchImprover(time_limit=30, max_iterations=3000, seed=2).run(plan)
+        before = Counter(cut for stock in plan["2x4"] for cut in stock.cuts * stock.count)
+        after = Counter(cut for stock in best["2x4"] for cut in stock.cuts)
+        assert before == after
+        for stock in best["2x4"]:
+            assert sum(cut[0] for cut in stock.cuts) + 0.125 <= stock.length
+
+    def test_seed_makes_runs_reproducible(self):
+        plan = CutOptimizer().optimize(mixed_pieces(4))
+        seen = [[], []]
+        runs = [
+            LocalSearchImprover(time_limit=30, max_iterations=2000, seed=9).run(plan, callback=seen[i].append)
+            for i in range(2)
+        ]
+        assert runs[0] == runs[1]
+        assert seen[0] == seen[1]
+
+    def test_single_board_has_nothing_to_do(self):
+        plan = CutOptimizer().optimize([CutPiece(30.0, "2x4", 1, "Only")])
+        assert list(LocalSearchImprover().improve(plan)) == []
@@ -0,0 +1,190 @@
+"""Unit tests for native STL meshing of registry models."""
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from furniture_templates import FURNITURE_TYPES, compile_template, get_template
+from model_mesh import STL_RECORD, box_triangles
+from scad_render import SRC_DIR, RenderJob, render_all, render_command, view_jobs
+
+STOOL = {
+    "defaults": {"length": 16, "width": 12, "height": 9},
+    "limits": {"length": [10, 24], "width": [8, 16], "height": [6, 18]},
+    "parts": [{"lumber_type": "1x12", "length": "length", "quantity": "1", "purpose": "Tread"}],
+    "panels": [],
+    "scad": {"stool_height": "height"}
+}
+
+# Boxes drawn by src/templates/*.scad at the default sizes, as ((x, y, z) of the lowest corner, extents);
+# a template without an exploded entry draws the same boxes in both views
+SCAD_BOXES = {
+    ('workbench', 'assembled'): [
+        ((4, 4, 0), (34, 3.5, 3.5)), ((64.5, 4, 0), (34, 3.5, 3.5)), ((4, 16.5, 0), (34, 3.5, 3.5)),
+        ((64.5, 16.5, 0), (34, 3.5, 3.5)), ((0, 0, 32.5), (72, 5.5, 1.5)), ((0, 5.5, 32.5), (72, 5.5, 1.5)),
+        ((0, 11, 32.5), (72, 5.5, 1.5)), ((0, 16.5, 32.5), (72, 5.5, 1.5)), ((0, 22, 32.5), (72, 5.5, 1.5)),
+        ((4, 6, 24), (64, 1.5, 3.5)), ((4, 17, 24), (64, 1.5, 3.5)), ((7.5, 4, 24), (1.5, 16, 3.5)),
+        ((66.5, 4, 24), (1.5, 16, 3.5)), ((4, 6, 6), (64, 1.5, 3.5)), ((4, 17, 6), (64, 1.5, 3.5))
+    ],
+    ('workbench', 'exploded'): [
+        ((4, -6, 0), (34, 3.5, 3.5)), ((54.5, -6, 0), (34, 3.5, 3.5)), ((4, 26.5, 0), (34, 3.5, 3.5)),
+        ((74.5, 26.5, 0), (34, 3.5, 3.5)), ((0, 0, 54), (72, 5.5, 1.5)), ((0, 7.5, 54), (72, 5.5, 1.5)),
+        ((0, 15, 54), (72, 5.5, 1.5)), ((0, 22.5, 54), (72, 5.5, 1.5)), ((0, 30, 54), (72, 5.5, 1.5)),
+        ((4, -4, 24), (64, 1.5, 3.5)), ((4, 27, 24), (64, 1.5, 3.5)), ((7.5, -6, 29), (1.5, 16, 3.5)),
+        ((76.5, -6, 29), (1.5, 16, 3.5)), ((4, -4, 1), (64, 1.5, 3.5)), ((4, 27, 1), (64, 1.5, 3.5))
+    ],
+    ('storage_bench', 'assembled'): [
+        ((0, 0, 0), (18, 3.5, 1.5)), ((0, 14.5, 0), (18, 3.5, 1.5)), ((44.5, 0, 0), (18, 3.5, 1.5)),
+        ((44.5, 14.5, 0), (18, 3.5, 1.5)), ((0, 0, -31.5), (1.5, 3.5, 48)), ((0, 14.5, -31.5), (1.5, 3.5, 48)),
+        ((-3.5, 3.5, 5.5), (3.5, 1.5, 11)), ((41, 3.5, 5.5), (3.5, 1.5, 11)), ((0, 0, -44.5), (1.5, 3.5, 48)),
+        ((0, 14.5, -44.5), (1.5, 3.5, 48)), ((-3.5, 3.5, -7.5), (3.5, 1.5, 11)), ((41, 3.5, -7.5), (3.5, 1.5, 11)),
+        ((0, 0, 17.25), (48, 5.5, 0.75)), ((0, 5.5, 17.25), (48, 5.5, 0.75)), ((0, 11, 17.25), (48, 5.5, 0.75)),
+        ((0, 16.5, 17.25), (48, 5.5, 0.75)), ((3.5, 3.5, 4), (41, 11, 0.75)), ((20.125, 3.5, 4), (3.5, 11, 0.75))
+    ],
+    ('bed_frame', 'assembled'): [
+        ((0, 56.5, 0), (23.25, 3.5, 3.5)), ((76.5, 56.5, 0), (23.25, 3.5, 3.5)), ((0, 0, 0), (36, 3.5, 3.5)),
+        ((76.5, 0, 0), (36, 3.5, 3.5)), ((3.5, 0, 14), (1.5, 73, 9.25)), ((3.5, 60, 14), (1.5, 73, 9.25)),
+        ((-53, 3.5, 14), (53, 1.5, 9.25)), ((27, 3.5, 14), (53, 1.5, 9.25)), ((3.5, 27.25, 14), (73, 5.5, 1.5)),
+        ((4.886364, 3.5, 14.75), (3.5, 53, 0.75)), ((11.522727, 3.5, 14.75), (3.5, 53, 0.75)),
+        ((18.159091, 3.5, 14.75), (3.5, 53, 0.75)), ((24.795455, 3.5, 14.75), (3.5, 53, 0.75)),
+        ((31.431818, 3.5, 14.75), (3.5, 53, 0.75)), ((38.068182, 3.5, 14.75), (3.5, 53, 0.75)),
+        ((44.704545, 3.5, 14.75), (3.5, 53, 0.75)), ((51.340909, 3.5, 14.75), (3.5, 53, 0.75)),
+        ((57.977273, 3.5, 14.75), (3.5, 53, 0.75)), ((64.613636, 3.5, 14.75), (3.5, 53, 0.75)),
+        ((0, 2, 0), (36, 1.5, 3.5)), ((56.5, 2, 0), (36, 1.5, 3.5)), ((0, 3.5, 0), (1.5, 60, 5.5)),
+        ((0, -14.5, 0), (1.5, 60, 5.5)), ((0, -31, 0), (1.5, 60, 5.5)), ((3.5, 1.25, 1.5), (33, 0.75, 3.5)),
+        ((17.6, 1.25, 1.5), (33, 0.75, 3.5)), ((31.7, 1.25, 1.5), (33, 0.75, 3.5)),
+        ((45.8, 1.25, 1.5), (33, 0.75, 3.5)), ((59.9, 1.25, 1.5), (33, 0.75, 3.5))
+    ],
+    ('bookshelf', 'assembled'): [
+        ((-11.25, 0, 0), (11.25, 72, 0.75)), ((24, 0, 0), (11.25, 72, 0.75)), ((0.75, 0, 0), (34.5, 11.25, 0.75)),
+        ((0.75, 0, 14.25), (34.5, 11.25, 0.75)), ((0.75, 0, 28.5), (34.5, 11.25, 0.75)),
+        ((0.75, 0, 42.75), (34.5, 11.25, 0.75)), ((0.75, 0, 57), (34.5, 11.25, 0.75)),
+        ((0.75, 0, 71.25), (34.5, 11.25, 0.75)), ((10.5, 11.25, 0), (72, 3.5, 0.75)),
+        ((22, 11.25, 0), (72, 3.5, 0.75)), ((0.75, 11.25, -31), (0.75, 3.5, 34.5)),
+        ((0.75, 11.25, 30.5), (0.75, 3.5, 34.5)), ((0, -0.75, 34.5), (0.75, 1.5, 36)),
+        ((0, -0.75, -36), (0.75, 1.5, 36))
+    ],
+    ('bookshelf', 'exploded'): [
+        ((-19.25, 0, 0), (11.25, 72, 0.75)), ((32, 0, 0), (11.25, 72, 0.75)), ((0.75, -4, 0), (34.5, 11.25, 0.75)),
+        ((0.75, 4, 16.25), (34.5, 11.25, 0.75)), ((0.75, -4, 32.5), (34.5, 11.25, 0.75)),
+        ((0.75, 4, 48.75), (34.5, 11.25, 0.75)), ((0.75, -4, 65), (34.5, 11.25, 0.75)),
+        ((0.75, 4, 81.25), (34.5, 11.25, 0.75)), ((10.5, 22.25, 0), (72, 3.5, 0.75)),
+        ((22, 17.25, 0), (72, 3.5, 0.75)), ((0.75, 12.25, -31), (0.75, 3.5, 34.5)),
+        ((0.75, 7.25, 30.5), (0.75, 3.5, 34.5)), ((0, -8.75, 42.5), (0.75, 1.5, 36)),
+        ((0, -8.75, -44), (0.75, 1.5, 36))
+    ],
+}
+
+CSG_TOKEN = re.compile(r'multmatrix\((\[\[.*?\]\])\)\s*\{|cube\(size = (\[.*?\]), center = (true|false)\);'
+                       r'|\w+\([^;{]*\)\s*\{|(\})')
+
+
+def sorted_boxes(boxes):
+    return sorted((tuple(round(v, 6) + 0.0 for v in origin), tuple(round(v, 6) + 0.0 for v in size))
+                  for origin, size in boxes)
+
+
+def csg_boxes(text):
+    """Axis-aligned boxes of the cubes in an openscad .csg export"""
+    stack, boxes = [np.eye(4)], []
+    for match in CSG_TOKEN.finditer(text):
+        matrix, size, center, close = match.groups()
+        if close:
+            stack.pop()
+        elif size:
+            extent = np.array(json.loads(size), dtype=float)
+            corners = np.array([[x, y, z, 1] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=float)
+            corners[:, :3] = corners[:, :3] * extent - (extent / 2 if center == 'true' else 0)
+            points = (corners @ stack[-1].T)[:, :3]
+            boxes.append((points.min(axis=0), points.max(axis=0) - points.min(axis=0)))
+        else:
+            stack.append(stack[-1] @ (np.array(json.loads(matrix)) if matrix else np.eye(4)))
+    return boxes
+
+
+def signed_volume(triangles):
+    return np.einsum('ij,ij->i', triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])).sum() / 6
+
+
+class TestModelMesh:
+    """Test cases for evaluate_model and native rendering."""
+
+    @pytest.mark.parametrize("furniture_type", FURNITURE_TYPES)
+    def test_templates_mesh_without_openscad(self, furniture_type, temp_output_dir):
+        template = get_template(furniture_type)
+        dimensions = tuple(template.defaults.values())
+        jobs = view_jobs(furniture_type, template.evaluate(*dimensions)[2], str(temp_output_dir), dimensions)
+        results = render_all(jobs, openscad=str(temp_output_dir / "no-such-openscad"))
+        assert [(result.status, result.backend) for result in results] == [("ok", "native")] * 2
+        for job in jobs:
+            data = job.output.read_bytes()
+            count = int(np.frombuffer(data[80:84], dtype='<u4')[0])
+            assert count == 12 * len(job.model) and len(data) == 84 + count * STL_RECORD.itemsize
+
+    @pytest.mark.parametrize("furniture_type", FURNITURE_TYPES)
+    @pytest.mark.parametrize("view", ["assembled", "exploded"])
+    def test_boxes_are_where_the_scad_draws_them(self, furniture_type, view):
+        template = get_template(furniture_type)
+        expected = SCAD_BOXES.get((furniture_type, view), SCAD_BOXES[furniture_type, "assembled"])
+        boxes = template.evaluate_model(*template.defaults.values(), view == "exploded")
+        assert sorted_boxes(boxes) == sorted_boxes(expected)
+
+    @pytest.mark.skipif(shutil.which("openscad") is None, reason="openscad is not installed")
+    @pytest.mark.parametrize("furniture_type", FURNITURE_TYPES)
+    @pytest.mark.parametrize("dimensions", [None, (60, 30, 50)])
+    def test_matches_openscad(self, furniture_type, dimensions, temp_output_dir):
+        template = get_template(furniture_type)
+        dimensions = dimensions or tuple(template.defaults.values())
+        parameters = template.evaluate(*dimensions)[2]
+        for job in view_jobs(furniture_type, parameters, str(temp_output_dir), dimensions):
+            csg = job.output.with_suffix(".csg")
+            subprocess.run(render_command(RenderJob(job.source, csg, job.defines)), check=True,
+                           capture_output=True, env=dict(os.environ, OPENSCADPATH=str(SRC_DIR)))
+            assert sorted_boxes(job.model) == sorted_boxes(csg_boxes(csg.read_text()))
+
+    def test_boxes_are_closed_and_face_outward(self):
+        boxes = get_template("bed_frame").evaluate_model(80, 60, 14, False)
+        triangles = box_triangles(boxes)
+        assert signed_volume(triangles) == pytest.approx(sum(np.prod(size) for _, size in boxes))
+        # Every directed edge of a box is matched by the same edge in the other direction
+        for box in np.round(triangles, 6).reshape(len(boxes), 12, 3, 3):
+            edges = {(tuple(start), tuple(end)) for a, b, c in box for start, end in ((a, b), (b, c), (c, a))}
+            assert len(edges) == 36 and all((end, start) in edges for start, end in edges)
+
+    def test_placements_follow_the_axes(self):
+        spec = dict(STOOL, parts=[{"lumber_type": "2x4", "length": "length", "quantity": "2", "purpose": "Rails",
+                                   "model": {"axes": "zxy", "at": ["i * 10", "0", "1"],
+                                             "exploded": ["0", "0", "height"]}}])
+        template = compile_template("rails", spec)
+        assert template.evaluate_model(16, 12, 9, False) == [((0, 0, 1), (3.5, 1.5, 16)),
+                                                               ((10, 0, 1), (3.5, 1.5, 16))]
+        assert template.evaluate_model(16, 12, 9, True)[1] == ((10, 0, 10), (3.5, 1.5, 16))
+
+    def test_placement_overrides_length_and_quantity(self):
+        spec = dict(STOOL, parts=[{"lumber_type": "2x4", "length": "length", "quantity": "4", "purpose": "Rails",
+                                   "model": {"length": "length - 1", "quantity": "1", "at": ["0", "0", "0"]}}])
+        assert compile_template("rails", spec).evaluate_model(16, 12, 9, False) == [((0, 0, 0), (15, 3.5, 1.5))]
+
+    def test_template_without_a_model_is_left_to_openscad(self, temp_output_dir):
+        template = compile_template("step_stool", STOOL)
+        assert template.evaluate_model is None
+        job = RenderJob(temp_output_dir / "model.scad", temp_output_dir / "model.stl", ())
+        [result] = render_all([job], openscad=str(temp_output_dir / "no-such-openscad"))
+        assert (result.status, result.backend) == ("missing", "openscad")
+
+    @pytest.mark.parametrize("model", [
+        {"axes": "xxz", "at": ["0", "0", "0"]},
+        {"at": ["0", "0"]},
+        {"at": ["0", "0", "depth"]},
+        {"at": ["0", "0", "0"], "exploded": ["j", "0", "0"]},
+        {"quantity": "__import__('os')", "at": ["0", "0", "0"]}
+    ])
+    def test_rejects_bad_placements(self, model):
+        spec = dict(STOOL, parts=[{"lumber_type": "2x4", "length": "length", "quantity": "1", "purpose": "x",
+                                   "model": model}])
+        with pytest.raises(ValueError):
+            compile_template("bad", spec)
@@ -0,0 +1,121 @@
+"""Unit tests for the offcut inventory and offcut-first optimization."""
+import pytest
+
+from generate_bom import BOMGenerator
+from local_search import LocalSearchImprover
+from offcut_inventory import OffcutInventory, load_min_waste_length
+from optimize_cuts import CutOptimizer, CutPiece, OffcutStock, Stock
+
+
+@pytest.fixture
+def inventory(temp_output_dir):
+    store = OffcutInventory(str(temp_output_dir / "offcuts.db"))
+    yield store
+    store.close()
+
+
+class TestOffcutInventory:
+    """Test cases for the SQLite store."""
+
+    def test_find_fit_returns_shortest_that_holds(self, inventory):
+        inventory.add_many([("2x4", 40, ""), ("2x4", 31, ""), ("2x4", 60, ""), ("1x4", 32, "")])
+        assert inventory.find_fit("2x4", 30.125).length == 31
+        assert inventory.find_fit("2x4", 61) is None
+        assert inventory.longest("2x4") == 60
+
+    def test_take_and_rollback(self, inventory):
+        offcut_id = inventory.add("2x4", 40)
+        inventory.commit()
+        inventory.take(offcut_id)
+        assert inventory.list() == []
+        inventory.rollback()
+        assert [o.id for o in inventory.list("2x4")] == [offcut_id]
+
+    def test_persists_across_connections(self, temp_output_dir):
+        path = str(temp_output_dir / "racks.db")
+        with OffcutInventory(path) as store:
+            store.add("2x6", 50, "bench")
+        with OffcutInventory(path) as store:
+            assert [(o.lumber_type, o.length, o.source) for o in store.list()] == [("2x6", 50, "bench")]
+
+
+class TestOffcutFirstOptimize:
+    """Test cases for CutOptimizer with an inventory."""
+
+    def test_fills_offcuts_before_new_stock(self, project_dir, inventory):
+        inventory.add_many([("2x4", 61, "old job"), ("2x4", 20, "old job")])
+        optimizer = CutOptimizer(inventory=inventory)
+        plan = optimizer.optimize([CutPiece(30, "2x4", 3, "Leg"), CutPiece(94, "2x4", 1, "Rail")])
+
+        offcut_boards = [s for s in plan["2x4"] if s.from_inventory]
+        assert [(s.length, s.cuts) for s in offcut_boards] == [(61, [(30, "Leg"), (30, "Leg")])]
+        bought = [s for s in plan["2x4"] if not s.from_inventory]
+        assert sorted(len(s.cuts) for s in bought) == [1, 1]
+
+        cut_list = optimizer.generate_cut_list(plan)
+        assert cut_list["2x4"]["stocks"][0]["offcut_id"] == offcut_boards[0].offcut_id
+        assert cut_list["2x4"]["total_cost"] == 2 * 8.50
+        shopping = BOMGenerator().generate_shopping_list(plan)
+        assert sum(item["quantity"] for item in shopping["items"]) == 2
+
+    def test_leftovers_go_back_on_the_racks(self, project_dir, inventory):
+        min_length = load_min_waste_length()
+        optimizer = CutOptimizer(inventory=inventory)
+        plan = optimizer.optimize([CutPiece(80, "2x4", 1, "Rail"), CutPiece(92, "2x4", 1, "Top")])
+        assert inventory.list("2x4") == []  # the plan may still change
+        optimizer.return_leftovers(plan)
+        # 96 - 80 - kerf is worth keeping, 96 - 92 - kerf is not
+        assert [o.length for o in inventory.list("2x4")] == [96 - 80 - 0.125]
+        assert 96 - 92 - 0.125 < min_length
+
+    def test_optimize_leaves_the_commit_to_the_caller(self, project_dir, inventory):
+        inventory.add("2x4", 61, "old job")
+        inventory.commit()
+        CutOptimizer(inventory=inventory).optimize([CutPiece(30, "2x4", 2, "Leg")])
+        assert inventory.list("2x4") == []
+        inventory.rollback()
+        assert [o.length for o in inventory.list("2x4")] == [61]
+
+    def test_failed_design_keeps_the_offcuts(self, project_dir, temp_output_dir, monkeypatch):
+        import main
+        path = str(temp_output_dir / "racks.db")
+        with OffcutInventory(path) as store:
+            store.add("4x4", 40, "old job")
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("disk full")
+        monkeypatch.setattr(main, "generate_shopping_list", fail)
+        with pytest.raises(RuntimeError):
+            main.run_design("workbench", offcuts_db=path, output_dir=str(temp_output_dir / "out"), models=False)
+        with OffcutInventory(path) as store:
+            assert [o.length for o in store.list("4x4")] == [40]
+
+        monkeypatch.undo()
+        main.run_design("workbench", offcuts_db=path, output_dir=str(temp_output_dir / "out"), models=False)
+        with OffcutInventory(path) as store:
+            assert all(o.source != "old job" for o in store.list("4x4"))
+
+    def test_improved_plan_decides_the_leftovers(self, project_dir, temp_output_dir):
+        import json
+        import main
+        path = str(temp_output_dir / "racks.db")
+        out = temp_output_dir / "out"
+        main.run_design("bed_frame", offcuts_db=path, improve_seconds=0.5, output_dir=str(out), models=False)
+        cut_list = json.loads((out / "cut_list.json").read_text())
+        min_length = load_min_waste_length()
+        leftovers = sorted(round(stock["waste"] - 0.125, 6) for lumber_type, entry in cut_list.items()
+                           if lumber_type != "summary" for stock in entry["stocks"]
+                           for _ in range(stock["quantity"]) if stock["waste"] - 0.125 >= min_length)
+        with OffcutInventory(path) as store:
+            assert sorted(round(o.length, 6) for o in store.list()) == leftovers
+
+    def test_min_waste_length_does_not_depend_on_cwd(self, temp_output_dir, monkeypatch):
+        monkeypatch.chdir(temp_output_dir)
+        assert load_min_waste_length() > 0
+
+    def test_local_search_keeps_offcut_boards(self):
+        offcut = OffcutStock(50, "2x4", [(30, "Leg")], 7)
+        plan = {"2x4": [offcut, Stock(96, "2x4", [(20, "Cleat")]), Stock(96, "2x4", [(20, "Cleat")])]}
+        improved = LocalSearchImprover(time_limit=1.0).run(plan)
+        assert improved["2x4"][0] is offcut
+        assert len(improved["2x4"]) == 2
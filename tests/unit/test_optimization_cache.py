@@ -0,0 +1,83 @@
+"""Unit tests for the optimization result cache."""
+import json
+import os
+
+import pytest
+
+import price_catalog
+from column_generation import ColumnGenerationOptimizer
+from optimization_cache import OptimizationCache
+from optimize_cuts import CutOptimizer, CutPiece
+
+
+def workbench_pieces():
+    return [
+        CutPiece(34, "4x4", 4, "Legs"),
+        CutPiece(72, "2x6", 5, "Top"),
+        CutPiece(64, "2x4", 4, "Long stretchers"),
+        CutPiece(16, "2x4", 4, "Short stretchers"),
+    ]
+
+
+class TestOptimizationCache:
+    """Test cases for OptimizationCache."""
+
+    def test_memory_hit_skips_packing(self, monkeypatch):
+        cache = OptimizationCache()
+        optimizer = CutOptimizer(cache=cache)
+        first = optimizer.optimize(workbench_pieces())
+
+        def fail(*args):
+            raise AssertionError("packing should be skipped on a hit")
+
+        monkeypatch.setattr(optimizer, "_optimize_type", fail)
+        second = optimizer.optimize(list(reversed(workbench_pieces())))
+        assert second == first
+        assert second["2x4"][0] is not first["2x4"][0]
+        assert cache.stats()["memory_hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_key_depends_on_solver(self):
+        cache = OptimizationCache()
+        CutOptimizer(cache=cache).optimize(workbench_pieces())
+        CutOptimizer(strategy="patterns", cache=cache).optimize(workbench_pieces())
+        CutOptimizer(kerf=0.25, cache=cache).optimize(workbench_pieces())
+        assert cache.stats()["misses"] == 3
+
+    @pytest.mark.parametrize("make", [lambda cache: CutOptimizer(strategy="auto", cache=cache),
+                                      lambda cache: ColumnGenerationOptimizer(cache=cache)])
+    def test_price_edit_misses_cost_driven_plans(self, make, temp_output_dir, monkeypatch):
+        path = temp_output_dir / "prices.json"
+
+        def write_prices(eight_foot):
+            path.write_text(json.dumps({"lumber_prices": {"2x4": {"8": eight_foot, "10": 6.0}}}))
+            os.utime(path, ns=(0, int(eight_foot * 1e9)))
+
+        write_prices(3.0)
+        monkeypatch.setitem(price_catalog._catalogs, price_catalog.DEFAULT_PATH.resolve(),
+                            price_catalog.PriceCatalog(path))
+        cache = OptimizationCache()
+        pieces = [CutPiece(50, "2x4", 2, "Rails")]
+        assert [stock.length for stock in make(cache).optimize(pieces)["2x4"]] == [96]
+        make(cache).optimize(pieces)
+        assert cache.stats()["memory_hits"] == 1
+        write_prices(30.0)
+        assert [stock.length for stock in make(cache).optimize(pieces)["2x4"]] == [120]
+        assert cache.stats()["misses"] == 2
+
+    def test_disk_tier_survives_restart(self, temp_output_dir):
+        CutOptimizer(strategy="patterns", cache=OptimizationCache(cache_dir=temp_output_dir)).optimize(
+            [CutPiece(22.5, "1x4", 200, "Slats")]
+        )
+        cache = OptimizationCache(cache_dir=temp_output_dir)
+        plan = CutOptimizer(strategy="patterns", cache=cache).optimize([CutPiece(22.5, "1x4", 200, "Slats")])
+        assert plan["1x4"][0].count == 50
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_lru_and_disk_eviction(self, temp_output_dir):
+        cache = OptimizationCache(max_entries=2, cache_dir=temp_output_dir, max_disk_bytes=400)
+        optimizer = CutOptimizer(cache=cache)
+        for length in range(10, 20):
+            optimizer.optimize([CutPiece(float(length), "2x4", 3, "Blocks")])
+        assert cache.stats()["memory_entries"] == 2
+        assert sum(p.stat().st_size for p in temp_output_dir.glob("*.json")) <= 400
@@ -0,0 +1,229 @@
+"""Unit tests for the indexed bin packing engines."""
+import itertools
+import random
+
+import pytest
+
+from optimize_cuts import CutOptimizer, CutPiece, Stock
+from packing import (BestFitIndex, FirstFitIndex, OnlinePacker, pack_decreasing, pack_patterns,
+                     pack_subset_sum)
+
+
+def reference_ffd(pieces, standard_lengths, kerf):
+    """The original linear-scan FFD, kept as an oracle."""
+    items = sorted(
+        ((p.length, p.label) for p in pieces for _ in range(p.quantity)),
+        key=lambda x: x[0], reverse=True,
+    )
+    stocks = []
+    for length, label in items:
+        for stock in stocks:
+            if stock.waste >= length + kerf:
+                stock.cuts.append((length, label))
+                break
+        else:
+            for std_length in standard_lengths:
+                if std_length >= length + kerf:
+                    stocks.append(Stock(std_length, "2x4", [(length, label)]))
+                    break
+    return [(s.length, s.cuts) for s in stocks]
+
+
+class TestFirstFitIndex:
+    """Test cases for the segment tree index."""
+
+    def test_finds_leftmost_fit(self):
+        index = FirstFitIndex(2)
+        for capacity in [10, 50, 30, 50]:
+            index.append(capacity)
+        assert index.find(40) == 1
+        assert index.find(5) == 0
+        assert index.find(60) == -1
+
+    def test_update_and_growth(self):
+        index = FirstFitIndex(1)
+        for capacity in range(20):
+            index.append(capacity)
+        index.update(3, 100)
+        assert index.find(50) == 3
+
+
+class TestBestFitIndex:
+    """Test cases for the sorted capacity index."""
+
+    def test_finds_tightest_fit(self):
+        index = BestFitIndex()
+        for capacity in [50, 12, 30, 12]:
+            index.append(capacity)
+        assert index.find(11) == 1
+        assert index.find(13) == 2
+        index.discard(2)
+        assert index.find(13) == 0
+
+
+class TestPackDecreasing:
+    """Test cases for first-fit and best-fit decreasing."""
+
+    def test_ffd_matches_reference(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            pieces = [
+                CutPiece(rng.choice([11.25, 22.5, 30.0, 47.875, 60.0, 94.0]), "2x4",
+                         rng.randint(1, 6), f"part{i}")
+                for i in range(rng.randint(1, 8))
+            ]
+            optimizer = CutOptimizer(kerf=0.125)
+            got = [(s.length, s.cuts) for s in optimizer.optimize(pieces)["2x4"]]
+            assert got == reference_ffd(pieces, optimizer.standard_lengths, 0.125)
+
+    def test_bfd_is_valid_packing(self):
+        items = [(length, "p") for length in [70, 50, 40, 30, 25, 20, 20, 10]]
+        bins = pack_decreasing(items, [96, 120, 144, 192], 0.125, best_fit=True)
+        packed = sorted(length for _, cuts in bins for length, _ in cuts)
+        assert packed == sorted(length for length, _ in items)
+        for stock_length, cuts in bins:
+            assert sum(length for length, _ in cuts) + 0.125 <= stock_length
+
+    def test_oversized_piece_is_skipped(self):
+        assert pack_decreasing([(200.0, "long")], [96, 192], 0.125) == []
+
+    def test_unknown_strategy_rejected(self):
+        with pytest.raises(ValueError, match="Unknown strategy"):
+            CutOptimizer(strategy="random")
+
+
+class TestPackPatterns:
+    """Test cases for the quantity-aware pattern solver."""
+
+    def test_identical_slats_collapse_to_one_pattern(self):
+        patterns = pack_patterns([(22.5, "Slat", 148)], [96, 120, 144, 192], 0.125)
+        assert patterns == [(96, [(22.5, "Slat")] * 4, 37)]
+
+    def test_expansion_matches_ffd(self):
+        rng = random.Random(11)
+        for _ in range(50):
+            pieces = [
+                CutPiece(rng.choice([7.25, 22.5, 30.0, 47.875, 60.0, 94.0]), "2x4",
+                         rng.randint(1, 40), f"part{i}")
+                for i in range(rng.randint(1, 6))
+            ]
+            ffd = CutOptimizer(kerf=0.125).optimize(pieces)["2x4"]
+            patterns = CutOptimizer(kerf=0.125, strategy="patterns").optimize(pieces)["2x4"]
+            expanded = [stock for pattern in patterns for stock in pattern.to_stocks()]
+            assert [(s.length, s.cuts) for s in expanded] == [(s.length, s.cuts) for s in ffd]
+
+    def test_cut_list_counts_repeats(self, project_dir):
+        optimizer = CutOptimizer(strategy="patterns")
+        optimized = optimizer.optimize([CutPiece(22.5, "1x4", 2000, "Slat")])
+        cut_list = optimizer.generate_cut_list(optimized)
+        assert cut_list["1x4"]["total_stocks"] == 500
+        assert cut_list["1x4"]["stocks"][0]["quantity"] == 500
+        assert cut_list["1x4"]["total_cost"] == 500 * 6.00
+        assert optimized["1x4"][0].describe() == '500 x 96" stock: [22.5, 22.5, 22.5, 22.5]'
+
+
+class TestPackSubsetSum:
+    """Test cases for the minimum-slack bitset subset-sum packer."""
+
+    def test_fills_boards_ffd_leaves_short(self):
+        demands = [(47.0, "a", 1), (29.0, "b", 1), (33.0, "c", 1),
+                   (26.0, "d", 1), (22.0, "e", 1), (31.0, "f", 1)]
+        assert len(pack_patterns(demands, [96], 0)) == 3
+        assert pack_subset_sum(demands, [96], 0) == [
+            (96, [(47.0, "a"), (26.0, "d"), (22.0, "e")], 1),
+            (96, [(33.0, "c"), (31.0, "f"), (29.0, "b")], 1),
+        ]
+
+    def test_plans_are_feasible_and_complete(self):
+        rng = random.Random(5)
+        for _ in range(100):
+            demands = [(rng.choice([7.25, 13.0, 22.5, 35.5, 47.875, 71.25, 94.0]), f"part{i}",
+                        rng.randint(1, 20)) for i in range(rng.randint(1, 6))]
+            patterns = pack_subset_sum(demands, [96, 120, 144, 192], 0.125)
+            cut = {}
+            for stock_length, cuts, count in patterns:
+                assert sum(length for length, _ in cuts) + 0.125 <= stock_length
+                for piece in cuts:
+                    cut[piece] = cut.get(piece, 0) + count
+            wanted = {}
+            for length, label, quantity in demands:
+                wanted[(length, label)] = wanted.get((length, label), 0) + quantity
+            assert cut == wanted
+
+    def test_identical_slats_repeat(self):
+        optimized = CutOptimizer(strategy="subset_sum").optimize([CutPiece(22.5, "1x4", 148, "Slat")])
+        assert [(p.length, p.count, len(p.cuts)) for p in optimized["1x4"]] == [(96, 37, 4)]
+
+
+class TestOnlinePacker:
+    """Test cases for the bounded-memory online packers."""
+
+    @pytest.mark.parametrize("policy", ["next_k_fit", "harmonic"])
+    def test_keeps_at_most_max_open(self, policy):
+        rng = random.Random(3)
+        packer = OnlinePacker([96, 120, 144, 192], 0.125, max_open=3, policy=policy)
+        placed, closed = [], []
+        for i in range(2000):
+            piece = (rng.uniform(5, 150), f"p{i}")
+            placed.append(piece)
+            closed += packer.add(*piece)
+            assert len(packer._open) + len(packer._classes) <= 3
+        closed += packer.flush()
+        assert sorted(c for _, cuts in closed for c in cuts) == sorted(placed)
+        for stock_length, cuts in closed:
+            used = sum(length for length, _ in cuts)
+            assert used + 0.125 <= stock_length
+            # Downsized to the shortest standard length that still holds the cuts
+            assert stock_length == min(s for s in [96, 120, 144, 192] if s >= used + 0.125)
+
+    def test_next_k_fit_closes_oldest(self):
+        packer = OnlinePacker([96], 0, max_open=2)
+        assert packer.add(60, "a") == []
+        assert packer.add(60, "b") == []
+        assert packer.add(30, "c") == []  # fits the first stock
+        assert packer.add(60, "d") == [(96, [(60, "a"), (30, "c")])]
+
+    def test_harmonic_closes_full_classes(self):
+        packer = OnlinePacker([96], 0, max_open=4, policy="harmonic")
+        assert packer.add(60, "a") == [(96, [(60, "a")])]
+        assert packer.add(40, "b") == []
+        assert packer.add(40, "c") == [(96, [(40, "b"), (40, "c")])]
+
+    def test_rejects_unknown_policy(self):
+        with pytest.raises(ValueError):
+            OnlinePacker([96], 0, policy="worst_fit")
+
+
+class TestOptimizeStream:
+    """Test cases for CutOptimizer.optimize_stream."""
+
+    def test_yields_before_the_stream_ends(self):
+        endless = (CutPiece(47.875, "2x4", 1, f"Rail {i}") for i in itertools.count())
+        first = list(itertools.islice(CutOptimizer().optimize_stream(endless, max_open=1), 5))
+        assert [(stock.length, len(stock.cuts)) for stock in first] == [(192, 4)] * 5
+
+    def test_covers_every_piece_and_reports_throughput(self):
+        optimizer = CutOptimizer()
+        pieces = [CutPiece(30, "2x4", 10, "Leg"), CutPiece(22.5, "1x4", 7, "Slat"),
+                  CutPiece(300, "2x4", 1, "Too long")]
+        stocks = list(optimizer.optimize_stream(iter(pieces)))
+        assert sum(len(s.cuts) for s in stocks if s.lumber_type == "2x4") == 10
+        assert sum(len(s.cuts) for s in stocks if s.lumber_type == "1x4") == 7
+        stats = optimizer.stream_stats
+        assert (stats.pieces, stats.stocks, stats.skipped) == (17, len(stocks), 1)
+        assert stats.finished is not None and stats.pieces_per_second > 0
+
+
+class TestParallelOptimize:
+    """Test cases for per-lumber-type process pool optimization."""
+
+    def test_parallel_matches_serial(self):
+        rng = random.Random(5)
+        pieces = [
+            CutPiece(rng.choice([11.25, 22.5, 47.875, 60.0]), lumber_type, rng.randint(1, 20), f"part{i}")
+            for i, lumber_type in enumerate(["2x4", "2x6", "4x4", "1x4", "2x4", "1x12"] * 3)
+        ]
+        serial = CutOptimizer(strategy="bfd").optimize(pieces)
+        parallel = CutOptimizer(strategy="bfd", workers=3).optimize(pieces)
+        assert list(parallel) == list(serial)
+        assert parallel == serial
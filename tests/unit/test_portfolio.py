@@ -0,0 +1,81 @@
+"""Unit tests for the automatic solver portfolio."""
+from collections import Counter
+
+from optimization_cache import OptimizationCache
+from optimize_cuts import CutOptimizer, CutPiece, InstanceFeatures
+
+
+def cut_counts(stocks):
+    counts = Counter()
+    for stock in stocks:
+        for cut in stock.cuts:
+            counts[cut] += stock.count
+    return counts
+
+
+class TestChooseEngine:
+    """Test cases for routing instances by size and shape."""
+
+    def test_small_instances_get_the_exact_solver(self):
+        features = InstanceFeatures(pieces=40, distinct_lengths=5, length_ratio=0.3)
+        assert CutOptimizer(strategy="auto").choose_engine(features) == "column_generation"
+
+    def test_large_instances_get_heuristics(self):
+        optimizer = CutOptimizer(strategy="auto")
+        assert optimizer.choose_engine(InstanceFeatures(50000, 30, 0.2)) == "subset_sum"
+        assert optimizer.choose_engine(InstanceFeatures(50000, 5000, 0.2)) == "patterns"
+
+    def test_many_pieces_per_board_skips_the_exact_solver(self):
+        features = InstanceFeatures(pieces=200, distinct_lengths=3, length_ratio=0.02)
+        assert CutOptimizer(strategy="auto").choose_engine(features) == "subset_sum"
+
+
+class TestAutoOptimize:
+    """Test cases for the portfolio run over several lumber types."""
+
+    def test_records_engine_per_type(self, project_dir):
+        pieces = [
+            CutPiece(94, "4x4", 3, "Post"),
+            CutPiece(47.875, "2x4", 7, "Rail"),
+            CutPiece(30, "2x4", 5, "Stretcher"),
+        ]
+        optimizer = CutOptimizer(strategy="auto", time_limit=2.0)
+        optimized = optimizer.optimize(pieces)
+        # Three posts on three 96" boards already meet the lower bound
+        assert optimizer.engine_log == {"4x4": "patterns", "2x4": "column_generation"}
+        assert cut_counts(optimized["2x4"]) == {(47.875, "Rail"): 7, (30, "Stretcher"): 5}
+        cut_list = optimizer.generate_cut_list(optimized)
+        assert cut_list["2x4"]["engine"] == "column_generation"
+
+    def test_no_time_left_falls_back_to_patterns(self):
+        optimizer = CutOptimizer(strategy="auto", time_limit=0.0)
+        optimized = optimizer.optimize([CutPiece(47.875, "2x4", 7, "Rail"), CutPiece(30, "2x4", 5, "Stretcher")])
+        assert optimizer.engine_log == {"2x4": "patterns"}
+        assert cut_counts(optimized["2x4"]) == {(47.875, "Rail"): 7, (30, "Stretcher"): 5}
+
+    def test_never_worse_than_ffd(self, project_dir):
+        pieces = [CutPiece(22.5, "1x4", 148, "Slat"), CutPiece(71.25, "2x6", 4, "Rail")]
+        ffd = CutOptimizer()
+        auto = CutOptimizer(strategy="auto", time_limit=1.0)
+        ffd_cost = ffd.generate_cut_list(ffd.optimize(pieces))["summary"]["total_cost"]
+        auto_cost = auto.generate_cut_list(auto.optimize(pieces))["summary"]["total_cost"]
+        assert auto_cost <= ffd_cost
+
+    def test_worse_exact_plan_is_not_kept(self, project_dir, monkeypatch):
+        import column_generation
+        # A plan with one 16' board per piece, which costs far more than the pattern plan
+        monkeypatch.setattr(column_generation, "solve_cutting_stock", lambda demands, costs, kerf, deadline: [
+            (max(costs), [(length, label)], quantity) for length, label, quantity in demands
+        ])
+        optimizer = CutOptimizer(strategy="auto", time_limit=2.0)
+        optimized = optimizer.optimize([CutPiece(47.875, "2x4", 7, "Rail"), CutPiece(30, "2x4", 5, "Stretcher")])
+        assert optimizer.engine_log == {"2x4": "patterns"}
+        assert sum(stock.count for stock in optimized["2x4"]) < 12
+
+    def test_cache_hits_are_logged(self):
+        cache = OptimizationCache()
+        pieces = [CutPiece(94, "4x4", 3, "Post")]
+        CutOptimizer(strategy="auto", cache=cache).optimize(pieces)
+        optimizer = CutOptimizer(strategy="auto", cache=cache)
+        optimizer.optimize(pieces)
+        assert optimizer.engine_log == {"4x4": "cache"}
@@ -0,0 +1,68 @@
+"""Unit tests for the shared price catalog."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from price_catalog import DEFAULT_PATH, PriceCatalog, get_catalog
+from units import to_inches
+
+
+@pytest.fixture
+def price_file(temp_output_dir):
+    """A small price file that tests may rewrite"""
+    path = temp_output_dir / "prices.json"
+    path.write_text(json.dumps({
+        "lumber_prices": {"2x4": {"8": 8.5, "10": 10.75}, "1x2": {"8": 3.5, "2400mm": 3.45}},
+        "sheet_prices": {"3/4 plywood": {"4x8": 58.0}},
+        "stock_catalogs": {"imperial": {"unit": "ft", "lengths": [8, 10]}}
+    }))
+    return path
+
+
+class TestPriceCatalog:
+    """Test cases for PriceCatalog."""
+
+    def test_gather_matches_the_price_file(self):
+        with open(DEFAULT_PATH) as f:
+            lumber = json.load(f)["lumber_prices"]
+        types = [t for t in lumber for _ in (8, 10, 12, 16)]
+        lengths = [feet * 12 for _ in lumber for feet in (8, 10, 12, 16)]
+        expected = [lumber[t][str(length // 12)] for t, length in zip(types, lengths)]
+        assert get_catalog().costs(types, lengths).tolist() == expected
+
+    def test_unpriced_boards_are_nan(self, price_file):
+        costs = PriceCatalog(price_file).costs(["2x4", "2x4", "4x4", "1x2"], [96, 144, 96, to_inches(2400, "mm")])
+        assert costs[0] == 8.5
+        assert np.isnan(costs[1]) and np.isnan(costs[2])
+        assert costs[3] == 3.45
+
+    def test_price_raises_for_unpriced_board(self, price_file):
+        with pytest.raises(KeyError, match="2x4 x 12'"):
+            PriceCatalog(price_file).price("2x4", 144)
+
+    def test_loads_once(self, price_file):
+        catalog = PriceCatalog(price_file)
+        for _ in range(100):
+            catalog.price("2x4", 96)
+            catalog.sheet_price("3/4 plywood", "4x8")
+        assert catalog.loads == 1
+
+    def test_reloads_when_file_changes(self, price_file):
+        catalog = PriceCatalog(price_file)
+        assert catalog.price("2x4", 96) == 8.5
+        data = json.loads(price_file.read_text())
+        data["lumber_prices"]["2x4"]["8"] = 9.25
+        price_file.write_text(json.dumps(data))
+        stat = os.stat(price_file)
+        os.utime(price_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert catalog.price("2x4", 96) == 9.25
+        assert catalog.loads == 2
+
+    def test_independent_of_working_directory(self, temp_output_dir, monkeypatch):
+        monkeypatch.chdir(temp_output_dir)
+        assert get_catalog().price("2x4", 96) > 0
+
+    def test_stock_lengths(self, price_file):
+        assert PriceCatalog(price_file).stock_lengths("imperial") == [96, 120]
@@ -0,0 +1,82 @@
+"""Unit tests for re-costing stored plans."""
+import json
+
+import pytest
+
+from furniture_templates import get_template
+from generate_bom import build_bom, generate_shopping_list
+from optimize_cuts import CutOptimizer
+from price_catalog import DEFAULT_PATH, PriceCatalog
+from recost import Recoster, find_plans, load_plan
+from sheet_nesting import SheetNester
+
+
+def store_plan(directory, furniture_type, extra_length=0):
+    """Write the JSON files main.py would for one project"""
+    defaults = get_template(furniture_type).defaults
+    bom = build_bom(furniture_type, defaults['length'] + extra_length, defaults['width'], defaults['height'])
+    optimizer = CutOptimizer()
+    optimized = optimizer.optimize(bom.cut_pieces())
+    nester = SheetNester()
+    nested = nester.nest(bom.panel_pieces())
+    directory.mkdir(parents=True)
+    files = {
+        'cut_list.json': optimizer.generate_cut_list(optimized),
+        'sheet_layout.json': nester.generate_cut_list(nested) if nested else None,
+        'shopping_list.json': generate_shopping_list(optimized, nested)
+    }
+    for name, data in files.items():
+        if data is not None:
+            (directory / name).write_text(json.dumps(data, indent=2))
+    return directory
+
+
+@pytest.fixture
+def projects(project_dir, temp_output_dir):
+    for i, furniture_type in enumerate(["workbench", "storage_bench", "bed_frame", "bookshelf"] * 3):
+        store_plan(temp_output_dir / f"project{i:02d}", furniture_type, extra_length=i)
+    return temp_output_dir
+
+
+def price_file(directory, scale=1.0, drop=None):
+    """A copy of the shipped prices, scaled and optionally without one lumber type"""
+    data = json.loads(DEFAULT_PATH.read_text())
+    data['lumber_prices'] = {t: {k: v * scale for k, v in by_length.items()}
+                             for t, by_length in data['lumber_prices'].items() if t != drop}
+    data['sheet_prices'] = {m: {k: v * scale for k, v in by_size.items()}
+                            for m, by_size in data['sheet_prices'].items()}
+    path = directory / f"prices_{scale}_{drop}.json"
+    path.write_text(json.dumps(data))
+    return PriceCatalog(path)
+
+
+class TestRecoster:
+    """Test cases for Recoster."""
+
+    def test_unchanged_prices_reproduce_the_stored_files(self, projects):
+        directories = find_plans([str(projects)])
+        before = {d: {f: (d / f).read_text() for f in ('cut_list.json', 'shopping_list.json')} for d in directories}
+        plans = [load_plan(d) for d in directories]
+        Recoster(PriceCatalog(DEFAULT_PATH)).recost(plans)
+        for plan in plans:
+            assert json.dumps(plan.cut_list, indent=2) == before[plan.directory]['cut_list.json']
+            assert json.dumps(plan.shopping_list, indent=2) == before[plan.directory]['shopping_list.json']
+
+    def test_new_prices(self, projects):
+        plans = [load_plan(d) for d in find_plans([str(projects)])]
+        old = [(plan.cut_list['summary']['total_cost'], plan.shopping_list['total_cost']) for plan in plans]
+        results = Recoster(price_file(projects, scale=2.0)).recost(plans)
+        assert len(results) == 12
+        for result, (lumber, total) in zip(results, old):
+            assert result.plan.cut_list['summary']['total_cost'] == pytest.approx(2 * lumber)
+            assert result.plan.shopping_list['total_cost'] == pytest.approx(2 * total)
+            supplies = sum(item['est_cost'] for item in result.plan.shopping_list['other_supplies'])
+            assert result.new_total == pytest.approx(2 * total + supplies)
+
+    def test_unpriced_boards_are_reported(self, projects):
+        plans = [load_plan(d) for d in find_plans([str(projects)])]
+        results = Recoster(price_file(projects, drop='4x4')).recost(plans)
+        workbench = next(r for r in results if '4x4' in r.plan.cut_list)
+        assert workbench.new_total is None
+        assert workbench.missing == ["4x4 x 8'"]
+        assert all(r.new_total is not None for r in results if '4x4' not in r.plan.cut_list)
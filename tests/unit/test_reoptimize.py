@@ -0,0 +1,103 @@
+"""Unit tests for warm-start re-optimization of existing cut plans."""
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from optimize_cuts import CutOptimizer, CutPattern, CutPiece, Stock, load_cut_list, plan_delta
+
+
+def cut_counts(plan):
+    counts = Counter()
+    for lumber_type, stocks in plan.items():
+        for stock in stocks:
+            for length, label in stock.cuts:
+                counts[(lumber_type, length, label)] += stock.count
+    return counts
+
+
+def assert_feasible(plan, kerf=0.125):
+    for stocks in plan.values():
+        for stock in stocks:
+            assert sum(length for length, _ in stock.cuts) + kerf <= stock.length
+
+
+class TestReoptimize:
+    """Test cases for CutOptimizer.reoptimize."""
+
+    def test_small_change_leaves_other_stocks_untouched(self):
+        rng = random.Random(2)
+        pieces = [CutPiece(round(rng.uniform(6, 90), 2), "2x4", rng.randint(1, 10), f"p{i}")
+                  for i in range(200)]
+        optimizer = CutOptimizer()
+        plan = optimizer.optimize(pieces)
+        added = [CutPiece(30, "2x4", 2, "Shelf")]
+        removed = [CutPiece(pieces[0].length, "2x4", 1, pieces[0].label)]
+        repaired = optimizer.reoptimize(plan, added, removed)
+
+        untouched = sum(any(old is new for new in repaired["2x4"]) for old in plan["2x4"])
+        assert untouched >= len(plan["2x4"]) - 3
+        expected = cut_counts(plan)
+        expected[("2x4", 30, "Shelf")] += 2
+        expected[("2x4", pieces[0].length, pieces[0].label)] -= 1
+        assert cut_counts(repaired) == +expected
+        assert_feasible(repaired)
+        assert optimizer.engine_log == {"2x4": "repair"}
+
+    def test_removal_shrinks_or_drops_stock(self):
+        plan = {"2x4": [Stock(192, "2x4", [(100, "Rail"), (60, "Leg")]), Stock(96, "2x4", [(40, "Brace")])]}
+        repaired = CutOptimizer().reoptimize(plan, [], [CutPiece(60, "2x4", 1, "Leg"),
+                                                        CutPiece(40, "2x4", 1, "Brace")])
+        assert repaired == {"2x4": [Stock(120, "2x4", [(100, "Rail")])]}
+
+    def test_pattern_splits_off_changed_board(self):
+        plan = {"1x4": [CutPattern(96, "1x4", [(22.5, "Slat")] * 4, 10)]}
+        repaired = CutOptimizer().reoptimize(plan, [CutPiece(5, "1x4", 1, "Cleat")], [])
+        assert repaired["1x4"] == [
+            CutPattern(96, "1x4", [(22.5, "Slat")] * 4, 9),
+            Stock(96, "1x4", [(22.5, "Slat")] * 4 + [(5, "Cleat")]),
+        ]
+
+    def test_new_lumber_type_gets_new_stock(self):
+        repaired = CutOptimizer().reoptimize({}, [CutPiece(60, "4x4", 2, "Post")], [])
+        assert repaired == {"4x4": [Stock(96, "4x4", [(60, "Post")]), Stock(96, "4x4", [(60, "Post")])]}
+
+    def test_zero_quantity_additions_change_nothing(self):
+        plan = {"2x4": [Stock(96, "2x4", [(47.875, "Rail")])]}
+        repaired = CutOptimizer().reoptimize(plan, [CutPiece(20, "2x4", 0, "z"), CutPiece(20, "4x4", 0, "z")], [])
+        assert cut_counts(repaired) == cut_counts(plan)
+
+    def test_removing_missing_piece_raises(self):
+        with pytest.raises(ValueError):
+            CutOptimizer().reoptimize({}, [], [CutPiece(60, "4x4", 1, "Post")])
+
+
+class TestLoadCutList:
+    """Test cases for reading cut_list.json back into a plan."""
+
+    def test_round_trip_and_delta(self, project_dir, temp_output_dir):
+        optimizer = CutOptimizer(strategy="patterns")
+        pieces = [CutPiece(22.5, "1x4", 12, "Slat"), CutPiece(60, "2x4", 1, "Leg")]
+        plan = optimizer.optimize(pieces)
+        path = temp_output_dir / "cut_list.json"
+        path.write_text(json.dumps(optimizer.generate_cut_list(plan)))
+
+        loaded = load_cut_list(str(path))
+        assert cut_counts(loaded) == cut_counts(plan)
+        assert [(s.length, s.count) for s in loaded["1x4"]] == [(s.length, s.count) for s in plan["1x4"]]
+        added, removed = plan_delta(loaded, [CutPiece(22.5, "1x4", 14, "Slat")])
+        assert added == [CutPiece(22.5, "1x4", 2, "Slat")]
+        assert removed == [CutPiece(60, "2x4", 1, "Leg")]
+
+    @pytest.mark.parametrize("strategy", ["ffd", "patterns"])
+    def test_unchanged_order_needs_no_repair(self, strategy, project_dir, temp_output_dir):
+        optimizer = CutOptimizer(strategy=strategy)
+        pieces = [CutPiece(12.1, "1x4", 4, "Slat"), CutPiece(29.3, "2x4", 2, "Rail")]
+        plan = optimizer.optimize(pieces)
+        assert sorted(cut_counts(plan)) == [("1x4", 12.1, "Slat"), ("2x4", 29.3, "Rail")]
+        path = temp_output_dir / "cut_list.json"
+        path.write_text(json.dumps(optimizer.generate_cut_list(plan)))
+        assert plan_delta(load_cut_list(str(path)), pieces) == ([], [])
+        snapped = {"1x4": [Stock(96, "1x4", [(12.100000000000001, "Slat")] * 4)]}
+        assert plan_delta(snapped, [CutPiece(12.1, "1x4", 4, "Slat")]) == ([], [])
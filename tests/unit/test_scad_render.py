@@ -0,0 +1,76 @@
+"""Unit tests for pooled OpenSCAD rendering."""
+import sys
+import time
+
+import pytest
+
+from scad_render import RenderJob, render_all, render_command, view_jobs
+
+# Stand-in for openscad: logs its arguments, sleeps, then writes the -o file
+FAKE_OPENSCAD = """#!{python}
+import json, sys, time
+args = sys.argv[1:]
+with open({log!r}, 'a') as f:
+    f.write(json.dumps(args) + '\\n')
+defines = dict(args[i + 1].split('=', 1) for i, arg in enumerate(args) if arg == '-D')
+time.sleep(float(defines.get('sleep', '{sleep}')))
+if 'fail' in defines:
+    sys.exit('ERROR: Parser error')
+open(args[args.index('-o') + 1], 'w').write('solid fake')
+"""
+
+
+@pytest.fixture
+def openscad(temp_output_dir):
+    """Path of the fake openscad and of its argument log"""
+    log = temp_output_dir / "calls.jsonl"
+    script = temp_output_dir / "openscad"
+    script.write_text(FAKE_OPENSCAD.format(python=sys.executable, log=str(log), sleep=0.3))
+    script.chmod(0o755)
+    return str(script), log
+
+
+class TestScadRender:
+    """Test cases for render_all and view_jobs."""
+
+    def test_views_use_defines_not_temp_files(self, temp_output_dir):
+        jobs = view_jobs("workbench", {"bench_length": 60, "finish": "oak"}, str(temp_output_dir))
+        assert [job.output.name for job in jobs] == ["workbench.stl", "workbench_exploded.stl"]
+        command = render_command(jobs[1])
+        assert command[-1].endswith("templates/workbench.scad")
+        assert ["-D", "bench_length=60"] == command[3:5]
+        assert ["-D", 'finish="oak"'] == command[5:7]
+        assert ["-D", 'view_mode="exploded"'] == command[7:9]
+
+    def test_views_render_concurrently(self, openscad, temp_output_dir):
+        fake, log = openscad
+        jobs = view_jobs("workbench", {"bench_length": 60}, str(temp_output_dir))
+        started = time.perf_counter()
+        results = render_all(jobs, workers=2, openscad=fake, native=False)
+        assert time.perf_counter() - started < 0.55
+        assert [result.status for result in results] == ["ok", "ok"]
+        assert all(job.output.exists() for job in jobs)
+        assert len(log.read_text().splitlines()) == 2
+        assert list(temp_output_dir.glob("*.scad")) == []
+
+    def test_pool_is_bounded(self, openscad, temp_output_dir):
+        fake, _ = openscad
+        jobs = [RenderJob(temp_output_dir / "x.scad", temp_output_dir / f"{i}.stl", (("sleep", 0.2),))
+                for i in range(4)]
+        started = time.perf_counter()
+        results = render_all(jobs, workers=2, openscad=fake)
+        assert time.perf_counter() - started >= 0.4
+        assert [result.job for result in results] == jobs
+
+    def test_failures_and_timeouts(self, openscad, temp_output_dir):
+        fake, _ = openscad
+        jobs = [RenderJob(temp_output_dir / "x.scad", temp_output_dir / "a.stl", (("fail", 1), ("sleep", 0))),
+                RenderJob(temp_output_dir / "x.scad", temp_output_dir / "b.stl", (("sleep", 5),))]
+        failed, slow = render_all(jobs, timeout=1, openscad=fake)
+        assert failed.status == "failed" and "Parser error" in failed.error
+        assert slow.status == "timeout"
+
+    def test_missing_openscad(self, temp_output_dir):
+        job = RenderJob(temp_output_dir / "x.scad", temp_output_dir / "x.stl", ())
+        [result] = render_all([job], openscad=str(temp_output_dir / "no-such-openscad"))
+        assert result.status == "missing"
@@ -0,0 +1,90 @@
+"""Unit tests for the sheet goods nesting engine."""
+import random
+
+import pytest
+
+from generate_bom import BOMGenerator
+from sheet_nesting import FreeRectIndex, PanelPiece, SheetNester
+
+KERF = 0.125
+
+
+def assert_valid_layout(sheets, kerf=KERF):
+    for sheet in sheets:
+        parts = sheet.placements
+        for p in parts:
+            assert p.x >= 0 and p.y >= 0
+            assert p.x + p.width <= sheet.width + 1e-9
+            assert p.y + p.height <= sheet.height + 1e-9
+        for i, a in enumerate(parts):
+            for b in parts[i + 1:]:
+                assert (a.x + a.width + kerf <= b.x + 1e-9 or b.x + b.width + kerf <= a.x + 1e-9
+                        or a.y + a.height + kerf <= b.y + 1e-9 or b.y + b.height + kerf <= a.y + 1e-9)
+
+
+class TestFreeRectIndex:
+    """Test cases for the bucketed free-rectangle index."""
+
+    def test_best_fit_prefers_smallest_area(self):
+        index = FreeRectIndex()
+        index.add(0, 0, 0, 96, 48)
+        index.add(0, 0, 0, 20, 20)
+        index.add(1, 0, 0, 30, 12)
+        score, rect_id = index.best_fit(18, 10)
+        assert index.rects[rect_id] == (1, 0, 0, 30, 12)
+        assert index.best_fit(97, 1) is None
+
+
+class TestSheetNester:
+    """Test cases for guillotine nesting."""
+
+    def test_exact_quarters_fill_one_sheet(self):
+        nester = SheetNester(kerf=0)
+        nested = nester.nest([PanelPiece(48, 24, "3/4 plywood", 4, "Shelf")])
+        assert len(nested["3/4 plywood"]) == 1
+        assert_valid_layout(nested["3/4 plywood"], kerf=0)
+
+    def test_kerf_pushes_parts_apart(self):
+        nested = SheetNester(kerf=KERF).nest([PanelPiece(48, 24, "3/4 plywood", 4, "Shelf")])
+        # Four 48 x 24 parts no longer fit with a blade between them
+        assert len(nested["3/4 plywood"]) == 2
+        assert_valid_layout(nested["3/4 plywood"])
+
+    def test_rotation_and_grain(self):
+        nested = SheetNester().nest([PanelPiece(40, 90, "1/4 plywood", 1, "Back")])
+        assert nested["1/4 plywood"][0].placements[0].rotated
+        nester = SheetNester()
+        assert nester.nest([PanelPiece(40, 90, "1/4 plywood", 1, "Back", rotatable=False)]) == {"1/4 plywood": []}
+        assert [p.label for p in nester.unplaced] == ["Back"]
+
+    def test_many_parts_stay_valid_and_dense(self):
+        rng = random.Random(4)
+        parts = [PanelPiece(rng.randint(4, 40), rng.randint(4, 30), "3/4 mdf", rng.randint(1, 4), f"p{i}")
+                 for i in range(300)]
+        sheets = SheetNester().nest(parts)["3/4 mdf"]
+        assert_valid_layout(sheets)
+        placed = sorted(p.label for sheet in sheets for p in sheet.placements)
+        assert placed == sorted(p.label for p in parts for _ in range(p.quantity))
+        area = sum(p.width * p.height * p.quantity for p in parts)
+        assert area / (len(sheets) * 96 * 48) > 0.85
+
+    def test_cut_list_prices_sheets(self, project_dir):
+        nester = SheetNester()
+        layout = nester.generate_cut_list(nester.nest([PanelPiece(41, 11, "3/4 plywood", 1, "Bottom")]))
+        assert layout["3/4 plywood"]["total_sheets"] == 1
+        assert layout["3/4 plywood"]["total_cost"] == pytest.approx(58.00)
+        assert layout["summary"]["total_sheets"] == 1
+
+
+class TestSheetGoodsInBOM:
+    """Test cases for panels in the BOM and shopping list."""
+
+    def test_storage_bench_shopping_list_buys_plywood(self, project_dir):
+        bom = BOMGenerator()
+        bom.generate_storage_bench_bom(48, 18, 18)
+        panels = bom.panel_pieces()
+        assert [(p.material, p.width, p.height) for p in panels] == [("3/4 plywood", 41, 11)]
+        shopping = bom.generate_shopping_list({}, SheetNester().nest(panels))
+        assert shopping["sheets"]["3/4 plywood"]["4x8"]["quantity"] == 1
+        assert shopping["total_cost"] == pytest.approx(58.00)
+        assert "3/4 plywood:" in bom.format_bom_text()
@@ -0,0 +1,47 @@
+"""Startup budget for the CLI."""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+# Seconds `import main` may add to a bare interpreter start. Wall-clock time depends on
+# the machine, so the timing test only runs when a budget is set, e.g. =0.3
+STARTUP_BUDGET = os.environ.get("OPENCRAFTSHOP_STARTUP_BUDGET")
+# Loaded only by the options that use them, never on the --no-visualize path
+DEFERRED = ("rich", "visualize_terminal", "column_generation", "local_search",
+            "optimization_cache", "offcut_inventory", "sqlite3", "concurrent.futures.process", "subprocess")
+IMPORT_MAIN = "import sys; sys.path.insert(0, 'src'); import main"
+
+
+def fastest(code, runs=5):
+    """Best wall time of a fresh interpreter running `code`, the least noisy estimate"""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+class TestStartup:
+    """Cold-start cost of main.py."""
+
+    def test_heavy_modules_are_deferred(self):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_MAIN + "; import json; print(json.dumps(sorted(sys.modules)))"],
+            cwd=ROOT, check=True, capture_output=True, text=True
+        )
+        loaded = set(json.loads(result.stdout))
+        assert [name for name in DEFERRED if name in loaded] == []
+
+    @pytest.mark.skipif(not STARTUP_BUDGET, reason="set OPENCRAFTSHOP_STARTUP_BUDGET to time startup")
+    def test_cold_start_within_budget(self):
+        startup = fastest(IMPORT_MAIN) - fastest("pass")
+        assert startup < float(STARTUP_BUDGET), (
+            f"import main took {startup:.3f}s over a bare interpreter, budget {STARTUP_BUDGET}s"
+        )
@@ -0,0 +1,66 @@
+"""Unit tests for fixed-point lengths and metric stock."""
+import pytest
+
+from generate_bom import generate_shopping_list
+from optimize_cuts import CutOptimizer, CutPiece
+from price_catalog import get_catalog
+from units import format_length, from_ticks, stock_label, stock_price_key, to_inches, to_ticks
+
+
+class TestUnits:
+    """Test cases for the tick conversions."""
+
+    def test_fractions_and_millimetres_are_whole_ticks(self):
+        assert to_ticks(1 / 64) == 3175
+        assert to_ticks(0.1, 'mm') == 800
+        assert to_ticks(25.4, 'mm') == to_ticks(1)
+
+    def test_round_trip(self):
+        assert from_ticks(to_ticks(34.5)) == 34.5
+        assert from_ticks(to_ticks(2400, 'mm'), 'mm') == 2400
+        assert isinstance(from_ticks(to_ticks(96)), int)
+
+    def test_to_inches(self):
+        assert to_inches(914.4, 'mm') == 36
+        assert to_inches(3, 'ft') == 36
+
+    def test_format_length(self):
+        assert format_length(34.5) == '34.5"'
+        assert format_length(36, 'mm') == '914.4 mm'
+        assert format_length(1.5, 'in', 2) == '1.50"'
+
+    def test_stock_keys(self):
+        assert stock_price_key(96) == '8'
+        assert stock_label(96) == "8'"
+        assert stock_price_key(to_inches(2400, 'mm')) == '2400mm'
+        assert stock_label(to_inches(2400, 'mm')) == '2400 mm'
+
+
+class TestFixedPointOptimizer:
+    """Test cases for integer length arithmetic in the optimizer."""
+
+    def test_same_plan_whatever_unit_the_lengths_were_given_in(self):
+        inches = [CutPiece(36, '2x4', 4, 'Legs'), CutPiece(22.5, '2x4', 3, 'Rails')]
+        metric = [CutPiece(to_inches(914.4, 'mm'), '2x4', 4, 'Legs'),
+                  CutPiece(to_inches(571.5, 'mm'), '2x4', 3, 'Rails')]
+        assert CutOptimizer().optimize(inches) == CutOptimizer().optimize(metric)
+
+    def test_board_fill_is_exact(self):
+        # Fifteen 6.4" cuts fill a 96" board exactly; summed as floats they come to 96.00000000000001
+        stocks = CutOptimizer(kerf=0).optimize([CutPiece(6.4, '1x2', 15, 'Slats')])['1x2']
+        assert len(stocks) == 1
+        assert sum(to_ticks(cut[0]) for cut in stocks[0].cuts) == to_ticks(96)
+
+    def test_metric_catalog(self, project_dir):
+        lengths = get_catalog().stock_lengths('metric')
+        assert lengths[0] == to_inches(2400, 'mm')
+        optimizer = CutOptimizer(standard_lengths=lengths)
+        optimized = optimizer.optimize([CutPiece(to_inches(1800, 'mm'), '2x4', 2, 'Rails')])
+        assert {stock.length for stock in optimized['2x4']} <= set(lengths)
+        shopping = generate_shopping_list(optimized)
+        assert shopping['items'][0]['description'] == '2x4 x 2400 mm'
+        assert shopping['total_cost'] > 0
+
+    def test_unknown_catalog(self, project_dir):
+        with pytest.raises(ValueError, match="Unknown stock catalog"):
+            get_catalog().stock_lengths('furlongs')